@@ -1,5 +1,6 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
+from backend.services.tool_registry import tool
 
 router = APIRouter()
 
@@ -7,6 +8,7 @@ class InsuranceRequest(BaseModel):
     ticket_id: str
     plan: str
 
+@tool("add_insurance")
 @router.post("/add-insurance")
 def add_insurance(req: InsuranceRequest):
     return {
@@ -1,5 +1,6 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
+from backend.services.tool_registry import tool
 
 router = APIRouter()
 
@@ -7,6 +8,7 @@ class BaggageRequest(BaseModel):
     ticket_id: str
     extra_kg: int
 
+@tool("baggage_upgrade")
 @router.post("/baggage-upgrade")
 def baggage_upgrade(req: BaggageRequest):
     return {
@@ -1,6 +1,8 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
-import random
+import uuid
+from backend.utils import db
+from backend.services.tool_registry import tool
 
 router = APIRouter()
 
@@ -10,9 +12,17 @@ class TicketRequest(BaseModel):
     date: str
     traveler_name: str
 
+@tool("book_ticket", produces=["ticket_id"])
 @router.post("/book-ticket")
 def book_ticket(req: TicketRequest):
-    ticket_id = f"TKT{random.randint(1000,9999)}"
+    # Random 4-digit IDs collide long before the store fills up
+    ticket_id = f"TKT{uuid.uuid4().hex[:12].upper()}"
+    db.add_ticket(ticket_id, {
+        "from_city": req.from_city,
+        "to_city": req.to_city,
+        "date": req.date,
+        "traveler_name": req.traveler_name,
+    })
     return {
         "status": "success",
         "ticket_id": ticket_id,
@@ -0,0 +1,93 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from typing import Optional
+from backend.services.workflow_manager import execute_workflow
+from backend.utils.business_rules import get_rules_snapshot
+from backend.utils.models import Action, IntentResponse
+
+router = APIRouter()
+
+class BookingWithExtrasRequest(BaseModel):
+    from_city: str
+    to_city: str
+    date: str
+    traveler_name: str
+    seat_number: Optional[str] = None
+    extra_kg: int = 0
+    insurance_plan: Optional[str] = None   # "Basic" / "Premium"
+    class_type: str = "economy"            # business class gets priority boarding
+    apply_discount: bool = False           # use the discount currently active in the rules
+    apply_rewards: bool = False
+    contact_customer: bool = False
+
+def booking_actions(req: BookingWithExtrasRequest):
+    """The booking followed by the selected extras; extras get the ticket_id from the booking step."""
+    actions = [Action(tool="book_ticket", params={
+        "from_city": req.from_city,
+        "to_city": req.to_city,
+        "date": req.date,
+        "traveler_name": req.traveler_name,
+    })]
+    if req.extra_kg > 0:
+        actions.append(Action(tool="baggage_upgrade", params={"extra_kg": str(req.extra_kg)}))
+    if req.seat_number:
+        actions.append(Action(tool="select_seat", params={"seat_number": req.seat_number}))
+    if req.insurance_plan and req.insurance_plan != "None":
+        actions.append(Action(tool="add_insurance", params={"plan": req.insurance_plan}))
+    if req.class_type.lower() == "business":
+        actions.append(Action(tool="priority_boarding", params={"class_type": req.class_type}))
+    if req.apply_rewards:
+        actions.append(Action(tool="apply_rewards", params={"traveler_id": req.traveler_name}))
+    if req.contact_customer:
+        actions.append(Action(tool="contact_customer", params={
+            "name": req.traveler_name,
+            "reason": "booking confirmed",
+        }))
+    return actions
+
+@router.post("/book-with-extras")
+async def book_with_extras(req: BookingWithExtrasRequest):
+    # One rules snapshot for the whole booking, returned so the caller need not re-fetch /rules
+    snapshot = get_rules_snapshot()
+    rules = snapshot.to_dict()
+    result = await execute_workflow(IntentResponse(intent="book_ticket", actions=booking_actions(req)), rules=snapshot)
+
+    if result.get("status") == "invalid_params":
+        # Nothing ran; tell the caller which fields to fix
+        return JSONResponse(status_code=422, content={
+            "status": "invalid_params",
+            "errors": result["errors"],
+            "steps": [],
+            "rules_version": snapshot.version,
+            "rules_etag": snapshot.etag,
+        })
+
+    booking = next((step for step in result["steps"] if step["tool"] == "book_ticket"), None)
+    ticket_id = ((booking or {}).get("response") or {}).get("ticket_id")
+
+    # Informational only: no step applies the rules discount to the ticket, it is priced at payment
+    discount_eligibility = None
+    if req.apply_discount:
+        active = rules.get("discount") or {}
+        if "apply_discount" in rules.get("skip_steps", []):
+            discount_eligibility = {"status": "skipped_by_rule"}
+        elif active.get("enabled"):
+            discount_eligibility = {
+                "status": "eligible",
+                "ticket_id": ticket_id,
+                "amount_percent": active.get("amount_percent"),
+                "expires_at": active.get("expires_at"),
+            }
+        else:
+            discount_eligibility = {"status": "not_eligible", "reason": "no discount is active"}
+
+    return {
+        "status": "success" if ticket_id else "failed",
+        "ticket_id": ticket_id,
+        "steps": result["steps"],
+        "discount_eligibility": discount_eligibility,
+        "rules": rules,
+        "rules_version": snapshot.version,
+        "rules_etag": snapshot.etag,
+    }
@@ -1,18 +1,131 @@
-from fastapi import APIRouter
-from backend.utils.business_rules import load_rules, update_rules, reset_rules
+import asyncio
+import threading
+from urllib.parse import quote
+from typing import Callable, Optional, Set, Tuple
+
+from fastapi import APIRouter, Header, HTTPException, Query, Response
+from backend.utils.business_rules import (
+    RulesSnapshot, add_rules_listener, get_rules_snapshot, load_stored_rules, rules_resolver,
+    update_rules, reset_rules,
+)
+from backend.utils.metrics import registry
 
 router = APIRouter()
 
+# Upper bound for one /rules/watch request; clients simply ask again
+MAX_WATCH_SECONDS = 60.0
+# Hand edits to rules.json are only noticed when the file is checked, so waiters re-check this often
+WATCH_RECHECK_SECONDS = 2.0
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    # Weak comparison, as for GET: W/"x" matches "x"
+    return "*" in tags or any((tag[2:] if tag.startswith("W/") else tag) == etag for tag in tags)
+
+class _RulesWaiters:
+    """Wakes pending /rules/watch requests when new effective rules are published."""
+
+    def __init__(self):
+        self._waiters: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = set()
+        self._lock = threading.Lock()
+
+    def publish(self, snapshot: RulesSnapshot):
+        # Listeners run on whichever thread wrote the rules
+        with self._lock:
+            waiters, self._waiters = self._waiters, set()
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_resolve, future, snapshot)
+
+    async def wait(self, is_current: Callable[[RulesSnapshot], bool], timeout: float) -> RulesSnapshot:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            snapshot = get_rules_snapshot()
+            remaining = deadline - loop.time()
+            if not is_current(snapshot) or remaining <= 0:
+                return snapshot
+            waiter = (loop, loop.create_future())
+            with self._lock:
+                self._waiters.add(waiter)
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter[1]), min(remaining, WATCH_RECHECK_SECONDS))
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                with self._lock:
+                    self._waiters.discard(waiter)
+
+    def __len__(self):
+        return len(self._waiters)
+
+def _resolve(future: asyncio.Future, snapshot: RulesSnapshot):
+    if not future.done():
+        future.set_result(snapshot)
+
+rules_waiters = _RulesWaiters()
+add_rules_listener(rules_waiters.publish)
+
+registry.callback(
+    "smartflow_rules_watchers", "Clients waiting on /rules/watch for the next rules version",
+    lambda: {(): len(rules_waiters)})
+
 @router.get("/rules")
-def get_rules():
-    return load_rules()
+def get_rules(response: Response, if_none_match: Optional[str] = Header(None)):
+    """The rules in effect now; send the ETag back as If-None-Match to get a 304 while they are unchanged."""
+    snapshot = get_rules_snapshot()
+    headers = {
+        "ETag": snapshot.etag,
+        "X-Rules-Version": str(snapshot.version),
+        "X-Rules-Window": quote(snapshot.window, safe=",-_.:+"),
+        "Cache-Control": "no-cache",
+    }
+    if _etag_matches(if_none_match, snapshot.etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return snapshot.to_dict()
+
+@router.get("/rules/watch")
+async def watch_rules(
+    response: Response,
+    etag: Optional[str] = Query(None, description="ETag of the rules the client already has"),
+    version: Optional[int] = Query(None, description="Rules version the client already has"),
+    timeout: float = Query(30.0, ge=0, le=MAX_WATCH_SECONDS),
+):
+    """Long poll: returns as soon as the rules differ from what the client has, or after `timeout` seconds.
+
+    With `etag`, scheduled windows opening or closing count as a change; with
+    `version`, only writes do.
+    """
+    if etag is not None:
+        etag = etag if etag.startswith('"') else f'"{etag}"'
+        is_current = lambda snapshot: snapshot.etag == etag
+    elif version is not None:
+        is_current = lambda snapshot: snapshot.version == version
+    else:
+        raise HTTPException(status_code=422, detail="Pass etag or version")
+    snapshot = await rules_waiters.wait(is_current, timeout)
+    response.headers["ETag"] = snapshot.etag
+    if is_current(snapshot):
+        return {"changed": False, "version": snapshot.version, "window": snapshot.window}
+    return {"changed": True, "version": snapshot.version, "window": snapshot.window, "rules": snapshot.to_dict()}
+
+@router.get("/rules/timeline")
+def rules_timeline(limit: int = Query(20, ge=1, le=500)):
+    """Scheduled rule windows as stored, and when the active set changes next."""
+    return {
+        "scheduled_rules": load_stored_rules().get("scheduled_rules", []),
+        "current": rules_resolver.stats(),
+        "transitions": rules_resolver.upcoming(limit),
+    }
 
 @router.post("/rules/update")
 def set_rules(update: dict):
-    update_rules(update)
-    return {"status": "updated"}
+    snapshot = update_rules(update)
+    return {"status": "updated", "version": snapshot.version}
 
 @router.post("/rules/reset")
 def reset():
-    reset_rules()
-    return {"status": "reset"}
+    snapshot = reset_rules()
+    return {"status": "reset", "version": snapshot.version}
@@ -1,5 +1,7 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
+from backend.utils import db
+from backend.services.tool_registry import tool
 
 router = APIRouter()
 
@@ -7,8 +9,11 @@ class CancelRequest(BaseModel):
     ticket_id: str
     reason: str
 
+@tool("cancel_ticket", invalidates=["refund_status"])
 @router.post("/cancel-ticket")
 def cancel_ticket(req: CancelRequest):
+    # Tickets booked before the store existed (or named by the LLM) are still acknowledged
+    db.cancel_ticket(req.ticket_id, req.reason)
     return {
         "status": "cancelled",
         "ticket_id": req.ticket_id,
@@ -1,6 +1,7 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
 import random
+from backend.services.tool_registry import tool
 
 router = APIRouter()
 
@@ -8,6 +9,7 @@ class ConfirmRequest(BaseModel):
     ticket_id: str
     traveler_name: str
 
+@tool("confirm_ticket", runs_after=["payment"])
 @router.post("/confirm-ticket")
 def confirm(req: ConfirmRequest):
     if random.random() < 0.2:
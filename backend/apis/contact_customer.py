@@ -1,5 +1,6 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
+from backend.services.tool_registry import tool
 
 router = APIRouter()
 
@@ -8,6 +9,7 @@ class ContactRequest(BaseModel):
     reason: str
     ticket_id: str
 
+@tool("contact_customer")
 @router.post("/contact-customer")
 def contact_customer(req: ContactRequest):
     return {
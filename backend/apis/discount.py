@@ -1,7 +1,11 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
 from datetime import datetime, timedelta
-from threading import Timer
+import uuid
+
+from backend.services.expiry_scheduler import expiry_scheduler
+from backend.services.tool_registry import tool
+from backend.utils.state_backend import state
 
 router = APIRouter()
 
@@ -9,23 +13,29 @@ class DiscountRequest(BaseModel):
     percent: float
     duration_days: int
 
-active_discounts = []
+# Active discounts live in the state backend, so every worker sees the same ones;
+# the expiry scheduler removes each when valid_until passes
+def remove_discount(discount_id, _payload=None):
+    state.remove_discount(discount_id)
+
+def restore_discount(discount_id, discount):
+    state.put_discount(discount_id, discount)
 
-def remove_discount(discount):
-    active_discounts.remove(discount)
+expiry_scheduler.register("discount", remove_discount, restore_discount)
 
+@tool("apply_discount")
 @router.post("/apply-discount")
 def apply_discount(req: DiscountRequest):
     end_time = datetime.now() + timedelta(days=req.duration_days)
     discount = {
+        "id": f"DSC{uuid.uuid4().hex[:12].upper()}",
         "percent": req.percent,
         "valid_until": end_time.isoformat()
     }
-    active_discounts.append(discount)
+    state.put_discount(discount["id"], discount)
 
     # Schedule removal
-    seconds = req.duration_days * 86400
-    Timer(seconds, remove_discount, args=[discount]).start()
+    expiry_scheduler.schedule(discount["id"], "discount", end_time.timestamp(), discount)
 
     return {
         "status": "applied",
@@ -34,4 +44,4 @@ def apply_discount(req: DiscountRequest):
 
 @router.get("/active-discounts")
 def get_discounts():
-    return {"discounts": active_discounts}
+    return {"discounts": state.list_discounts()}
@@ -1,5 +1,6 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
+from backend.services.tool_registry import tool
 
 router = APIRouter()
 
@@ -8,6 +9,7 @@ class EmailRequest(BaseModel):
     subject: str
     body: str
 
+@tool("send_email", runs_after=["confirm_ticket"])
 @router.post("/send-email")
 def send_email(req: EmailRequest):
     return {
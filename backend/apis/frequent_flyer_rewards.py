@@ -1,5 +1,6 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
+from backend.services.tool_registry import tool
 
 router = APIRouter()
 
@@ -7,6 +8,7 @@ class RewardRequest(BaseModel):
     traveler_id: str
     ticket_id: str
 
+@tool("apply_rewards")
 @router.post("/apply-rewards")
 def apply_rewards(req: RewardRequest):
     return {
@@ -1,5 +1,6 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
+from backend.services.tool_registry import tool
 
 router = APIRouter()
 
@@ -7,6 +8,7 @@ class MealRequest(BaseModel):
     ticket_id: str
     meal_type: str  # veg/non-veg/jain etc.
 
+@tool("meal_preference")
 @router.post("/meal-preference")
 def meal_preference(req: MealRequest):
     return {
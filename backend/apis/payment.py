@@ -1,11 +1,13 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
+from backend.services.tool_registry import tool
 
 router = APIRouter()
 
 class PaymentRequest(BaseModel):
     ticket_id: str
 
+@tool("payment", aliases=["process_payment"])
 @router.post("/process-payment")
 def process_payment(payload: PaymentRequest):
     return {
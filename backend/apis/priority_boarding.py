@@ -1,5 +1,6 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
+from backend.services.tool_registry import tool
 
 router = APIRouter()
 
@@ -7,6 +8,7 @@ class PriorityRequest(BaseModel):
     ticket_id: str
     class_type: str  # business/economy
 
+@tool("priority_boarding")
 @router.post("/priority-boarding")
 def priority_boarding(req: PriorityRequest):
     if req.class_type.lower() != "business":
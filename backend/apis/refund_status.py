@@ -1,12 +1,14 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
 import random
+from backend.services.tool_registry import tool
 
 router = APIRouter()
 
 class RefundRequest(BaseModel):
     ticket_id: str
 
+@tool("refund_status", cache_ttl=30)
 @router.post("/refund-status")
 def refund_status(req: RefundRequest):
     status = random.choice(["processing", "refunded", "failed"])
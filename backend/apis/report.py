@@ -1,15 +1,78 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Query
+from datetime import datetime
+from typing import Literal, Optional
+import os
+from backend.services.report_sink import ReportSink
+from backend.services.report_store import ReportStore
+from backend.utils.metrics import registry
+from backend.services.tool_registry import tool
+from backend.utils.state_backend import state
 
 router = APIRouter()
 
-# This would connect to real logs later
-report_log = []
+# Append-only log: recent entries in the state backend, older ones in Parquet segments on disk
+report_store = ReportStore(
+    os.environ.get("SMARTFLOW_REPORT_DIR", "report_log"),
+    segment_rows=int(os.environ.get("SMARTFLOW_REPORT_SEGMENT_ROWS", "50000")),
+    max_segments=int(os.environ.get("SMARTFLOW_REPORT_MAX_SEGMENTS", "0")),
+    tail=state.report_tail(),
+)
+
+# Workflow steps log through the sink so auditing stays off the critical path
+report_sink = ReportSink(
+    report_store.append,
+    batch_size=int(os.environ.get("SMARTFLOW_REPORT_BATCH_SIZE", "100")),
+    flush_interval=float(os.environ.get("SMARTFLOW_REPORT_FLUSH_INTERVAL", "0.5")),
+)
+
+registry.callback(
+    "smartflow_report_backlog", "Report entries buffered and not yet written",
+    lambda: {(): report_sink.stats()["backlog"]})
+registry.callback(
+    "smartflow_report_entries_total", "Report entries by what happened to them",
+    lambda: {(outcome,): report_sink.stats()[outcome] for outcome in ("submitted", "flushed", "dropped")},
+    ["outcome"], kind="counter")
+
+def _timestamp(value: Optional[str]) -> Optional[float]:
+    # Epoch seconds or an ISO datetime
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise HTTPException(status_code=422, detail=f"Invalid time: {value}")
 
 @router.get("/report")
-def get_report():
-    return {"log": report_log}
+def get_report(
+    tool: Optional[str] = None,
+    status: Optional[str] = None,
+    since: Optional[str] = Query(None, description="epoch seconds or ISO datetime"),
+    until: Optional[str] = Query(None, description="epoch seconds or ISO datetime"),
+    cursor: Optional[int] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(100, ge=1, le=1000),
+    fields: Optional[str] = Query(None, description="comma-separated fields to return, e.g. tool,status"),
+    order: Literal["asc", "desc"] = "asc",
+):
+    # Include entries still waiting in the buffer
+    report_sink.flush()
+    page = report_store.query(
+        tool=tool, status=status, since=_timestamp(since), until=_timestamp(until),
+        cursor=cursor, limit=limit,
+        fields=[f.strip() for f in fields.split(",") if f.strip()] if fields else None,
+        descending=order == "desc",
+    )
+    return {"log": page["entries"], "next_cursor": page["next_cursor"]}
 
+@tool("report")
 @router.post("/report")
 def add_report(entry: dict):
-    report_log.append(entry)
+    report_sink.submit(entry)
     return {"status": "logged", "entry": entry}
+
+@router.get("/report/stats")
+def get_report_stats():
+    return {**report_sink.stats(), "store": report_store.stats()}
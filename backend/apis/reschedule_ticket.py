@@ -1,5 +1,7 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
+from backend.utils import db
+from backend.services.tool_registry import tool
 
 router = APIRouter()
 
@@ -7,8 +9,11 @@ class RescheduleRequest(BaseModel):
     ticket_id: str
     new_date: str
 
+@tool("reschedule_ticket", invalidates=["refund_status"])
 @router.post("/reschedule-ticket")
 def reschedule(req: RescheduleRequest):
+    # Tickets booked before the store existed (or named by the LLM) are still acknowledged
+    db.update_ticket(req.ticket_id, {"date": req.new_date})
     return {
         "status": "rescheduled",
         "ticket_id": req.ticket_id,
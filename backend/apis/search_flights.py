@@ -1,22 +1,57 @@
-from fastapi import APIRouter
+from datetime import date, timedelta
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-import random
+from typing import Optional
+from backend.utils.flight_schedule import check_clock, get_schedule, parse_travel_date
+from backend.services.tool_registry import tool
+
+try:  # pydantic v2
+    from pydantic import field_validator as _validator
+except ImportError:  # pydantic v1
+    from pydantic import validator as _validator
 
 router = APIRouter()
 
+# How far ahead to look when the requested date can't be read
+SEARCH_AHEAD_DAYS = 30
+
 class FlightSearchRequest(BaseModel):
     from_city: str
     to_city: str
-    date: str
+    date: str                        # YYYY-MM-DD or e.g. "12 August"; first day when date_to is given
+    date_to: Optional[str] = None    # inclusive end of a date range
+    time_from: Optional[str] = None  # HH:MM, earliest departure
+    time_to: Optional[str] = None    # HH:MM, latest departure
+    limit: int = 20
+
+    @_validator("time_from", "time_to")
+    def _valid_time(cls, value):
+        # Blank means no filter, as it always has
+        return check_clock(value) if value else None
 
+@tool("search_flights", cache_ttl=60)
 @router.post("/search-flights")
 def search_flights(req: FlightSearchRequest):
-    flights = [
-        {"flight": "AI-101", "time": "10:00 AM"},
-        {"flight": "SG-404", "time": "3:00 PM"},
-        {"flight": "6E-666", "time": "8:30 PM"}
-    ]
-    return {
+    today = date.today()
+    first_day = parse_travel_date(req.date, today)
+    last_day = parse_travel_date(req.date_to, today)
+    note = None
+    if first_day is None:
+        # Dates from the LLM are often free-form; an unreadable one searches the route, not fails
+        first_day, last_day = today, today + timedelta(days=SEARCH_AHEAD_DAYS)
+        note = f"Could not read the date {req.date!r}; showing the next flights on this route"
+    try:
+        flights = get_schedule().search(
+            req.from_city, req.to_city, first_day.isoformat(),
+            date_to=last_day.isoformat() if last_day else None, time_from=req.time_from, time_to=req.time_to,
+            limit=max(0, min(req.limit, 500)),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid search: {e}")
+    response = {
         "status": "success",
-        "available_flights": random.sample(flights, k=2)
+        "available_flights": flights
     }
+    if note:
+        response["note"] = note
+    return response
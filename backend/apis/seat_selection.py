@@ -1,5 +1,6 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
+from backend.services.tool_registry import tool
 
 router = APIRouter()
 
@@ -7,6 +8,7 @@ class SeatRequest(BaseModel):
     ticket_id: str
     seat_number: str
 
+@tool("select_seat")
 @router.post("/select-seat")
 def select_seat(req: SeatRequest):
     return {
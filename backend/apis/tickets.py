@@ -0,0 +1,22 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+from backend.utils import db
+
+router = APIRouter()
+
+@router.get("/tickets")
+def list_tickets(
+    traveler_name: Optional[str] = None,
+    status: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+):
+    return {"tickets": db.find_tickets(traveler_name, status, date_from, date_to, limit)}
+
+@router.get("/tickets/{ticket_id}")
+def get_ticket(ticket_id: str):
+    ticket = db.get_ticket(ticket_id)
+    if ticket is None:
+        raise HTTPException(status_code=404, detail=f"Ticket {ticket_id} not found")
+    return {"ticket_id": ticket_id, "status": db.get_ticket_status(ticket_id), **ticket}
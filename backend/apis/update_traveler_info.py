@@ -1,5 +1,7 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
+from backend.utils import db
+from backend.services.tool_registry import tool
 
 router = APIRouter()
 
@@ -8,8 +10,11 @@ class UpdateInfo(BaseModel):
     traveler_name: str
     contact: str
 
+@tool("update_info")
 @router.post("/update-info")
 def update_info(req: UpdateInfo):
+    # Tickets booked before the store existed (or named by the LLM) are still acknowledged
+    db.update_ticket(req.ticket_id, {"traveler_name": req.traveler_name, "contact": req.contact})
     return {
         "status": "updated",
         "ticket_id": req.ticket_id,
@@ -1,77 +1,179 @@
-from fastapi import FastAPI, Query
-from fastapi.responses import JSONResponse
+import time
+
+# Measured from the first line of the app module, for cold-start tracking
+_import_started = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.requests import Request
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
-from backend.services.cohere_client import cohere_to_structured_json
-from backend.services.workflow_manager import execute_workflow
-from backend.utils.models import IntentResponse
-from backend.utils.business_rules import load_rules, update_rules
-from backend.apis import (
-    book_ticket, search_flights, payment, email, confirmation, report,
-    contact_customer, discount,
-    cancel_ticket, update_traveler_info, add_travel_insurance,
-    frequent_flyer_rewards, priority_boarding, seat_selection,
-    baggage_upgrade, meal_preference, reschedule_ticket, refund_status,
-    business_rules_api
-)
+from backend.services.cohere_client import llm_cache, llm_gateway, fast_path_stats, prompt_builder
+from backend.services.command_runner import process_command, process_structured
+from backend.services.expiry_scheduler import expiry_scheduler, watch_rule_expiry
+from backend.utils.models import BatchExecuteRequest
+from backend.utils.business_rules import get_rules_snapshot, load_rules, update_rules
+from backend.utils.metrics import registry
+from backend.services.tool_registry import tool_registry
+from backend.services.tool_cache import tool_cache
+from backend.services.tool_dispatch import model_field_names
+from backend.apis import report
+import asyncio
 import json
 import re
 
 app = FastAPI()
 
+MAX_BATCH_ITEMS = 1000
+MAX_BATCH_CONCURRENCY = 64
+
+# Seconds spent in each startup phase; served under /metrics as smartflow_startup_seconds
+startup_seconds = {}
+
+registry.callback(
+    "smartflow_startup_seconds", "Time spent in each startup phase",
+    lambda: {(phase,): seconds for phase, seconds in startup_seconds.items()}, ["phase"])
+
+@app.on_event("startup")
+async def record_startup_time():
+    startup_seconds["ready"] = time.perf_counter() - _import_started
+
+@app.on_event("startup")
+async def start_report_sink():
+    await report.report_sink.start()
+
+@app.on_event("startup")
+async def start_expiry_scheduler():
+    watch_rule_expiry()
+    await expiry_scheduler.start()
+
+@app.on_event("shutdown")
+async def stop_report_sink():
+    # Flush whatever is still buffered before the process exits
+    await report.report_sink.stop()
+    report.report_store.seal()
+
+@app.on_event("shutdown")
+async def stop_expiry_scheduler():
+    await expiry_scheduler.stop()
+
 @app.get("/")
 def root():
     return {"message": "Smartflow backend is running."}
 
 @app.post("/execute")
 async def run_command(command: str = Query(..., description="English command")):
-    # Use Cohere to extract intent and structure it into JSON
-    structured = cohere_to_structured_json(command)
-    print("\n--- STRUCTURED INTENT ---")
-    print(structured)
-    parsed = structured
-
-    # If it's a rules update (rule keys present)
-    if any(k in parsed for k in ["skip_steps", "force_steps", "tool_substitutions", "discount"]):
+    return await process_command(command)
+
+@app.api_route("/execute/stream", methods=["GET", "POST"])
+async def run_command_stream(command: str = Query(..., description="English command")):
+    """Like /execute, but streams server-sent events as the command progresses.
+
+    Events: `intent` (parsed command), `rules` (new rules after an update),
+    `plan` (steps after business rules) or `invalid` (params that failed
+    validation; nothing runs), `step` (each tool result as it finishes) and
+    finally `summary` (the same body /execute returns).
+    """
+    events: asyncio.Queue = asyncio.Queue()
+
+    async def run():
         try:
-            update_rules(parsed)
-            return {
-                "status": "rules updated",
-                "new_rules": load_rules(),
-                "raw_response": parsed
-            }
+            result = await process_command(command, on_event=lambda event, data: events.put_nowait((event, data)))
         except Exception as e:
-            return {
-                "error": "Failed to update rules",
-                "details": str(e),
-                "raw_response": parsed
-            }
+            result = {"error": "Failed to execute command", "details": str(e)}
+        events.put_nowait(("summary", result))
 
-    # Otherwise, treat it as workflow intent
-    try:
-        if "tools" in parsed:
-            parsed["actions"] = [
-                {"tool": tool["name"], "params": tool["parameters"]}
-                for tool in parsed["tools"]
-            ]
-            del parsed["tools"]
-
-        intent_data = IntentResponse(**parsed)
-        result = await execute_workflow(intent_data)
-        result["raw_response"] = parsed
-        return result
-    except Exception as e:
-        return {
-            "error": "Failed to execute workflow",
-            "details": str(e),
-            "raw_response": parsed
+    async def stream():
+        task = asyncio.ensure_future(run())
+        try:
+            while True:
+                event, data = await events.get()
+                yield f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+                if event == "summary":
+                    break
+        finally:
+            task.cancel()
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.post("/execute/batch")
+async def run_batch(batch: BatchExecuteRequest):
+    """Run many commands over one connection, streaming one NDJSON line per item as it finishes."""
+    if len(batch.items) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=422, detail=f"At most {MAX_BATCH_ITEMS} items per batch")
+
+    # Workflows in the batch all run against the rules as they were when it started
+    rules = get_rules_snapshot()
+    semaphore = asyncio.Semaphore(max(1, min(batch.concurrency, MAX_BATCH_CONCURRENCY)))
+
+    async def run_item(index: int, item):
+        async with semaphore:
+            try:
+                if isinstance(item, str):
+                    result = await process_command(item, rules=rules)
+                else:
+                    result = await process_structured(jsonable_encoder(item), rules=rules)
+            except Exception as e:
+                result = {"error": "Failed to process item", "details": str(e)}
+        return index, result
+
+    async def stream():
+        tasks = [asyncio.ensure_future(run_item(i, item)) for i, item in enumerate(batch.items)]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                index, result = await finished
+                line = {"index": index, "input": batch.items[index], "result": result}
+                yield json.dumps(jsonable_encoder(line)) + "\n"
+        finally:
+            # Client went away: don't keep working on its behalf
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+@app.get("/llm-cache/stats")
+def get_llm_cache_stats():
+    return llm_cache.stats()
+
+@app.get("/llm/stats")
+def get_llm_stats():
+    return {**llm_gateway.stats(), "fast_path": fast_path_stats.stats(), "prompt": prompt_builder.stats()}
+
+@app.get("/tools")
+def list_tools():
+    """Workflow tools declared in backend/apis, with the route and request fields of each."""
+    return {"tools": [
+        {
+            "name": spec.name,
+            "path": spec.path,
+            "aliases": sorted(spec.aliases),
+            "fields": sorted(model_field_names(spec.body_model)) if spec.body_model not in (None, dict) else [],
+            "produces": sorted(spec.produces),
+            "runs_after": sorted(spec.runs_after),
+            "cache_ttl": spec.cache_ttl,
+            "invalidates": sorted(spec.invalidates),
         }
+        for spec in sorted(tool_registry.specs().values(), key=lambda spec: spec.name)
+    ]}
+
+@app.get("/tool-cache/stats")
+def get_tool_cache_stats():
+    return tool_cache.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    # Prometheus text exposition format
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
 
 @app.post("/update-rules")
 async def update_business_rules(payload: dict):
     try:
-        update_rules(payload)
+        await asyncio.to_thread(update_rules, payload)
         return load_rules()
     except Exception as e:
         return {"error": str(e)}
@@ -94,18 +196,13 @@ async def http_exception_handler(request: Request, exc: StarletteHTTPException):
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     return JSONResponse(
         status_code=422,
-        content={"error": "Validation error", "details": exc.errors()},
+        # pydantic v2 puts the validator's exception object in each error's ctx
+        content={"error": "Validation error", "details": jsonable_encoder(exc.errors())},
     )
 
-# ✅ Register all tool routers
-routers = [
-    book_ticket.router, search_flights.router, payment.router, email.router,
-    confirmation.router, report.router, contact_customer.router, discount.router,
-    cancel_ticket.router, update_traveler_info.router, add_travel_insurance.router,
-    frequent_flyer_rewards.router, priority_boarding.router, seat_selection.router,
-    baggage_upgrade.router, meal_preference.router, reschedule_ticket.router,
-    refund_status.router, business_rules_api.router
-]
-
-for router in routers:
+# ✅ Register every router in backend/apis (tool modules declare themselves with @tool)
+for router in tool_registry.routers():
     app.include_router(router)
+
+startup_seconds["tool_discovery"] = tool_registry.discovery_seconds
+startup_seconds["import"] = time.perf_counter() - _import_started
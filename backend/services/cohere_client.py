@@ -1,17 +1,75 @@
-import cohere
 import os
 import re
 import json
-
-# Use the Cohere API key from environment variable
-CO_API_KEY = os.environ.get("CO_API_KEY")
-if not CO_API_KEY:
-    raise RuntimeError("CO_API_KEY environment variable not set. Please set your Cohere API key.")
-
-co = cohere.Client(CO_API_KEY)
-
-# Prompt to guide LLM for interpreting commands
-COHERE_PROMPT = """
+import threading
+from backend.services.llm_cache import LLMCache
+from backend.services.llm_client import CohereLLMClient, LLMGateway, StubLLMClient
+from backend.services.intent_parser import FastPathStats, parse_command
+from backend.services.prompt_builder import PromptBuilder, load_examples
+from backend.services.json_stream import extract_json
+from backend.utils.metrics import registry
+
+# "cohere" for the real model, "stub" for the deterministic offline model
+LLM_PROVIDER = os.environ.get("SMARTFLOW_LLM", "cohere")
+
+COHERE_MODEL = os.environ.get("COHERE_MODEL", "command-r-plus-08-2024")
+
+LLM_MODEL = "stub" if LLM_PROVIDER == "stub" else COHERE_MODEL
+
+# Stream command completions and stop reading once the JSON object is complete
+LLM_STREAM = os.environ.get("SMARTFLOW_LLM_STREAM", "1") != "0"
+
+_llm_client = None
+_llm_client_lock = threading.Lock()
+
+def get_llm_client():
+    """The LLM client, created on first use so importing the app needs no API key or SDK."""
+    global _llm_client
+    if _llm_client is None:
+        with _llm_client_lock:
+            if _llm_client is None:
+                if LLM_PROVIDER == "stub":
+                    _llm_client = StubLLMClient(latency=float(os.environ.get("SMARTFLOW_STUB_LLM_LATENCY", "0")))
+                else:
+                    # Use the Cohere API key from environment variable
+                    api_key = os.environ.get("CO_API_KEY")
+                    if not api_key:
+                        raise RuntimeError("CO_API_KEY environment variable not set. Please set your Cohere API key.")
+                    _llm_client = CohereLLMClient(api_key, COHERE_MODEL)
+    return _llm_client
+
+# Commands the local parser is at least this sure about never reach the LLM
+FAST_PATH_MIN_CONFIDENCE = float(os.environ.get("SMARTFLOW_FAST_PATH_MIN_CONFIDENCE", "0.8"))
+fast_path_stats = FastPathStats()
+
+# Non-blocking access for request handlers: bounded concurrency and single-flight
+llm_gateway = LLMGateway(get_llm_client, max_concurrency=int(os.environ.get("SMARTFLOW_LLM_MAX_CONCURRENCY", "8")))
+
+# Admins and integrations repeat the same commands; answer those from the cache
+llm_cache = LLMCache(
+    max_entries=int(os.environ.get("SMARTFLOW_LLM_CACHE_SIZE", "1024")),
+    ttl=float(os.environ.get("SMARTFLOW_LLM_CACHE_TTL", "3600")),
+    path=os.environ.get("SMARTFLOW_LLM_CACHE_PATH") or None,
+)
+
+registry.callback(
+    "smartflow_llm_cache_lookups_total", "LLM cache lookups by result",
+    lambda: {(result,): llm_cache.stats()[key] for result, key in
+             (("hit", "hits"), ("disk_hit", "disk_hits"), ("miss", "misses"))},
+    ["result"], kind="counter")
+registry.callback(
+    "smartflow_llm_cache_entries", "Parsed commands held in the in-memory LLM cache",
+    lambda: {(): llm_cache.stats()["entries"]})
+registry.callback(
+    "smartflow_llm_shared_calls_total", "LLM requests that joined an identical call already in flight",
+    lambda: {(): llm_gateway.shared_calls}, kind="counter")
+registry.callback(
+    "smartflow_fast_path_total", "Commands tried on the local parser, and how many it answered",
+    lambda: {("attempt",): fast_path_stats.attempts, ("hit",): fast_path_stats.hits},
+    ["result"], kind="counter")
+
+# Instructions to guide the LLM in interpreting commands; examples are added per command
+COHERE_PROMPT_HEADER = """
 You are a backend configuration assistant for a smart ticket booking system. You will receive natural language commands from a business user and must convert them into structured JSON that modifies business rules or workflows. Your job is to interpret these instructions into one or more of the following fields:
 
 {
@@ -31,75 +89,42 @@ You are a backend configuration assistant for a smart ticket booking system. You
 - Recognize synonyms: e.g. “confirmation mail” → `send_email`, “payment required” → `process_payment`
 - Default discount expiry to 7 days from now if not specified.
 - Return only one top-level JSON object as output. Never explain anything.
+"""
 
-Examples:
----
-Input: “Book tickets directly without needing to pay.”
-Output:
-{
-  "skip_steps": ["process_payment"]
-}
+# Labelled commands; the few most similar to each command go into its prompt
+PROMPT_EXAMPLES_PATH = os.environ.get("SMARTFLOW_PROMPT_EXAMPLES") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "prompt_examples.json")
 
-Input: “Apply a 15% discount until end of this month”
-Output:
-{
-  "discount": {
-    "enabled": true,
-    "amount_percent": 15,
-    "expires_at": "2025-07-31T23:59:59"
-  }
-}
+prompt_builder = PromptBuilder(
+    COHERE_PROMPT_HEADER,
+    load_examples(PROMPT_EXAMPLES_PATH),
+    k=int(os.environ.get("SMARTFLOW_FEW_SHOT_K", "4")),
+    token_budget=int(os.environ.get("SMARTFLOW_PROMPT_TOKEN_BUDGET", "700")),
+    enabled=os.environ.get("SMARTFLOW_FEW_SHOT", "1") != "0",
+)
 
-Input: “Stop sending confirmation emails”
-Output:
-{
-  "skip_steps": ["send_email"]
-}
-
-Input: “Always apply priority boarding and contact the customer”
-Output:
-{
-  "force_steps": ["priority_boarding", "contact_customer"]
-}
-
-Input: “Remove all current rules and disable discounts”
-Output:
-{
-  "skip_steps": [],
-  "force_steps": [],
-  "tool_substitutions": {},
-  "discount": {
-    "enabled": false,
-    "amount_percent": 0,
-    "expires_at": "2025-01-01T00:00:00"
-  }
-}
-"""
+# The prompt with every example, as sent before per-command selection
+COHERE_PROMPT = prompt_builder.full_prompt
 
 def query_cohere(prompt: str) -> str:
-    response = co.chat(
-        model="command-r-plus-08-2024",  # Or use os.environ.get("COHERE_MODEL")
-        message=prompt,
-        preamble=COHERE_PROMPT,
-        max_tokens=512,
-        temperature=0.3,
-    )
-    # Always return a string, fallback to str(response) if .text is missing
-    return response.text.strip() if hasattr(response, "text") else str(response).strip()
+    preamble = prompt_builder.build(prompt).preamble
+    if LLM_STREAM:
+        return get_llm_client().complete_json(prompt, preamble=preamble, max_tokens=512, temperature=0.3)
+    return get_llm_client().complete(prompt, preamble=preamble, max_tokens=512, temperature=0.3)
+
+async def query_cohere_async(prompt: str, key: str = None) -> str:
+    # Callers asking the same thing at the same time share one upstream call
+    key = key or llm_cache.make_key(prompt, prompt_builder.fingerprint, LLM_MODEL)
+    # Built by the caller that makes the upstream call; callers joining it skip the example lookup
+    return await llm_gateway.complete(key, prompt, preamble=lambda: prompt_builder.build(prompt).preamble,
+                                      max_tokens=512, temperature=0.3, json_object=LLM_STREAM)
 
 COHERE_PREAMBLE = "You are an assistant that summarizes user workflow commands in plain English."
 
 # Use Cohere to get a plain English summary or intent
 
 def get_intent_from_cohere(prompt: str) -> str:
-    response = co.chat(
-        model="command-r-plus-08-2024",
-        message=prompt,
-        preamble=COHERE_PREAMBLE,
-        max_tokens=100,
-        temperature=0.3,
-    )
-    return response.text.strip()
+    return get_llm_client().complete(prompt, preamble=COHERE_PREAMBLE, max_tokens=100, temperature=0.3)
 
 # Use Python to structure the output into JSON
 
@@ -114,12 +139,49 @@ def structure_intent_to_json(intent: str) -> dict:
 
 # Example utility to go from user input to structured JSON
 
-def cohere_to_structured_json(user_input: str) -> dict:
-    response = query_cohere(user_input)
-    try:
-        return json.loads(response)
-    except Exception:
-        # Fallback: try to parse with regex if not valid JSON
+def _parse_response(cache_key: str, response: str) -> dict:
+    # Models sometimes wrap the object in a ```json fence or a sentence; take the object out
+    structured = extract_json(response)
+    if structured is None:
+        # Fallback: try to parse with regex if there is no JSON object at all
+        return structure_intent_to_json(response)
+    # Only well-formed answers are cached, so a bad completion is retried next time
+    llm_cache.set(cache_key, json.dumps(structured))
+    return structured
+
+async def _parse_response_async(cache_key: str, response: str) -> dict:
+    structured = extract_json(response)
+    if structured is None:
         return structure_intent_to_json(response)
+    await llm_cache.set_async(cache_key, json.dumps(structured))
+    return structured
+
+def fast_path(user_input: str):
+    result = parse_command(user_input)
+    hit = result.structured is not None and result.confidence >= FAST_PATH_MIN_CONFIDENCE
+    fast_path_stats.record(result, hit)
+    return result.structured if hit else None
 
-    
\ No newline at end of file
+def cohere_to_structured_json(user_input: str) -> dict:
+    structured = fast_path(user_input)
+    if structured is not None:
+        return structured
+
+    cache_key = llm_cache.make_key(user_input, prompt_builder.fingerprint, LLM_MODEL)
+    cached = llm_cache.get(cache_key)
+    if cached is not None:
+        return json.loads(cached)
+    return _parse_response(cache_key, query_cohere(user_input))
+
+async def cohere_to_structured_json_async(user_input: str) -> dict:
+    """Same as cohere_to_structured_json, without blocking the event loop."""
+    structured = fast_path(user_input)
+    if structured is not None:
+        return structured
+
+    cache_key = llm_cache.make_key(user_input, prompt_builder.fingerprint, LLM_MODEL)
+    # The SQLite tier, if configured, is read and written off the event loop
+    cached = await llm_cache.get_async(cache_key)
+    if cached is not None:
+        return json.loads(cached)
+    return await _parse_response_async(cache_key, await query_cohere_async(user_input, key=cache_key))
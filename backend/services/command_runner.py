@@ -0,0 +1,65 @@
+import asyncio
+from typing import Any, Callable, Dict, Optional
+from backend.services.cohere_client import cohere_to_structured_json_async
+from backend.services.workflow_manager import execute_workflow
+from backend.utils.models import IntentResponse
+from backend.utils.business_rules import RulesSnapshot, load_rules, update_rules
+
+RULE_KEYS = ["skip_steps", "force_steps", "tool_substitutions", "discount"]
+
+# Progress callback: called with an event name and a JSON-able payload
+EventCallback = Callable[[str, Dict[str, Any]], None]
+
+async def process_command(
+    command: str, rules: Optional[RulesSnapshot] = None, on_event: Optional[EventCallback] = None
+) -> Dict[str, Any]:
+    # Use Cohere to extract intent and structure it into JSON
+    structured = await cohere_to_structured_json_async(command)
+    print("\n--- STRUCTURED INTENT ---")
+    print(structured)
+    if on_event:
+        on_event("intent", structured)
+    return await process_structured(structured, rules=rules, on_event=on_event)
+
+async def process_structured(
+    parsed: Dict[str, Any], rules: Optional[RulesSnapshot] = None, on_event: Optional[EventCallback] = None
+) -> Dict[str, Any]:
+    """Apply a structured command: either a rules update or a workflow to execute."""
+    # If it's a rules update (rule keys present)
+    if any(k in parsed for k in RULE_KEYS):
+        try:
+            # The write takes the rules file lock and fsyncs; keep it off the event loop
+            snapshot = await asyncio.to_thread(update_rules, parsed)
+            if on_event:
+                on_event("rules", {"version": snapshot.version, "rules": snapshot.to_dict()})
+            return {
+                "status": "rules updated",
+                "new_rules": load_rules(),
+                "raw_response": parsed
+            }
+        except Exception as e:
+            return {
+                "error": "Failed to update rules",
+                "details": str(e),
+                "raw_response": parsed
+            }
+
+    # Otherwise, treat it as workflow intent
+    try:
+        if "tools" in parsed:
+            parsed["actions"] = [
+                {"tool": tool["name"], "params": tool["parameters"]}
+                for tool in parsed["tools"]
+            ]
+            del parsed["tools"]
+
+        intent_data = IntentResponse(**parsed)
+        result = await execute_workflow(intent_data, rules=rules, on_event=on_event)
+        result["raw_response"] = parsed
+        return result
+    except Exception as e:
+        return {
+            "error": "Failed to execute workflow",
+            "details": str(e),
+            "raw_response": parsed
+        }
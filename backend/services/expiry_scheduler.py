@@ -0,0 +1,203 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from backend.utils import db
+from backend.utils.business_rules import (
+    RulesSnapshot, add_rules_listener, cleanup_expired_rules, get_rules_snapshot, rules_resolver, rules_store,
+)
+
+# Never sleep longer than this, so wall-clock jumps are picked up eventually
+MAX_SLEEP = 3600.0
+
+
+class ExpiryKind(NamedTuple):
+    on_expire: Callable[[str, Any], None]
+    # Called at startup for each persisted entry so in-memory state can be rebuilt
+    on_restore: Optional[Callable[[str, Any], None]]
+
+
+class ExpiryScheduler:
+    """One asyncio task serving every timed expiry from a heap.
+
+    `schedule` and `cancel` are O(log n) and O(1) respectively (cancelled
+    entries are dropped lazily when they reach the top of the heap), and both
+    are safe to call from the thread pool that runs sync request handlers.
+    Pending entries are persisted so the queue can be rebuilt after a restart.
+    """
+
+    def __init__(self, persist: bool = True):
+        self.persist = persist
+        self._kinds: Dict[str, ExpiryKind] = {}
+        self._heap: List[list] = []
+        self._entries: Dict[str, list] = {}
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.expired = 0
+        self.failures = 0
+
+    def register(self, kind: str, on_expire: Callable[[str, Any], None],
+                 on_restore: Optional[Callable[[str, Any], None]] = None):
+        self._kinds[kind] = ExpiryKind(on_expire, on_restore)
+
+    def schedule(self, key: str, kind: str, expires_at: float, payload: Any = None, persist: bool = True):
+        """Expire `key` at `expires_at` (epoch seconds); replaces any pending expiry for the key."""
+        entry = [expires_at, next(self._counter), key, kind, payload, True]
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                previous[-1] = False
+            self._entries[key] = entry
+            heapq.heappush(self._heap, entry)
+            earliest = self._heap[0] is entry
+        if persist and self.persist:
+            db.save_expiry(key, kind, expires_at, payload)
+        if earliest:
+            self._notify()
+
+    def cancel(self, key: str) -> bool:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                entry[-1] = False
+        if entry is not None and self.persist:
+            db.delete_expiry(key)
+        return entry is not None
+
+    def pending(self) -> int:
+        return len(self._entries)
+
+    def next_expiry(self) -> Optional[float]:
+        with self._lock:
+            self._drop_cancelled()
+            return self._heap[0][0] if self._heap else None
+
+    def _drop_cancelled(self):
+        # Caller holds the lock
+        while self._heap and not self._heap[0][-1]:
+            heapq.heappop(self._heap)
+
+    def _notify(self):
+        if self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def _pop_due(self, now: float) -> List[list]:
+        due = []
+        with self._lock:
+            self._drop_cancelled()
+            while self._heap and self._heap[0][0] <= now:
+                entry = heapq.heappop(self._heap)
+                if entry[-1]:
+                    entry[-1] = False
+                    self._entries.pop(entry[2], None)
+                    due.append(entry)
+                self._drop_cancelled()
+        return due
+
+    def restore(self):
+        """Rebuild the queue from persisted entries; overdue ones fire on the next tick."""
+        for row in db.load_expiries():
+            kind = self._kinds.get(row["kind"])
+            if kind is None:
+                continue
+            if kind.on_restore is not None:
+                kind.on_restore(row["key"], row["payload"])
+            self.schedule(row["key"], row["kind"], row["expires_at"], row["payload"], persist=False)
+
+    async def start(self):
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        if self.persist:
+            await asyncio.to_thread(self.restore)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            for _, _, key, kind, payload, _ in self._pop_due(time.time()):
+                try:
+                    # Handlers may touch disk; keep them off the event loop
+                    await asyncio.to_thread(self._kinds[kind].on_expire, key, payload)
+                    self.expired += 1
+                except Exception as e:
+                    self.failures += 1
+                    print(f"Expiry handler for {key} failed: {e}")
+                if self.persist:
+                    await asyncio.to_thread(db.delete_expiry, key)
+
+            next_at = self.next_expiry()
+            timeout = MAX_SLEEP if next_at is None else min(MAX_SLEEP, max(0.0, next_at - time.time()))
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": self.pending(),
+            "next_expiry": self.next_expiry(),
+            "expired": self.expired,
+            "failures": self.failures,
+            "running": self._task is not None,
+        }
+
+
+expiry_scheduler = ExpiryScheduler()
+
+RULES_DISCOUNT_KEY = "rules:discount"
+RULES_WINDOW_KEY = "rules:window"
+
+
+def _schedule_rules_discount(snapshot: RulesSnapshot):
+    # Expiry is a property of the stored rules, not of whatever window is open
+    discount = (rules_store.cached() or snapshot).rules.get("discount") or {}
+    expires_at = discount.get("expires_at")
+    if not discount.get("enabled", True) or not expires_at:
+        expiry_scheduler.cancel(RULES_DISCOUNT_KEY)
+        return
+    try:
+        when = datetime.fromisoformat(expires_at).timestamp()
+    except (TypeError, ValueError):
+        return
+    expiry_scheduler.schedule(RULES_DISCOUNT_KEY, "rules.discount", when)
+
+
+def _schedule_rules_window(snapshot: RulesSnapshot):
+    # next_change is the next boundary, or the end of the timeline horizon when nothing changes before it
+    expiry_scheduler.schedule(RULES_WINDOW_KEY, "rules.window", rules_resolver.next_change(), persist=False)
+
+
+def _on_rules_window(key: str, payload: Any):
+    # Only a change of the active set is published, so re-arm here too: at the horizon the
+    # timeline is rebuilt but the rules usually stay the same, and nothing else would schedule
+    _schedule_rules_window(rules_resolver.snapshot())
+
+
+def watch_rule_expiry():
+    """Disable the rules discount when its expires_at passes, and swap in the rules of each
+    scheduled window as it opens or closes, instead of checking on every read."""
+    expiry_scheduler.register("rules.discount", lambda key, payload: cleanup_expired_rules())
+    expiry_scheduler.register("rules.window", _on_rules_window)
+    add_rules_listener(_schedule_rules_discount)
+    add_rules_listener(_schedule_rules_window)
+    snapshot = get_rules_snapshot()
+    _schedule_rules_discount(snapshot)
+    _schedule_rules_window(snapshot)
@@ -0,0 +1,217 @@
+import calendar
+import re
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+# Phrases that name a workflow step, longest first so "confirmation mail" wins over "confirmation"
+TOOL_SYNONYMS: List[Tuple[str, str]] = [
+    (r"confirmation (?:e-?)?mails?", "send_email"),
+    (r"(?:e-?)?mails?", "send_email"),
+    (r"send_email", "send_email"),
+    (r"process_payment|payments?|paying|pay", "process_payment"),
+    (r"priority boarding|priority_boarding", "priority_boarding"),
+    (r"(?:contact|notify)(?:ing)? (?:the )?customers?|contact_customer", "contact_customer"),
+    (r"(?:travel )?insurance|add_insurance", "add_insurance"),
+    (r"seat selection|seats?|select_seat", "select_seat"),
+    (r"baggage(?: upgrades?)?|luggage|baggage_upgrade", "baggage_upgrade"),
+    (r"meals?(?: preferences?)?|meal_preference", "meal_preference"),
+    (r"(?:frequent flyer )?rewards|apply_rewards", "apply_rewards"),
+    (r"cancellations?|cancel_ticket", "cancel_ticket"),
+    (r"reschedul(?:e|ing)s?|reschedule_ticket", "reschedule_ticket"),
+    (r"refunds?(?: status)?|refund_status", "refund_status"),
+    (r"flight search(?:es)?|search(?:ing)? flights|search_flights", "search_flights"),
+    (r"traveler info(?:rmation)?|update_info", "update_info"),
+    (r"confirmations?(?: step)?|confirm_ticket", "confirm_ticket"),
+]
+_TOOL_PATTERNS = [(re.compile(rf"\b(?:{phrase})\b"), tool) for phrase, tool in TOOL_SYNONYMS]
+
+_SKIP_WORDS = re.compile(
+    r"\b(skip(?:ping)?|stop|don'?t|do not|remove|disable|without|no longer|turn off|drop|bypass|no need)\b"
+)
+_FORCE_WORDS = re.compile(r"\b(always|require[sd]?|must|make sure|forc(?:e|ed|ing)|mandatory|enable)\b")
+# A negation in front of a skip, force or disable word ("do not skip", "stop forcing", "don't remove the
+# discount") flips or cancels it; the word lists above can't tell, so these go to the LLM
+_NEGATED = re.compile(
+    r"\b(?:don'?t|do not|does not|doesn'?t|never|not|no longer|no need to|no more|stop|quit)\s+(?:\w+\s+){0,2}?"
+    r"(?:skip|stop|remov|disabl|drop|bypass|turn(?:ing)? off|without|forc|requir|enabl|mandatory|always|must)"
+)
+_CONDITIONAL_WORDS = re.compile(r"\b(if|unless|except|only when|when|but|for (?:vip|business|some))\b")
+# A traveller's own request (book, cancel my ticket, a ticket ID, a route) is a workflow, not a rules change
+_WORKFLOW = re.compile(
+    r"\b(?:book|rebook|reschedule|pay for)\b"
+    r"|\bcancel (?:my|the|this|a|that|ticket|booking|flight|reservation|tkt)"
+    r"|\bcheck (?:on |up on )?(?:my|the status|the refund|ticket|tkt|booking)"
+    r"|\btkt[0-9a-z]*\d"
+    r"|\bticket (?:id |no\.? |number |#)?[a-z]*\d"
+    r"|\bfrom [a-z]+ to [a-z]+"
+    r"|\bmy (?:ticket|booking|flight|trip|seat|discount|refund|reservation)s?\b"
+)
+_RESET = re.compile(r"\b(reset|remove|clear|delete|wipe)\b.*\b(all|every)\b.*\brules?\b|\breset\b.*\brules?\b")
+_DISCOUNT = re.compile(r"\bdiscounts?\b|\bpromo(?:tion)?s?\b|\b\d+(?:\.\d+)?\s*(?:%|percent)\s*off\b")
+_PERCENT = re.compile(r"(\d+(?:\.\d+)?)\s*(?:%|percent)")
+_DISABLE = re.compile(r"\b(disable|stop|remove|cancel|turn off|no more)\b")
+
+_NUMBER_WORDS = {"a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+                 "seven": 7, "ten": 10, "fourteen": 14, "thirty": 30}
+_MONTHS = {name.lower(): i for i, name in enumerate(calendar.month_name) if name}
+_MONTHS.update({name.lower(): i for i, name in enumerate(calendar.month_abbr) if name})
+_MONTH_NAMES = "|".join(sorted(_MONTHS, key=len, reverse=True))
+
+_UNTIL = r"(?:until|till|til|through|thru|by|to)\s+(?:the\s+)?"
+_END_OF_MONTH = re.compile(_UNTIL + r"end of (?:this|the) month")
+_END_OF_WEEK = re.compile(_UNTIL + r"end of (?:this|the) week")
+_ISO_DATE = re.compile(r"(\d{4})-(\d{2})-(\d{2})")
+_DAY_MONTH = re.compile(rf"{_UNTIL}(\d{{1,2}})(?:st|nd|rd|th)?\s+(?:of\s+)?({_MONTH_NAMES})\b(?:,?\s*(\d{{4}}))?")
+_MONTH_DAY = re.compile(rf"{_UNTIL}({_MONTH_NAMES})\s+(\d{{1,2}})(?:st|nd|rd|th)?\b(?:,?\s*(\d{{4}}))?")
+_DURATION = re.compile(r"\bfor (?:the next )?(\d+|" + "|".join(_NUMBER_WORDS) + r")\s+(day|week|month)s?\b")
+
+# Matches the prompt's rule: discounts without an expiry last a week
+DEFAULT_DISCOUNT_DAYS = 7
+
+
+class ParseResult(NamedTuple):
+    structured: Optional[Dict[str, Any]]
+    confidence: float
+    family: str
+
+
+def _end_of_day(day: datetime) -> str:
+    return day.strftime("%Y-%m-%dT23:59:59")
+
+
+def _dated(year: Optional[str], month: int, day: int, now: datetime) -> Optional[datetime]:
+    try:
+        candidate = datetime(int(year) if year else now.year, month, day)
+    except ValueError:
+        return None
+    if not year and candidate.date() < now.date():
+        # "until March 3" said in December means next March
+        candidate = candidate.replace(year=candidate.year + 1)
+    return candidate
+
+
+def parse_expiry(text: str, now: datetime) -> Tuple[str, bool]:
+    """ISO expiry for a discount command and whether one was actually stated."""
+    if _END_OF_MONTH.search(text):
+        last_day = calendar.monthrange(now.year, now.month)[1]
+        return _end_of_day(now.replace(day=last_day)), True
+    if _END_OF_WEEK.search(text):
+        return _end_of_day(now + timedelta(days=6 - now.weekday())), True
+
+    match = _ISO_DATE.search(text)
+    if match:
+        day = _dated(match.group(1), int(match.group(2)), int(match.group(3)), now)
+        if day:
+            return _end_of_day(day), True
+    match = _DAY_MONTH.search(text)
+    if match:
+        day = _dated(match.group(3), _MONTHS[match.group(2)], int(match.group(1)), now)
+        if day:
+            return _end_of_day(day), True
+    match = _MONTH_DAY.search(text)
+    if match:
+        day = _dated(match.group(3), _MONTHS[match.group(1)], int(match.group(2)), now)
+        if day:
+            return _end_of_day(day), True
+
+    match = _DURATION.search(text)
+    if match:
+        count = match.group(1)
+        count = int(count) if count.isdigit() else _NUMBER_WORDS[count]
+        days = {"day": 1, "week": 7, "month": 30}[match.group(2)] * count
+        return _end_of_day(now + timedelta(days=days)), True
+
+    return _end_of_day(now + timedelta(days=DEFAULT_DISCOUNT_DAYS)), False
+
+
+def find_tools(text: str) -> List[str]:
+    tools: List[str] = []
+    for pattern, tool in _TOOL_PATTERNS:
+        if pattern.search(text):
+            # Blank the match so shorter synonyms don't match inside it again
+            text = pattern.sub(" ", text)
+            if tool not in tools:
+                tools.append(tool)
+    return tools
+
+
+def parse_command(command: str, now: Optional[datetime] = None) -> ParseResult:
+    """Recognize the common admin command families without calling the LLM.
+
+    The confidence is high only when the command clearly belongs to one family;
+    anything conditional, mixed or unfamiliar scores low and should go to the LLM.
+    Workflow requests always score low: a fast-path answer would rewrite the
+    rules for every user.
+    """
+    now = now or datetime.now()
+    text = " ".join(command.lower().replace("’", "'").split())
+    if _WORKFLOW.search(text):
+        return ParseResult(None, 0.1, "workflow")
+    conditional = bool(_CONDITIONAL_WORDS.search(text))
+
+    if _RESET.search(text):
+        return ParseResult({
+            "skip_steps": [],
+            "force_steps": [],
+            "tool_substitutions": {},
+            "discount": {"enabled": False, "amount_percent": 0, "expires_at": now.strftime("%Y-%m-%dT%H:%M:%S")},
+        }, 0.95 if not conditional else 0.4, "reset")
+
+    negated = bool(_NEGATED.search(text))
+    if _DISCOUNT.search(text):
+        if negated:
+            return ParseResult(None, 0.2, "discount")
+        # Before the percent: "remove the 10% discount" turns a discount off
+        if _DISABLE.search(text):
+            return ParseResult({"discount": {
+                "enabled": False,
+                "amount_percent": 0,
+                "expires_at": now.strftime("%Y-%m-%dT%H:%M:%S"),
+            }}, 0.9 if not conditional else 0.4, "discount")
+        percent = _PERCENT.search(text)
+        if percent:
+            expires_at, _ = parse_expiry(text, now)
+            return ParseResult({"discount": {
+                "enabled": True,
+                "amount_percent": float(percent.group(1)) if "." in percent.group(1) else int(percent.group(1)),
+                "expires_at": expires_at,
+            }}, 0.9 if not conditional else 0.4, "discount")
+        return ParseResult(None, 0.2, "discount")
+
+    tools = find_tools(text)
+    skip = bool(_SKIP_WORDS.search(text))
+    force = bool(_FORCE_WORDS.search(text))
+    if tools and negated:
+        return ParseResult(None, 0.3, "steps")
+    if not tools or skip == force:
+        # Nothing recognizable, or both "always" and "skip" in one sentence
+        return ParseResult(None, 0.3 if tools else 0.0, "steps" if tools else "unknown")
+
+    key = "skip_steps" if skip else "force_steps"
+    return ParseResult({key: tools}, 0.9 if not conditional else 0.4, "skip" if skip else "force")
+
+
+class FastPathStats:
+    """Counts how much traffic the local parser answers without the LLM."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.attempts = 0
+        self.hits = 0
+        self.by_family: Dict[str, int] = {}
+
+    def record(self, result: ParseResult, hit: bool):
+        with self._lock:
+            self.attempts += 1
+            if hit:
+                self.hits += 1
+                self.by_family[result.family] = self.by_family.get(result.family, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "attempts": self.attempts,
+            "hits": self.hits,
+            "hit_rate": self.hits / self.attempts if self.attempts else 0.0,
+            "hits_by_family": dict(self.by_family),
+        }
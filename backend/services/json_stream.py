@@ -0,0 +1,116 @@
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+_FENCE = re.compile(r"```(?:json|JSON)?\s*\n?(.*?)```", re.DOTALL)
+
+
+class JsonObjectScanner:
+    """Finds the first complete top-level JSON object in text that arrives in pieces.
+
+    Anything before the first `{` (prose, a markdown fence) is skipped. Braces
+    are counted outside of strings; when they balance, the candidate is
+    checked with json.loads, and if it is not valid JSON (say a `{` in the
+    prose) scanning resumes just after where it started. Chunks are kept in a
+    list and each feed scans only the new one, so an answer whose first
+    balanced braces are the object costs O(length). Every rejected candidate
+    is scanned again from inside, so prose full of brace pairs that are not
+    JSON can cost up to O(length²) in the worst case.
+    """
+
+    def __init__(self):
+        self.result: Optional[Dict[str, Any]] = None
+        self.span: Optional[tuple] = None   # (start, end) of the object in self.text
+        self._chunks: List[str] = []
+        self._length = 0
+        self._joined = ""
+        self._joined_chunks = 0
+        self._pos = 0
+        self._start = -1
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far; joined on demand."""
+        if self._joined_chunks != len(self._chunks):
+            self._joined = "".join(self._chunks)
+            self._joined_chunks = len(self._chunks)
+        return self._joined
+
+    @property
+    def done(self) -> bool:
+        return self.result is not None
+
+    def feed(self, chunk: str) -> bool:
+        """Add more text; True once a valid object has been found."""
+        if self.done:
+            return True
+        self._chunks.append(chunk)
+        self._length += len(chunk)
+        # Scan only the new chunk unless a rejected candidate sends us back into earlier text
+        window, base = chunk, self._length - len(chunk)
+        if self._pos < base:
+            window, base = self.text, 0
+        while self._pos < self._length:
+            i = self._pos
+            ch = window[i - base]
+            self._pos += 1
+            if self._start < 0:
+                if ch == "{":
+                    self._start, self._depth = i, 1
+                continue
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                self._depth += 1
+            elif ch == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    if self._start >= base:
+                        candidate = window[self._start - base:i + 1 - base]
+                    else:
+                        candidate = self.text[self._start:i + 1]
+                    if self._accept(candidate, self._start, i + 1):
+                        return True
+                    # Not JSON after all; try again from the next brace
+                    self._pos, self._start, self._in_string, self._escaped = self._start + 1, -1, False, False
+                    if self._pos < base:
+                        window, base = self.text, 0
+        return False
+
+    def _accept(self, candidate: str, start: int, end: int) -> bool:
+        try:
+            value = json.loads(candidate)
+        except ValueError:
+            return False
+        if not isinstance(value, dict):
+            return False
+        self.result, self.span = value, (start, end)
+        return True
+
+
+def extract_json(text: str) -> Optional[Dict[str, Any]]:
+    """The JSON object in an LLM answer: bare, in a markdown fence, or inside prose. None if there is none."""
+    stripped = text.strip()
+    try:
+        value = json.loads(stripped)
+        if isinstance(value, dict):
+            return value
+    except ValueError:
+        pass
+    # Prefer what the model put in a fence over braces in the surrounding prose
+    for block in _FENCE.findall(text):
+        scanner = JsonObjectScanner()
+        if scanner.feed(block):
+            return scanner.result
+    scanner = JsonObjectScanner()
+    return scanner.result if scanner.feed(text) else None
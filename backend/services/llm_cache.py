@@ -0,0 +1,162 @@
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+def normalize_command(command: str) -> str:
+    # Case, spacing, trailing punctuation and curly quotes don't change the intent
+    command = command.replace("“", '"').replace("”", '"').replace("’", "'")
+    return " ".join(command.lower().split()).strip(" .!?")
+
+
+class LLMCache:
+    """LRU + TTL cache for LLM responses, optionally backed by SQLite so it survives restarts.
+
+    The async methods run the SQLite tier in a worker thread, so the event loop
+    only ever touches the in-memory LRU. Expired rows are swept from SQLite at
+    most every `sweep_interval` seconds rather than on every write.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600.0, path: Optional[str] = None,
+                 sweep_interval: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.sweep_interval = sweep_interval
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Separate from _lock so memory lookups never wait on a disk write
+        self._db_lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._next_sweep = 0.0
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.sweeps = 0
+
+    @staticmethod
+    def make_key(command: str, prompt: str, model: str) -> str:
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        raw = "\0".join([model, prompt_hash, normalize_command(command)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        value = self._memory_get(key)
+        if value is None and self._db is not None:
+            value = self._disk_get(key)
+        if value is None:
+            self._miss()
+        return value
+
+    async def get_async(self, key: str) -> Optional[str]:
+        value = self._memory_get(key)
+        if value is None and self._db is not None:
+            value = await asyncio.to_thread(self._disk_get, key)
+        if value is None:
+            self._miss()
+        return value
+
+    def set(self, key: str, value: str):
+        created_at = time.time()
+        with self._lock:
+            self._remember(key, created_at, value)
+        if self._db is not None:
+            self._disk_set(key, created_at, value)
+
+    async def set_async(self, key: str, value: str):
+        created_at = time.time()
+        with self._lock:
+            self._remember(key, created_at, value)
+        if self._db is not None:
+            await asyncio.to_thread(self._disk_set, key, created_at, value)
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Delete rows older than the TTL from SQLite; returns how many went."""
+        if self._db is None:
+            return 0
+        now = time.time() if now is None else now
+        with self._db_lock:
+            deleted = self._db.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl,)).rowcount
+            self._db.commit()
+            self._next_sweep = now + self.sweep_interval
+        self.sweeps += 1
+        return deleted
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM llm_cache")
+                self._db.commit()
+
+    def _memory_get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+        return None
+
+    def _disk_get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._db_lock:
+            row = self._db.execute("SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        if row is None or now - row[1] >= self.ttl:
+            return None
+        with self._lock:
+            self._remember(key, row[1], row[0])
+            self.disk_hits += 1
+        return row[0]
+
+    def _disk_set(self, key: str, created_at: float, value: str):
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at) VALUES (?, ?, ?)",
+                (key, value, created_at),
+            )
+            self._db.commit()
+        if created_at >= self._next_sweep:
+            self.sweep(created_at)
+
+    def _miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def _remember(self, key: str, created_at: float, value: str):
+        # Caller holds the lock
+        self._entries[key] = (created_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            "persistent": self._db is not None,
+            "sweeps": self.sweeps,
+        }
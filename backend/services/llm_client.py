@@ -0,0 +1,337 @@
+import asyncio
+import json
+import re
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional, Union
+
+from backend.services.json_stream import JsonObjectScanner
+from backend.utils.metrics import registry
+
+LLM_REQUEST_SECONDS = registry.histogram(
+    "smartflow_llm_request_seconds", "Latency of upstream LLM calls", ["model"])
+LLM_REQUESTS = registry.counter(
+    "smartflow_llm_requests_total", "Upstream LLM calls by outcome", ["model", "status"])
+LLM_TOKENS = registry.counter(
+    "smartflow_llm_tokens_total", "Billed LLM tokens", ["model", "direction"])
+LLM_STREAMS = registry.counter(
+    "smartflow_llm_streams_total",
+    "Streamed JSON completions: closed once the object was complete (early_stop) or read to the end",
+    ["model", "outcome"])
+
+
+def _record_call(model: str, started: float, response=None, error: bool = False):
+    LLM_REQUEST_SECONDS.labels(model).observe(time.perf_counter() - started)
+    LLM_REQUESTS.labels(model, "error" if error else "ok").inc()
+    # Cohere reports usage under meta.billed_units; other shapes are ignored
+    units = getattr(getattr(response, "meta", None), "billed_units", None)
+    if units is not None:
+        for direction in ("input", "output"):
+            tokens = getattr(units, f"{direction}_tokens", None)
+            if tokens:
+                LLM_TOKENS.labels(model, direction).inc(tokens)
+
+
+def _stream_json(client, chunks: Iterator[str]) -> str:
+    """Read `chunks` until they hold a complete JSON object, then close the stream."""
+    scanner = JsonObjectScanner()
+    try:
+        for chunk in chunks:
+            if scanner.feed(chunk):
+                LLM_STREAMS.labels(client.model, "early_stop").inc()
+                start, end = scanner.span
+                return scanner.text[start:end]
+    finally:
+        # Closing the generator drops the connection, so no more tokens are generated
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+    LLM_STREAMS.labels(client.model, "completed").inc()
+    return scanner.text.strip()
+
+
+async def _astream_json(client, chunks: AsyncIterator[str]) -> str:
+    scanner = JsonObjectScanner()
+    try:
+        async for chunk in chunks:
+            if scanner.feed(chunk):
+                LLM_STREAMS.labels(client.model, "early_stop").inc()
+                start, end = scanner.span
+                return scanner.text[start:end]
+    finally:
+        aclose = getattr(chunks, "aclose", None)
+        if aclose is not None:
+            await aclose()
+    LLM_STREAMS.labels(client.model, "completed").inc()
+    return scanner.text.strip()
+
+
+class CohereLLMClient:
+    """Cohere chat with both a blocking and a non-blocking entry point."""
+
+    def __init__(self, api_key: str, model: str):
+        # The SDK takes a third of a second to import; only pay for it when Cohere is used
+        import cohere
+
+        self.model = model
+        self._client = cohere.Client(api_key)
+        self._async_client = cohere.AsyncClient(api_key)
+
+    def complete(self, message: str, preamble: str, max_tokens: int, temperature: float) -> str:
+        started = time.perf_counter()
+        try:
+            response = self._client.chat(
+                model=self.model,
+                message=message,
+                preamble=preamble,
+                max_tokens=max_tokens,
+                temperature=temperature,
+            )
+        except Exception:
+            _record_call(self.model, started, error=True)
+            raise
+        _record_call(self.model, started, response)
+        # Always return a string, fallback to str(response) if .text is missing
+        return response.text.strip() if hasattr(response, "text") else str(response).strip()
+
+    async def acomplete(self, message: str, preamble: str, max_tokens: int, temperature: float) -> str:
+        started = time.perf_counter()
+        try:
+            response = await self._async_client.chat(
+                model=self.model,
+                message=message,
+                preamble=preamble,
+                max_tokens=max_tokens,
+                temperature=temperature,
+            )
+        except Exception:
+            _record_call(self.model, started, error=True)
+            raise
+        _record_call(self.model, started, response)
+        return response.text.strip() if hasattr(response, "text") else str(response).strip()
+
+    def stream(self, message: str, preamble: str, max_tokens: int, temperature: float) -> Iterator[str]:
+        """Text chunks as Cohere generates them; close the generator to stop early."""
+        started = time.perf_counter()
+        response, failed = None, False
+        try:
+            for event in self._client.chat_stream(
+                model=self.model,
+                message=message,
+                preamble=preamble,
+                max_tokens=max_tokens,
+                temperature=temperature,
+            ):
+                if event.event_type == "text-generation":
+                    yield event.text
+                elif event.event_type == "stream-end":
+                    response = event.response
+        except Exception:
+            failed = True
+            _record_call(self.model, started, error=True)
+            raise
+        finally:
+            # Also runs when the caller closes the stream early; Cohere reports no usage then
+            if not failed:
+                _record_call(self.model, started, response)
+
+    async def astream(self, message: str, preamble: str, max_tokens: int, temperature: float) -> AsyncIterator[str]:
+        started = time.perf_counter()
+        response, failed = None, False
+        try:
+            async for event in self._async_client.chat_stream(
+                model=self.model,
+                message=message,
+                preamble=preamble,
+                max_tokens=max_tokens,
+                temperature=temperature,
+            ):
+                if event.event_type == "text-generation":
+                    yield event.text
+                elif event.event_type == "stream-end":
+                    response = event.response
+        except Exception:
+            failed = True
+            _record_call(self.model, started, error=True)
+            raise
+        finally:
+            if not failed:
+                _record_call(self.model, started, response)
+
+    def complete_json(self, message: str, preamble: str, max_tokens: int, temperature: float) -> str:
+        """Like `complete`, but streams and stops as soon as the answer's JSON object is complete."""
+        return _stream_json(self, self.stream(message, preamble, max_tokens, temperature))
+
+    async def acomplete_json(self, message: str, preamble: str, max_tokens: int, temperature: float) -> str:
+        return await _astream_json(self, self.astream(message, preamble, max_tokens, temperature))
+
+
+# Phrases the stub model maps to tool names
+STUB_TOOL_WORDS = {
+    "confirmation mail": "send_email",
+    "confirmation email": "send_email",
+    "email": "send_email",
+    "payment": "process_payment",
+    "pay": "process_payment",
+    "priority boarding": "priority_boarding",
+    "contact the customer": "contact_customer",
+    "contact customer": "contact_customer",
+    "insurance": "add_insurance",
+    "seat": "select_seat",
+    "baggage": "baggage_upgrade",
+    "meal": "meal_preference",
+    "confirm": "confirm_ticket",
+}
+
+
+# Characters per streamed stub chunk, about what one LLM token event carries
+STUB_CHUNK_CHARS = 4
+
+
+class StubLLMClient:
+    """Deterministic offline stand-in for the LLM, for load tests and local runs.
+
+    It answers the common admin command families with the same JSON shapes the
+    real prompt asks for, after an optional fixed delay that models LLM latency.
+    """
+
+    model = "stub"
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+
+    def respond(self, message: str) -> str:
+        text = message.lower()
+        if re.search(r"\b(reset|remove all|clear all)\b", text):
+            result: Dict[str, Any] = {
+                "skip_steps": [], "force_steps": [], "tool_substitutions": {},
+                "discount": {"enabled": False, "amount_percent": 0, "expires_at": "2025-01-01T00:00:00"},
+            }
+        elif "discount" in text:
+            percent = re.search(r"(\d+(?:\.\d+)?)\s*%", text)
+            result = {"discount": {
+                "enabled": True,
+                "amount_percent": float(percent.group(1)) if percent else 10,
+                "expires_at": "2099-12-31T23:59:59",
+            }}
+        elif text.startswith("book"):
+            route = re.search(r"from (\w+) to (\w+)", text)
+            result = {"intent": "book_ticket", "actions": [{"tool": "book_ticket", "params": {
+                "from_city": route.group(1).title() if route else "Delhi",
+                "to_city": route.group(2).title() if route else "Goa",
+                "date": "2025-07-15",
+                "traveler_name": "Stub Traveler",
+            }}]}
+        else:
+            tools = []
+            for phrase, tool in STUB_TOOL_WORDS.items():
+                if re.search(rf"\b{re.escape(phrase)}", text) and tool not in tools:
+                    tools.append(tool)
+            key = "force_steps" if re.search(r"\b(always|require|must)\b", text) else "skip_steps"
+            result = {key: tools} if tools else {"unparsed_intent": message}
+        return json.dumps(result)
+
+    def complete(self, message: str, preamble: str, max_tokens: int, temperature: float) -> str:
+        started = time.perf_counter()
+        if self.latency:
+            time.sleep(self.latency)
+        _record_call(self.model, started)
+        return self.respond(message)
+
+    async def acomplete(self, message: str, preamble: str, max_tokens: int, temperature: float) -> str:
+        started = time.perf_counter()
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        _record_call(self.model, started)
+        return self.respond(message)
+
+    def stream(self, message: str, preamble: str, max_tokens: int, temperature: float) -> Iterator[str]:
+        started = time.perf_counter()
+        if self.latency:
+            time.sleep(self.latency)
+        _record_call(self.model, started)
+        text = self.respond(message)
+        for i in range(0, len(text), STUB_CHUNK_CHARS):
+            yield text[i:i + STUB_CHUNK_CHARS]
+
+    async def astream(self, message: str, preamble: str, max_tokens: int, temperature: float) -> AsyncIterator[str]:
+        started = time.perf_counter()
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        _record_call(self.model, started)
+        text = self.respond(message)
+        for i in range(0, len(text), STUB_CHUNK_CHARS):
+            yield text[i:i + STUB_CHUNK_CHARS]
+
+    def complete_json(self, message: str, preamble: str, max_tokens: int, temperature: float) -> str:
+        return _stream_json(self, self.stream(message, preamble, max_tokens, temperature))
+
+    async def acomplete_json(self, message: str, preamble: str, max_tokens: int, temperature: float) -> str:
+        return await _astream_json(self, self.astream(message, preamble, max_tokens, temperature))
+
+
+class LLMGateway:
+    """Async access to an LLM client with a concurrency cap and single-flight.
+
+    Identical requests that arrive while one is already in flight wait for
+    that call instead of issuing their own. `client` may be a function that
+    creates the client, in which case it is called on the first request.
+    """
+
+    def __init__(self, client, max_concurrency: int = 8):
+        self._client = None if callable(client) else client
+        self._client_factory = client
+        self.max_concurrency = max_concurrency
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.upstream_calls = 0
+        self.shared_calls = 0
+
+    async def complete(self, key: str, message: str, preamble: Union[str, Callable[[], str]], max_tokens: int,
+                       temperature: float, json_object: bool = False) -> str:
+        """The completion for `message`; with `json_object`, streamed and cut off once its JSON object is complete.
+
+        `preamble` may be a function, called only if this request makes the upstream call.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Primitives belong to one event loop; rebuild them if the loop changed
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._inflight = {}
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._call(message, preamble, max_tokens, temperature, json_object))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.shared_calls += 1
+        # A cancelled caller must not cancel the call other callers are waiting on
+        return await asyncio.shield(task)
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = self._client_factory()
+        return self._client
+
+    async def _call(self, message: str, preamble: Union[str, Callable[[], str]], max_tokens: int,
+                    temperature: float, json_object: bool) -> str:
+        if callable(preamble):
+            preamble = preamble()
+        async with self._semaphore:
+            self.upstream_calls += 1
+            if json_object:
+                return await self.client.acomplete_json(message, preamble, max_tokens, temperature)
+            return await self.client.acomplete(message, preamble, max_tokens, temperature)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "model": self._client.model if self._client is not None else None,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": len(self._inflight),
+            "upstream_calls": self.upstream_calls,
+            "shared_calls": self.shared_calls,
+        }
@@ -0,0 +1,94 @@
+import threading
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Optional, Tuple, Type
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, ValidationError, create_model
+
+from backend.services.tool_registry import ToolRegistry
+
+
+def _model_fields(model: Type[BaseModel]) -> Dict[str, Any]:
+    # pydantic v2 exposes model_fields, v1 only __fields__
+    fields = getattr(model, "model_fields", None)
+    return fields if fields is not None else getattr(model, "__fields__", {})
+
+
+def _is_required(field) -> bool:
+    is_required = getattr(field, "is_required", None)
+    return is_required() if callable(is_required) else bool(getattr(field, "required", False))
+
+
+def _annotation(field):
+    return field.annotation if hasattr(field, "annotation") else field.outer_type_
+
+
+def _dump(instance: BaseModel) -> Dict[str, Any]:
+    dump = getattr(instance, "model_dump", None) or instance.dict
+    return dump(exclude_unset=True)
+
+
+class PlanModel(NamedTuple):
+    model: Type[BaseModel]
+    text_fields: FrozenSet[str]   # str fields; the LLM often sends seat 12 rather than "12"
+
+
+class ParamValidator:
+    """Checks a step's params against its tool's request model before the workflow runs.
+
+    Fields that an earlier step will produce (e.g. the booked ticket_id) may
+    be missing at plan time, so they are made optional. The relaxed models are
+    built once per (tool, optional fields) and reused.
+    """
+
+    def __init__(self, registry: ToolRegistry):
+        self.registry = registry
+        self._models: Dict[Tuple[str, FrozenSet[str]], PlanModel] = {}
+        self._lock = threading.Lock()
+
+    def model_for(self, tool: str, filled_later: FrozenSet[str] = frozenset()) -> Optional[PlanModel]:
+        spec = self.registry.get(tool)
+        if spec is None or not (isinstance(spec.body_model, type) and issubclass(spec.body_model, BaseModel)):
+            return None
+        key = (spec.name, filled_later)
+        compiled = self._models.get(key)
+        if compiled is None:
+            base = spec.body_model
+            fields = _model_fields(base)
+            relaxed = {
+                name: (Optional[_annotation(field)], None)
+                for name, field in fields.items()
+                if name in filled_later and _is_required(field)
+            }
+            compiled = PlanModel(
+                create_model(f"{base.__name__}Plan", __base__=base, **relaxed) if relaxed else base,
+                frozenset(name for name, field in fields.items() if _annotation(field) in (str, Optional[str])),
+            )
+            with self._lock:
+                compiled = self._models.setdefault(key, compiled)
+        return compiled
+
+    def validate(
+        self, tool: str, params: Dict[str, Any], filled_later: FrozenSet[str] = frozenset()
+    ) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """The coerced params and a list of errors (empty when valid)."""
+        compiled = self.model_for(tool, filled_later)
+        if compiled is None:
+            # Dict-bodied or body-less tools accept anything
+            return params, []
+        params = {
+            name: str(value) if name in compiled.text_fields and isinstance(value, (int, float))
+            and not isinstance(value, bool) else value
+            for name, value in params.items()
+        }
+        try:
+            coerced = compiled.model(**params)
+        except ValidationError as e:
+            return params, [
+                {"loc": ["params", *error.get("loc", ())], "msg": error.get("msg"), "type": error.get("type")}
+                for error in e.errors()
+            ]
+        # Only what the caller gave; model defaults stay with the tool
+        return jsonable_encoder(_dump(coerced)), []
+
+    def stats(self) -> Dict[str, Any]:
+        return {"compiled_models": len(self._models)}
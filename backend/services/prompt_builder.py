@@ -0,0 +1,175 @@
+import hashlib
+import json
+import math
+import re
+import threading
+from typing import Any, Dict, List, Mapping, NamedTuple, Sequence, Tuple
+
+from backend.utils.metrics import registry
+
+PROMPT_TOKENS = registry.histogram(
+    "smartflow_llm_prompt_tokens", "Estimated preamble tokens sent per LLM call",
+    buckets=(100, 200, 300, 400, 500, 600, 800, 1000, 1500, 2000))
+
+_WORD = re.compile(r"[a-z]+|\d+|%")
+_NORMAL = {"%": "percent", "off": "percent", "mails": "email", "mail": "email", "emails": "email"}
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    # Words and punctuation marks; close to what BPE tokenizers give for English and JSON
+    return len(_TOKEN.findall(text))
+
+
+def _terms(text: str) -> List[str]:
+    # Numbers only matter as "some number"; crude plural folding is enough for short commands
+    words = ["#" if w.isdigit() else _NORMAL.get(w) or (w[:-1] if len(w) > 3 and w.endswith("s") else w)
+             for w in _WORD.findall(text.lower())]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+class Example(NamedTuple):
+    id: str
+    input: str
+    output: Mapping[str, Any]
+    text: str     # as it appears in the prompt
+    tokens: int
+
+
+def make_example(id: str, input: str, output: Mapping[str, Any]) -> Example:
+    text = f"Input: “{input}”\nOutput:\n{json.dumps(output, indent=2)}\n"
+    return Example(id, input, output, text, estimate_tokens(text))
+
+
+def load_examples(path: str) -> List[Example]:
+    with open(path, encoding="utf-8") as f:
+        return [make_example(entry["id"], entry["input"], entry["output"]) for entry in json.load(f)]
+
+
+class TfidfIndex:
+    """Cosine similarity over TF-IDF vectors of words and word pairs, via an inverted index.
+
+    Small enough (tens to hundreds of examples) to build at import and query
+    in microseconds; no model or extra dependency needed.
+    """
+
+    def __init__(self, documents: Sequence[str]):
+        self.size = len(documents)
+        counts = [self._counts(document) for document in documents]
+        df: Dict[str, int] = {}
+        for terms in counts:
+            for term in terms:
+                df[term] = df.get(term, 0) + 1
+        # Smoothed idf, as in scikit-learn, so terms in every document still count a little
+        self.idf = {term: math.log((1 + self.size) / (1 + n)) + 1 for term, n in df.items()}
+        self.postings: Dict[str, List[Tuple[int, float]]] = {}
+        for doc, terms in enumerate(counts):
+            for term, weight in self._weigh(terms).items():
+                self.postings.setdefault(term, []).append((doc, weight))
+
+    @staticmethod
+    def _counts(text: str) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for term in _terms(text):
+            counts[term] = counts.get(term, 0) + 1
+        return counts
+
+    def _weigh(self, counts: Mapping[str, int]) -> Dict[str, float]:
+        weights = {term: (1 + math.log(n)) * self.idf[term] for term, n in counts.items() if term in self.idf}
+        norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+        return {term: w / norm for term, w in weights.items()}
+
+    def scores(self, query: str) -> List[float]:
+        scores = [0.0] * self.size
+        for term, weight in self._weigh(self._counts(query)).items():
+            for doc, doc_weight in self.postings[term]:
+                scores[doc] += weight * doc_weight
+        return scores
+
+
+class BuiltPrompt(NamedTuple):
+    preamble: str
+    examples: Tuple[str, ...]   # ids, in prompt order
+    tokens: int
+
+
+class PromptBuilder:
+    """Builds the LLM preamble from the instructions plus the examples most like the command.
+
+    Up to `k` examples are taken by similarity while they fit in
+    `token_budget` (counting the instructions), most similar last so it sits
+    next to the command. With `enabled=False` every example is sent.
+    Savings are counted against the fixed prompt used before, which had the
+    first `baseline_examples` of the library.
+    """
+
+    def __init__(self, header: str, examples: Sequence[Example], k: int = 4, token_budget: int = 700,
+                 enabled: bool = True, baseline_examples: int = 5):
+        self.header = header.rstrip() + "\n\nExamples:\n---\n"
+        self.examples = list(examples)
+        self.k = k
+        self.token_budget = token_budget
+        self.enabled = enabled
+        self.index = TfidfIndex([example.input for example in self.examples])
+        self.header_tokens = estimate_tokens(self.header)
+        self.full_prompt = self.render(self.examples)
+        self.full_tokens = estimate_tokens(self.full_prompt)
+        self.baseline_prompt = self.render(self.examples[:baseline_examples])
+        self.baseline_tokens = estimate_tokens(self.baseline_prompt)
+        # Part of LLM cache keys: the preamble is a function of the command and these settings
+        settings = json.dumps([self.full_prompt, k, token_budget, enabled])
+        self.fingerprint = "few-shot:" + hashlib.sha256(settings.encode("utf-8")).hexdigest()
+
+        self._lock = threading.Lock()
+        self.built = 0
+        self.tokens_sent = 0
+        self.selected: Dict[str, int] = {}
+
+    def render(self, examples: Sequence[Example]) -> str:
+        return self.header + "\n".join(example.text for example in examples)
+
+    def select(self, command: str) -> List[Example]:
+        scores = self.index.scores(command)
+        # Library order breaks ties, so a command with no overlap gets the first (most general) examples
+        ranked = sorted(range(len(self.examples)), key=lambda i: -scores[i])
+        chosen, used = [], self.header_tokens
+        for i in ranked:
+            example = self.examples[i]
+            if used + example.tokens > self.token_budget:
+                continue
+            chosen.append(example)
+            used += example.tokens
+            if len(chosen) == self.k:
+                break
+        return chosen[::-1]
+
+    def build(self, command: str) -> BuiltPrompt:
+        if self.enabled:
+            examples = self.select(command)
+            prompt = BuiltPrompt(self.render(examples), tuple(e.id for e in examples), 0)
+        else:
+            prompt = BuiltPrompt(self.full_prompt, tuple(e.id for e in self.examples), 0)
+        prompt = prompt._replace(tokens=estimate_tokens(prompt.preamble))
+        PROMPT_TOKENS.observe(prompt.tokens)
+        with self._lock:
+            self.built += 1
+            self.tokens_sent += prompt.tokens
+            for example_id in prompt.examples:
+                self.selected[example_id] = self.selected.get(example_id, 0) + 1
+        return prompt
+
+    def stats(self) -> Dict[str, Any]:
+        mean = self.tokens_sent / self.built if self.built else 0.0
+        return {
+            "enabled": self.enabled,
+            "k": self.k,
+            "token_budget": self.token_budget,
+            "library_size": len(self.examples),
+            "full_prompt_tokens": self.full_tokens,
+            "baseline_prompt_tokens": self.baseline_tokens,
+            "prompts_built": self.built,
+            "mean_prompt_tokens": round(mean, 1),
+            # Negative when the picked examples are longer than the old fixed prompt
+            "tokens_saved": self.built * self.baseline_tokens - self.tokens_sent,
+            "selected": dict(sorted(self.selected.items(), key=lambda item: -item[1])),
+        }
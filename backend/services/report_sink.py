@@ -0,0 +1,124 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from backend.utils.metrics import registry
+
+REPORT_BATCH_SECONDS = registry.histogram(
+    "smartflow_report_batch_write_seconds", "Time to write one batch of report entries")
+
+
+class ReportSink:
+    """Buffers report entries and writes them in batches off the request path.
+
+    `submit` never blocks: entries go into a bounded in-memory queue that a
+    background task drains when `batch_size` entries are waiting or every
+    `flush_interval` seconds, whichever comes first. `write_batch` gets each
+    batch with the times the entries were submitted, not when they were flushed.
+    """
+
+    def __init__(
+        self,
+        write_batch: Callable[[List[Dict[str, Any]], List[float]], None],
+        batch_size: int = 100,
+        flush_interval: float = 0.5,
+        max_backlog: int = 100_000,
+    ):
+        self.write_batch = write_batch
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_backlog = max_backlog
+
+        self._buffer: Deque[Tuple[float, Dict[str, Any]]] = deque()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock = threading.Lock()
+
+        self.submitted = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.batches = 0
+        self.failures = 0
+        self.last_flush_at: Optional[float] = None
+
+    def submit(self, entry: Dict[str, Any]):
+        if len(self._buffer) >= self.max_backlog:
+            # Keep the newest entries rather than growing without bound
+            self._buffer.popleft()
+            self.dropped += 1
+        self._buffer.append((time.time(), entry))
+        self.submitted += 1
+
+        if len(self._buffer) >= self.batch_size:
+            if self._task is None:
+                # No flusher running (e.g. scripts and tests): write inline
+                self.flush()
+            else:
+                self._loop.call_soon_threadsafe(self._wake.set)
+
+    def flush(self) -> int:
+        """Write everything buffered so far; returns the number of entries written."""
+        written = 0
+        with self._flush_lock:
+            while self._buffer:
+                batch = []
+                while self._buffer and len(batch) < self.batch_size:
+                    batch.append(self._buffer.popleft())
+                started = time.perf_counter()
+                try:
+                    self.write_batch([entry for _, entry in batch], [ts for ts, _ in batch])
+                    REPORT_BATCH_SECONDS.observe(time.perf_counter() - started)
+                except Exception as e:
+                    # Put the batch back so it is retried on the next flush
+                    self._buffer.extendleft(reversed(batch))
+                    self.failures += 1
+                    print(f"Report sink flush failed: {e}")
+                    break
+                self.batches += 1
+                self.flushed += len(batch)
+                written += len(batch)
+            if written:
+                self.last_flush_at = time.time()
+        return written
+
+    async def start(self):
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.flush()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            # Writers may hit disk (e.g. sealing a report segment); keep that off the event loop
+            await asyncio.to_thread(self.flush)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backlog": len(self._buffer),
+            "submitted": self.submitted,
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "failures": self.failures,
+            "last_flush_at": self.last_flush_at,
+            "running": self._task is not None,
+        }
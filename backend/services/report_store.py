@@ -0,0 +1,305 @@
+import glob
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from backend.utils.state_backend import MemoryReportTail
+
+# Columns kept outside the JSON payload so filters and projections never parse it
+INDEX_COLUMNS = ("seq", "ts", "tool", "status")
+
+SCHEMA = pa.schema([
+    ("seq", pa.int64()),
+    ("ts", pa.float64()),
+    ("tool", pa.string()),
+    ("status", pa.string()),
+    ("data", pa.string()),   # the full entry as JSON
+])
+
+
+class Segment(NamedTuple):
+    path: str
+    first_seq: int
+    last_seq: int
+    min_ts: float
+    max_ts: float
+    rows: int
+
+
+class ReportStore:
+    """Append-only report log: a bounded in-memory tail plus immutable Parquet segments.
+
+    Every entry gets an increasing `seq`, which doubles as the pagination
+    cursor. When the tail reaches `segment_rows` it is written out as one
+    segment, so memory stays flat however long the service runs. Queries skip
+    segments by their seq/time range and let Parquet statistics skip row groups.
+    """
+
+    def __init__(self, directory: str, segment_rows: int = 50_000, row_group_rows: int = 8192,
+                 max_segments: int = 0, tail=None):
+        self.directory = directory
+        self.segment_rows = segment_rows
+        self.row_group_rows = row_group_rows
+        self.max_segments = max_segments  # 0 keeps every segment
+
+        self._lock = threading.RLock()
+        # Entries not yet sealed; kept in this process unless a shared tail is passed in
+        self._tail = tail if tail is not None else MemoryReportTail()
+        self._segments: List[Segment] = []
+        self._dir_mtime: Optional[int] = None
+
+        os.makedirs(directory, exist_ok=True)
+        self._refresh_segments()
+        if self._segments:
+            self._tail.start_after(self._segments[-1].last_seq)
+
+    def _refresh_segments(self) -> List[Segment]:
+        """Known segments, re-listing the directory when another process added or removed one."""
+        with self._lock:
+            try:
+                mtime = os.stat(self.directory).st_mtime_ns
+            except FileNotFoundError:
+                mtime = None
+            if mtime != self._dir_mtime:
+                known = {segment.path: segment for segment in self._segments}
+                segments = []
+                for path in sorted(glob.glob(os.path.join(self.directory, "report-*.parquet"))):
+                    segment = known.get(path) or self._read_segment_meta(path)
+                    if segment is not None:
+                        segments.append(segment)
+                self._segments = segments
+                self._dir_mtime = mtime
+            return list(self._segments)
+
+    @staticmethod
+    def _read_segment_meta(path: str) -> Optional[Segment]:
+        try:
+            meta = pq.read_schema(path).metadata or {}
+            return Segment(
+                path,
+                int(meta[b"first_seq"]), int(meta[b"last_seq"]),
+                float(meta[b"min_ts"]), float(meta[b"max_ts"]),
+                int(meta[b"rows"]),
+            )
+        except (OSError, KeyError, ValueError, pa.ArrowInvalid) as e:
+            print(f"Skipping unreadable report segment {path}: {e}")
+            return None
+
+    def append(self, entries: Iterable[Dict[str, Any]], timestamps: Optional[Sequence[float]] = None):
+        """Add entries to the tail; used as the report sink's batch writer.
+
+        `timestamps` are when the entries were submitted; without them every entry gets the current time.
+        """
+        entries = list(entries)
+        if timestamps is None:
+            timestamps = [time.time()] * len(entries)
+        self._tail.append([
+            {"ts": ts, "tool": _text(entry.get("tool")), "status": _text(entry.get("status")), "entry": entry}
+            for entry, ts in zip(entries, timestamps)
+        ])
+        if self._tail.count() >= self.segment_rows:
+            self.seal(min_rows=self.segment_rows)
+
+    def seal(self, min_rows: int = 1):
+        """Write the current tail out as a segment (also called on shutdown)."""
+        with self._tail.seal_lock():
+            segments = self._refresh_segments()
+            sealed_through = segments[-1].last_seq if segments else 0
+            # Rows stay in the tail, and visible to queries, until the segment file is in place
+            rows = self._tail.oldest(after=sealed_through, limit=max(self.segment_rows, self._tail.count()))
+            # Another worker may have sealed while this one waited for the lock
+            if not rows or len(rows) < min_rows:
+                return
+            segment = self._write_segment(rows)
+            self._tail.discard_through(segment.last_seq)
+            with self._lock:
+                self._segments.append(segment)
+                self._dir_mtime = None
+                expired = []
+                if self.max_segments and len(self._segments) > self.max_segments:
+                    expired = self._segments[:-self.max_segments]
+                    self._segments = self._segments[-self.max_segments:]
+            for old in expired:
+                try:
+                    os.unlink(old.path)
+                except OSError:
+                    pass
+
+    def _write_segment(self, rows: List[Dict[str, Any]]) -> Segment:
+        first_seq, last_seq = rows[0]["seq"], rows[-1]["seq"]
+        timestamps = [row["ts"] for row in rows]
+        segment = Segment(
+            os.path.join(self.directory, f"report-{first_seq:012d}-{last_seq:012d}.parquet"),
+            first_seq, last_seq, min(timestamps), max(timestamps), len(rows),
+        )
+        table = pa.table({
+            "seq": [row["seq"] for row in rows],
+            "ts": timestamps,
+            "tool": [row["tool"] for row in rows],
+            "status": [row["status"] for row in rows],
+            "data": [json.dumps(row["entry"], default=str) for row in rows],
+        }, schema=SCHEMA).replace_schema_metadata({
+            "first_seq": str(segment.first_seq), "last_seq": str(segment.last_seq),
+            "min_ts": repr(segment.min_ts), "max_ts": repr(segment.max_ts), "rows": str(segment.rows),
+        })
+        tmp_path = segment.path + ".tmp"
+        pq.write_table(table, tmp_path, row_group_size=self.row_group_rows, compression="zstd")
+        os.replace(tmp_path, segment.path)
+        return segment
+
+    def query(
+        self,
+        tool: Optional[str] = None,
+        status: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        cursor: Optional[int] = None,
+        limit: int = 100,
+        fields: Optional[Sequence[str]] = None,
+        descending: bool = False,
+    ) -> Dict[str, Any]:
+        """One page of entries matching every filter.
+
+        `cursor` is the `next_cursor` of the previous page. `fields` projects the
+        returned entries (seq is always included); asking only for seq/ts/tool/status
+        never touches the stored JSON.
+        """
+        wanted = None if not fields else [f for f in fields if f != "seq"]
+        needs_data = wanted is None or any(f not in INDEX_COLUMNS for f in wanted)
+
+        # A seal in another process moves rows from the tail into a new segment; if the segment
+        # list changed while the tail was read, read the tail again so no row is missed or doubled
+        segments = self._refresh_segments()
+        while True:
+            sealed_through = segments[-1].last_seq if segments else 0
+            after, before = (None, cursor) if descending else (cursor, None)
+            tail_rows = self._tail.select(
+                tool, status, since, until,
+                after=max(sealed_through, after or 0), before=before,
+                descending=descending, limit=limit + 1,
+            )
+            current = self._refresh_segments()
+            if [s.path for s in current] == [s.path for s in segments]:
+                break
+            segments = current
+
+        def overlaps(segment: Segment) -> bool:
+            if cursor is not None and (segment.first_seq >= cursor if descending else segment.last_seq <= cursor):
+                return False
+            return ((since is None or segment.max_ts >= since)
+                    and (until is None or segment.min_ts <= until))
+
+        def from_segments(ordered: List[Segment]):
+            for segment in ordered:
+                if overlaps(segment):
+                    # One row beyond the page tells us whether there is a next page
+                    yield from self._read(segment, tool, status, since, until, cursor, descending,
+                                          needs_data, limit + 1)
+
+        if descending:
+            sources = [tail_rows, from_segments(segments[::-1])]
+        else:
+            sources = [from_segments(segments), tail_rows]
+
+        page: List[Dict[str, Any]] = []
+        more = False
+        for source in sources:
+            for row in source:
+                if len(page) == limit:
+                    more = True
+                    break
+                page.append(_project(row, wanted))
+            if more:
+                break
+
+        return {"entries": page, "next_cursor": page[-1]["seq"] if more and page else None}
+
+    def _read(self, segment: Segment, tool, status, since, until, cursor, descending, needs_data,
+              count: int) -> List[Dict[str, Any]]:
+        """Up to `count` matching rows of one segment, in query order.
+
+        Filters run on the small index columns; the JSON column is then read
+        only from the row groups that hold the selected rows.
+        """
+        filters = []
+        if tool is not None:
+            filters.append(("tool", "=", tool))
+        if status is not None:
+            filters.append(("status", "=", status))
+        if since is not None:
+            filters.append(("ts", ">=", since))
+        if until is not None:
+            filters.append(("ts", "<=", until))
+        if cursor is not None:
+            filters.append(("seq", "<" if descending else ">", cursor))
+        try:
+            index = pq.read_table(segment.path, columns=list(INDEX_COLUMNS), filters=filters or None)
+            if descending:
+                index = index.slice(max(0, index.num_rows - count))
+            else:
+                index = index.slice(0, count)
+            rows = index.to_pylist()
+            if descending:
+                rows.reverse()
+            if needs_data and rows:
+                self._attach_entries(segment, rows)
+        except (OSError, pa.ArrowInvalid) as e:
+            print(f"Could not read report segment {segment.path}: {e}")
+            return []
+        return rows
+
+    @staticmethod
+    def _attach_entries(segment: Segment, rows: List[Dict[str, Any]]):
+        parquet = pq.ParquetFile(segment.path)
+        # Seqs are contiguous within a segment, so a row's position is seq - first_seq
+        wanted = {row["seq"] - segment.first_seq for row in rows}
+        groups, start = [], 0
+        for group in range(parquet.metadata.num_row_groups):
+            size = parquet.metadata.row_group(group).num_rows
+            if any(start <= position < start + size for position in wanted):
+                groups.append(group)
+            start += size
+        table = parquet.read_row_groups(groups, columns=["seq", "data"])
+        data = dict(zip(table.column("seq").to_pylist(), table.column("data").to_pylist()))
+        for row in rows:
+            row["entry"] = json.loads(data[row["seq"]])
+
+    def stats(self) -> Dict[str, Any]:
+        segments = self._refresh_segments()
+        with self._lock:
+            return {
+                "entries": self._tail.last_seq(),
+                "tail_rows": self._tail.count(),
+                "segments": len(segments),
+                "segment_rows": sum(segment.rows for segment in segments),
+                "segment_bytes": sum(_size(segment.path) for segment in segments),
+            }
+
+
+def _text(value) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+def _size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _project(row: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+    if fields is None:
+        return {"seq": row["seq"], "ts": row["ts"], **row["entry"]}
+    result = {"seq": row["seq"]}
+    entry = row.get("entry") or {}
+    for field in fields:
+        if field in INDEX_COLUMNS:
+            result[field] = row[field]
+        elif field in entry:
+            result[field] = entry[field]
+    return result
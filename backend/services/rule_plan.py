@@ -0,0 +1,131 @@
+import functools
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Mapping, NamedTuple, Optional, Tuple, Union
+
+from backend.utils.business_rules import RulesSnapshot
+
+
+class PlannedStep(NamedTuple):
+    tool: str                       # tool that is called, after substitutions
+    source_index: Optional[int]     # position in the intent's actions; None for forced steps
+    endpoint: Optional[str]         # None when the tool is unknown
+    param_map: Mapping[str, str]    # parameter renames for the original tool name
+
+
+class StepList(NamedTuple):
+    skipped: Tuple[str, ...]        # tools dropped by skip_steps, in input order
+    steps: Tuple[PlannedStep, ...]  # steps to run, forced steps last
+
+
+class RulePlan:
+    """Business rules resolved once per rules version and scheduled window.
+
+    Per-tool skip/substitute/endpoint/parameter decisions are computed up
+    front, and the step list for each distinct input tool sequence is kept
+    in a bounded LRU so repeated workflow shapes skip rule evaluation.
+    """
+
+    def __init__(
+        self,
+        snapshot: RulesSnapshot,
+        endpoints: Mapping[str, str],
+        parameter_mapping: Mapping[str, Mapping[str, str]],
+        cache_size: int = 256,
+        canonical: Optional[Callable[[str], str]] = None,
+    ):
+        rules = snapshot.rules
+        # Rules and intents may name a tool by an alias (e.g. process_payment for payment)
+        self.canonical = canonical = canonical or (lambda tool: tool)
+        self.version = snapshot.version
+        self.window = snapshot.window
+        self.skip_steps = frozenset(canonical(tool) for tool in rules.get("skip_steps", ()))
+        # Keep the configured order; duplicates would be dropped at run time anyway
+        self.force_steps = tuple(dict.fromkeys(canonical(tool) for tool in rules.get("force_steps", ())))
+        self.tool_substitutions = {
+            canonical(tool): canonical(substitute)
+            for tool, substitute in rules.get("tool_substitutions", {}).items()
+        }
+        self.endpoints = dict(endpoints)
+        self.parameter_mapping = {tool: dict(m) for tool, m in parameter_mapping.items()}
+        self.steps_for = functools.lru_cache(maxsize=cache_size)(self._compile)
+
+    def resolve(self, tool: str, source_index: Optional[int]) -> PlannedStep:
+        final_tool = self.tool_substitutions.get(tool, tool)
+        return PlannedStep(
+            tool=final_tool,
+            source_index=source_index,
+            endpoint=self.endpoints.get(final_tool),
+            # Parameter names follow the tool the caller asked for
+            param_map=self.parameter_mapping.get(tool, {}),
+        )
+
+    def _compile(self, tools: Tuple[str, ...]) -> StepList:
+        skipped = []
+        steps = []
+        for index, tool in enumerate(tools):
+            tool = self.canonical(tool)
+            if tool in self.skip_steps:
+                skipped.append(tool)
+                continue
+            steps.append(self.resolve(tool, index))
+
+        planned_tools = {step.tool for step in steps}
+        for forced_tool in self.force_steps:
+            if forced_tool not in planned_tools:
+                steps.append(PlannedStep(
+                    tool=forced_tool,
+                    source_index=None,
+                    endpoint=self.endpoints.get(forced_tool),
+                    param_map={},
+                ))
+                planned_tools.add(forced_tool)
+        return StepList(tuple(skipped), tuple(steps))
+
+    def cache_info(self) -> Dict[str, int]:
+        info = self.steps_for.cache_info()
+        return {"version": self.version, "hits": info.hits, "misses": info.misses, "size": info.currsize}
+
+
+class RulePlanCache:
+    """Holds compiled plans for the most recently used rules versions and scheduled windows.
+
+    Recurring windows flip back and forth (weekday, weekend, weekday...), and
+    a long batch may still hold an older snapshot while live requests use the
+    current one, so plans are kept per (version, window) in a small LRU instead
+    of being dropped whenever a different version is seen.
+    """
+
+    def __init__(
+        self,
+        endpoints: Union[Mapping[str, str], Callable[[], Mapping[str, str]]],
+        parameter_mapping: Mapping[str, Mapping[str, str]],
+        canonical: Optional[Callable[[str], str]] = None,
+        max_plans: int = 8,
+    ):
+        # `endpoints` may be a function so the tool table is read when the first plan is compiled
+        self.endpoints = endpoints
+        self.parameter_mapping = parameter_mapping
+        self.canonical = canonical
+        self.max_plans = max_plans
+        self._plan: Optional[RulePlan] = None
+        self._plans: "OrderedDict[Tuple[int, str], RulePlan]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, snapshot: RulesSnapshot) -> RulePlan:
+        plan = self._plan
+        if plan is not None and plan.version == snapshot.version and plan.window == snapshot.window:
+            return plan
+        key = (snapshot.version, snapshot.window)
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is None:
+                endpoints = self.endpoints() if callable(self.endpoints) else self.endpoints
+                plan = RulePlan(snapshot, endpoints, self.parameter_mapping, canonical=self.canonical)
+                self._plans[key] = plan
+                while len(self._plans) > self.max_plans:
+                    self._plans.popitem(last=False)
+            else:
+                self._plans.move_to_end(key)
+            self._plan = plan
+            return plan
@@ -0,0 +1,213 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, NamedTuple, Optional, Set, Tuple
+
+from backend.utils.metrics import registry
+
+
+class _Entry(NamedTuple):
+    expires_at: float
+    tool: str
+    ticket_id: Optional[str]
+    value: Any
+
+
+class _Flight:
+    def __init__(self, ticket_id: Optional[str]):
+        self.ticket_id = ticket_id
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+def _normalize(value):
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items() if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def make_key(tool: str, params: Dict[str, Any]) -> str:
+    # Key order, surrounding spaces and unset optionals don't change a read-only answer
+    return tool + "\0" + json.dumps(_normalize(params), sort_keys=True, default=str)
+
+
+class ToolResultCache:
+    """LRU + TTL cache for the results of read-only tools, with single-flight.
+
+    Identical calls that arrive while one is being computed wait for it
+    instead of computing their own. Entries remember the ticket they are
+    about, so a tool that changes a ticket can drop them.
+    """
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._by_ticket: Dict[Tuple[str, str], Set[str]] = {}
+        self._inflight: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+        self.shared_calls: Dict[str, int] = {}
+        self.invalidations: Dict[str, int] = {}
+        self.evictions = 0
+
+    def _lookup(self, key: str, now: float) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= now:
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None and entry.ticket_id is not None:
+            keys = self._by_ticket.get((entry.tool, entry.ticket_id))
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_ticket[(entry.tool, entry.ticket_id)]
+
+    def _store(self, key: str, entry: _Entry):
+        self._drop(key)
+        self._entries[key] = entry
+        if entry.ticket_id is not None:
+            self._by_ticket.setdefault((entry.tool, entry.ticket_id), set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _join(self, tool: str, key: str, ticket_id: Optional[str]) -> Tuple[Optional[_Entry], _Flight, bool]:
+        """A fresh entry, or the flight computing the key and whether the caller leads it."""
+        with self._lock:
+            entry = self._lookup(key, time.time())
+            if entry is not None:
+                self.hits[tool] = self.hits.get(tool, 0) + 1
+                return entry, None, False
+            flight = self._inflight.get(key)
+            if flight is not None:
+                self.shared_calls[tool] = self.shared_calls.get(tool, 0) + 1
+                return None, flight, False
+            self.misses[tool] = self.misses.get(tool, 0) + 1
+            flight = self._inflight[key] = _Flight(ticket_id)
+            return None, flight, True
+
+    def _land(self, key: str, flight: _Flight, tool: str, ttl: float):
+        with self._lock:
+            # An invalidation while computing removed the flight; its result may be stale
+            if flight.error is None and self._inflight.get(key) is flight:
+                self._store(key, _Entry(time.time() + ttl, tool, flight.ticket_id, flight.value))
+            if self._inflight.get(key) is flight:
+                del self._inflight[key]
+        flight.done.set()
+
+    def call(self, tool: str, params: Dict[str, Any], ttl: float, compute: Callable[[], Any],
+             ticket_id: Optional[str] = None) -> Any:
+        key = make_key(tool, params)
+        entry, flight, leader = self._join(tool, key, ticket_id)
+        if entry is not None:
+            return entry.value
+        if not leader:
+            flight.done.wait()
+        else:
+            try:
+                flight.value = compute()
+            except BaseException as e:
+                flight.error = e
+            self._land(key, flight, tool, ttl)
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    async def acall(self, tool: str, params: Dict[str, Any], ttl: float, compute: Callable[[], Any],
+                    ticket_id: Optional[str] = None) -> Any:
+        """`call` for coroutine handlers; `compute` returns an awaitable."""
+        key = make_key(tool, params)
+        entry, flight, leader = self._join(tool, key, ticket_id)
+        if entry is not None:
+            return entry.value
+        if not leader:
+            await asyncio.to_thread(flight.done.wait)
+        else:
+            try:
+                flight.value = await compute()
+            except BaseException as e:
+                flight.error = e
+            self._land(key, flight, tool, ttl)
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    def invalidate_ticket(self, tools: Iterable[str], ticket_id: str) -> int:
+        """Drop cached results of `tools` about one ticket; returns how many were dropped."""
+        dropped = 0
+        with self._lock:
+            for tool in tools:
+                keys = self._by_ticket.pop((tool, ticket_id), set())
+                for key in keys:
+                    self._entries.pop(key, None)
+                # Calls still computing would store a result from before the change
+                for key in [k for k, flight in self._inflight.items()
+                            if flight.ticket_id == ticket_id and k.startswith(tool + "\0")]:
+                    del self._inflight[key]
+                if keys:
+                    self.invalidations[tool] = self.invalidations.get(tool, 0) + len(keys)
+                dropped += len(keys)
+        return dropped
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_ticket.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            tools = sorted(set(self.hits) | set(self.misses) | set(self.invalidations))
+            per_tool = {}
+            for tool in tools:
+                hits, misses = self.hits.get(tool, 0), self.misses.get(tool, 0)
+                shared = self.shared_calls.get(tool, 0)
+                lookups = hits + misses + shared
+                per_tool[tool] = {
+                    "hits": hits,
+                    "misses": misses,
+                    "shared_calls": shared,
+                    "invalidations": self.invalidations.get(tool, 0),
+                    "hit_rate": round((hits + shared) / lookups, 4) if lookups else 0.0,
+                }
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "evictions": self.evictions,
+                "in_flight": len(self._inflight),
+                "tools": per_tool,
+            }
+
+
+tool_cache = ToolResultCache(max_entries=int(os.environ.get("SMARTFLOW_TOOL_CACHE_SIZE", "2048")))
+
+registry.callback(
+    "smartflow_tool_cache_lookups_total", "Cached tool lookups by result",
+    lambda: {(tool, result): counts.get(tool, 0)
+             for tool in set(tool_cache.hits) | set(tool_cache.misses)
+             for result, counts in (("hit", tool_cache.hits), ("shared", tool_cache.shared_calls),
+                                    ("miss", tool_cache.misses))},
+    ["tool", "result"], kind="counter")
+registry.callback(
+    "smartflow_tool_cache_invalidations_total", "Cached tool results dropped because a ticket changed",
+    lambda: {(tool,): count for tool, count in tool_cache.invalidations.items()},
+    ["tool"], kind="counter")
+registry.callback(
+    "smartflow_tool_cache_entries", "Tool results held in the cache",
+    lambda: {(): tool_cache.stats()["entries"]})
@@ -0,0 +1,128 @@
+import inspect
+from typing import Any, Callable, Dict, FrozenSet, List, NamedTuple, Optional, Type, Union
+
+import httpx
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.routing import APIRoute, APIRouter
+from pydantic import BaseModel, ValidationError
+from starlette.concurrency import run_in_threadpool
+
+
+class DispatchResult(NamedTuple):
+    status_code: int
+    data: Any
+
+
+class LocalRoute(NamedTuple):
+    handler: Any
+    body_model: Optional[Type[Any]]
+    is_async: bool
+
+
+def request_body_model(handler) -> Optional[Type[Any]]:
+    # Tool handlers take a single body parameter: a pydantic model or a plain dict
+    for param in inspect.signature(handler).parameters.values():
+        annotation = param.annotation
+        if inspect.isclass(annotation) and (issubclass(annotation, BaseModel) or annotation is dict):
+            return annotation
+    return None
+
+
+def model_field_names(model: Type[Any]) -> FrozenSet[str]:
+    # pydantic v2 exposes model_fields, v1 only __fields__
+    fields = getattr(model, "model_fields", None)
+    if fields is None:
+        fields = getattr(model, "__fields__", {})
+    return frozenset(fields)
+
+
+def _validation_details(exc: ValidationError) -> List[Dict[str, Any]]:
+    # Match FastAPI's request validation errors, which are located under "body"
+    details = []
+    for error in exc.errors():
+        error = dict(error)
+        error["loc"] = ("body",) + tuple(error.get("loc", ()))
+        details.append(error)
+    return jsonable_encoder(details, custom_encoder={Exception: str})
+
+
+class LocalDispatcher:
+    """Calls router handlers directly, mirroring what FastAPI would do for a POST.
+
+    `routers` may be a function returning them, so the route table is only
+    built when the first tool is dispatched.
+    """
+
+    def __init__(self, routers: Union[List[APIRouter], Callable[[], List[APIRouter]]]):
+        self._routers = routers
+        self._routes: Optional[Dict[str, LocalRoute]] = None
+
+    @property
+    def routes(self) -> Dict[str, LocalRoute]:
+        if self._routes is None:
+            routers = self._routers() if callable(self._routers) else self._routers
+            routes = {}
+            for router in routers:
+                for route in router.routes:
+                    if isinstance(route, APIRoute) and "POST" in route.methods:
+                        routes[route.path] = LocalRoute(
+                            handler=route.endpoint,
+                            body_model=request_body_model(route.endpoint),
+                            is_async=inspect.iscoroutinefunction(route.endpoint),
+                        )
+            self._routes = routes
+        return self._routes
+
+    def has_route(self, path: str) -> bool:
+        return path in self.routes
+
+    def body_fields(self, path: str) -> FrozenSet[str]:
+        route = self.routes.get(path)
+        if route is None or route.body_model is None or route.body_model is dict:
+            return frozenset()
+        return model_field_names(route.body_model)
+
+    async def post(self, path: str, payload: Any) -> DispatchResult:
+        route = self.routes.get(path)
+        if route is None:
+            return DispatchResult(404, {"error": "Not Found"})
+
+        args = []
+        if route.body_model is dict:
+            if not isinstance(payload, dict):
+                return DispatchResult(422, {"error": "Validation error", "details": [
+                    {"loc": ["body"], "msg": "value is not a valid dict", "type": "type_error.dict"}
+                ]})
+            args.append(payload)
+        elif route.body_model is not None:
+            try:
+                args.append(route.body_model(**(payload or {})))
+            except ValidationError as e:
+                return DispatchResult(422, {"error": "Validation error", "details": _validation_details(e)})
+            except TypeError as e:
+                return DispatchResult(422, {"error": "Validation error", "details": str(e)})
+
+        try:
+            if route.is_async:
+                response = await route.handler(*args)
+            else:
+                response = await run_in_threadpool(route.handler, *args)
+        except HTTPException as e:
+            return DispatchResult(e.status_code, {"error": e.detail})
+        except Exception as e:
+            return DispatchResult(500, {"error": "Internal server error", "details": str(e)})
+
+        return DispatchResult(200, jsonable_encoder(response))
+
+
+class HttpDispatcher:
+    """Posts to a running Smartflow (or compatible) service over HTTP."""
+
+    def __init__(self, client: httpx.AsyncClient, base_url: str):
+        self.client = client
+        self.base_url = base_url.rstrip("/")
+
+    async def post(self, path: str, payload: Any) -> DispatchResult:
+        response = await self.client.post(f"{self.base_url}{path}", json=payload)
+        return DispatchResult(response.status_code, response.json())
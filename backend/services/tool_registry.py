@@ -0,0 +1,163 @@
+import functools
+import importlib
+import inspect
+import pkgutil
+import sys
+import threading
+import time
+from typing import Callable, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Type
+
+from fastapi.routing import APIRoute, APIRouter
+
+from pydantic import BaseModel
+
+from backend.services.tool_cache import tool_cache
+from backend.services.tool_dispatch import request_body_model
+
+
+class ToolSpec(NamedTuple):
+    name: str
+    path: str                       # POST route that runs the tool
+    handler: Callable
+    body_model: Optional[Type]
+    aliases: FrozenSet[str]         # other names the LLM or older rules use for the tool
+    produces: FrozenSet[str]        # response fields later steps can consume
+    runs_after: FrozenSet[str]      # tools this one must follow when both are in a workflow
+    cache_ttl: float                # seconds a read-only tool's result is reused; 0 disables
+    invalidates: FrozenSet[str]     # cached tools whose results for the same ticket this one makes stale
+
+
+def _body(args, kwargs) -> Optional[BaseModel]:
+    return next((value for value in (*args, *kwargs.values()) if isinstance(value, BaseModel)), None)
+
+
+def _params(body: Optional[BaseModel]) -> Dict:
+    if body is None:
+        return {}
+    dump = getattr(body, "model_dump", None) or body.dict
+    return dump()
+
+
+def _with_cache(name: str, handler: Callable, cache_ttl: float, invalidates: FrozenSet[str]) -> Callable:
+    """Wrap a tool handler so it serves from, or invalidates, the tool result cache.
+
+    The wrapper keeps the handler's signature, so FastAPI and the local
+    dispatcher treat it exactly like the original.
+    """
+    def invalidate(body, result):
+        ticket_id = getattr(body, "ticket_id", None)
+        if invalidates and ticket_id:
+            tool_cache.invalidate_ticket(invalidates, str(ticket_id))
+        return result
+
+    if inspect.iscoroutinefunction(handler):
+        @functools.wraps(handler)
+        async def wrapper(*args, **kwargs):
+            body = _body(args, kwargs)
+            if cache_ttl:
+                return await tool_cache.acall(name, _params(body), cache_ttl, lambda: handler(*args, **kwargs),
+                                              ticket_id=getattr(body, "ticket_id", None))
+            return invalidate(body, await handler(*args, **kwargs))
+    else:
+        @functools.wraps(handler)
+        def wrapper(*args, **kwargs):
+            body = _body(args, kwargs)
+            if cache_ttl:
+                return tool_cache.call(name, _params(body), cache_ttl, lambda: handler(*args, **kwargs),
+                                       ticket_id=getattr(body, "ticket_id", None))
+            return invalidate(body, handler(*args, **kwargs))
+    return wrapper
+
+
+class ToolRegistry:
+    """Workflow tools as declared by the API modules themselves.
+
+    A module marks a route handler with `@tool(...)` right above its
+    `@router.post(...)`; the route path and request model are read from the
+    router, so they cannot drift from what FastAPI serves. Modules under the
+    package are imported on first use rather than at import time.
+
+    `cache_ttl` marks a read-only tool whose results may be reused, and
+    `invalidates` names the cached tools a ticket-changing tool makes stale.
+    Both act on the route handler itself, so direct HTTP calls, HTTP dispatch
+    and in-process dispatch all share one cache.
+    """
+
+    def __init__(self, package: str):
+        self.package = package
+        self._tools: Dict[str, ToolSpec] = {}
+        self._aliases: Dict[str, str] = {}
+        self._modules: List[str] = []
+        self._discovered = False
+        self._lock = threading.RLock()
+        self.discovery_seconds: Optional[float] = None
+
+    def tool(self, name: str, aliases: Iterable[str] = (), produces: Iterable[str] = (),
+             runs_after: Iterable[str] = (), cache_ttl: float = 0, invalidates: Iterable[str] = ()):
+        def register(handler):
+            module = sys.modules[handler.__module__]
+            route = next(
+                (r for r in getattr(module, "router").routes
+                 if isinstance(r, APIRoute) and r.endpoint is handler and "POST" in r.methods),
+                None,
+            )
+            if route is None:
+                raise ValueError(f"@tool({name!r}) must decorate a handler registered with @router.post")
+            invalidated = frozenset(invalidates)
+            if cache_ttl or invalidated:
+                # Routers are included into the app (and read by the dispatcher) after this runs
+                handler = route.endpoint = _with_cache(name, handler, cache_ttl, invalidated)
+            spec = ToolSpec(name, route.path, handler, request_body_model(handler),
+                            frozenset(aliases), frozenset(produces), frozenset(runs_after),
+                            cache_ttl, invalidated)
+            with self._lock:
+                self._tools[name] = spec
+                for alias in spec.aliases:
+                    self._aliases[alias] = name
+            return handler
+        return register
+
+    def discover(self):
+        """Import every module in the package once, which registers its tools."""
+        if self._discovered:
+            return
+        with self._lock:
+            if self._discovered:
+                return
+            started = time.perf_counter()
+            package = importlib.import_module(self.package)
+            for info in sorted(pkgutil.iter_modules(package.__path__), key=lambda m: m.name):
+                module_name = f"{self.package}.{info.name}"
+                importlib.import_module(module_name)
+                self._modules.append(module_name)
+            self._discovered = True
+            self.discovery_seconds = time.perf_counter() - started
+
+    def routers(self) -> List[APIRouter]:
+        """The `router` of every module in the package, tool or not."""
+        self.discover()
+        return [sys.modules[name].router for name in self._modules if hasattr(sys.modules[name], "router")]
+
+    def specs(self) -> Dict[str, ToolSpec]:
+        self.discover()
+        return dict(self._tools)
+
+    def get(self, name: str) -> Optional[ToolSpec]:
+        self.discover()
+        return self._tools.get(self._aliases.get(name, name))
+
+    def canonical(self, name: str) -> str:
+        self.discover()
+        return self._aliases.get(name, name)
+
+    def endpoints(self) -> Dict[str, str]:
+        """Tool name (and alias) -> route path."""
+        self.discover()
+        endpoints = {name: spec.path for name, spec in self._tools.items()}
+        endpoints.update({alias: self._tools[name].path for alias, name in self._aliases.items()})
+        return endpoints
+
+
+tool_registry = ToolRegistry("backend.apis")
+
+tool = tool_registry.tool
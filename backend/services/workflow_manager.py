@@ -1,32 +1,30 @@
+import asyncio
 import httpx
 import json
-from typing import Dict, Any
+import os
+import time
+from typing import Dict, Any, Callable, List, Optional, Set, Tuple
 from backend.utils.models import IntentResponse, Action
-from backend.utils.business_rules import load_rules
-
-TOOL_ENDPOINTS = {
-    "book_ticket": "/book-ticket",
-    "search_flights": "/search-flights",
-    "payment": "/payment",
-    "send_email": "/send-email",
-    "confirm_ticket": "/confirm-ticket",
-    "report": "/report",
-    "contact_customer": "/contact-customer",
-    "apply_discount": "/apply-discount",
-    "cancel_ticket": "/cancel-ticket",
-    "update_info": "/update-info",
-    "add_insurance": "/add-insurance",
-    "apply_rewards": "/apply-rewards",
-    "priority_boarding": "/priority-boarding",
-    "select_seat": "/select-seat",
-    "baggage_upgrade": "/baggage-upgrade",
-    "meal_preference": "/meal-preference",
-    "reschedule_ticket": "/reschedule-ticket",
-    "refund_status": "/refund-status",
-}
+from backend.utils.business_rules import RulesSnapshot, get_rules_snapshot
+from backend.services.tool_dispatch import LocalDispatcher, HttpDispatcher
+from backend.services.rule_plan import RulePlanCache
+from backend.utils.metrics import registry
+from backend.services.tool_registry import tool_registry
+from backend.services.param_validation import ParamValidator
+from backend.apis import report
 
 BASE_URL = "http://localhost:8000"
 
+# "local" calls the router handlers in-process; "http" posts everything to BASE_URL
+DISPATCH_MODE = os.environ.get("SMARTFLOW_DISPATCH_MODE", "local")
+
+# Tools served by another service are always called over HTTP, e.g.
+# {"search_flights": "http://flights.internal:9000"}
+REMOTE_TOOL_URLS: Dict[str, str] = {}
+
+# Tools and their routes come from the @tool declarations in backend/apis, loaded on first use
+local_dispatcher = LocalDispatcher(tool_registry.routers)
+
 PARAMETER_MAPPING = {
     "book_ticket": {
         "from": "from_city",
@@ -36,46 +34,199 @@ PARAMETER_MAPPING = {
     # Add more tool-specific param maps here if needed
 }
 
-async def execute_workflow(intent_response: IntentResponse) -> Dict[str, Any]:
+rule_plans = RulePlanCache(tool_registry.endpoints, PARAMETER_MAPPING, canonical=tool_registry.canonical)
+
+# Request models relaxed for fields filled by earlier steps, compiled once per tool and shape
+param_validator = ParamValidator(tool_registry)
+
+TOOL_CALL_SECONDS = registry.histogram(
+    "smartflow_tool_call_seconds", "Latency of each workflow tool call", ["tool"])
+TOOL_CALLS = registry.counter(
+    "smartflow_tool_calls_total", "Workflow tool calls by outcome", ["tool", "status"])
+PLANS_REJECTED = registry.counter(
+    "smartflow_workflow_rejected_total", "Workflows rejected before any step ran because of invalid params")
+
+# Upper bound on tool calls in flight for a single workflow
+MAX_PARALLEL_STEPS = int(os.environ.get("SMARTFLOW_MAX_PARALLEL_STEPS", "4"))
+
+# Params naming a record that steps may change; steps given the same value run in plan order
+ORDERING_FIELDS = ("ticket_id",)
+
+class _Dispatchers:
+    """Picks a dispatcher per tool; the HTTP client is only opened if a step needs it."""
+
+    def __init__(self, mode: str):
+        self.mode = mode
+        self.client: Optional[httpx.AsyncClient] = None
+
+    def for_tool(self, tool: str, endpoint: str):
+        remote_url = REMOTE_TOOL_URLS.get(tool)
+        if remote_url is None and self.mode == "local" and local_dispatcher.has_route(endpoint):
+            return local_dispatcher
+        if self.client is None:
+            self.client = httpx.AsyncClient()
+        return HttpDispatcher(self.client, remote_url or BASE_URL)
+
+    async def aclose(self):
+        if self.client is not None:
+            await self.client.aclose()
+
+
+def _build_dependencies(
+    actions: List[Action], endpoints: List[Optional[str]]
+) -> List[Tuple[Set[int], Dict[str, int]]]:
+    """For each action, the earlier actions it must wait for and which field it takes from which."""
+    graph = []
+    latest_producer: Dict[str, int] = {}
+    latest_tool: Dict[str, int] = {}
+    latest_on_record: Dict[Tuple[str, str], int] = {}
+    for index, (action, endpoint) in enumerate(zip(actions, endpoints)):
+        spec = tool_registry.get(action.tool)
+        consumed = set(action.params) | local_dispatcher.body_fields(endpoint or "")
+        inputs = {field: latest_producer[field] for field in consumed if field in latest_producer}
+        waits_for = set(inputs.values())
+        # Ordering that is not visible through data fields, e.g. confirm only after payment
+        for tool in (spec.runs_after if spec else ()):
+            if tool in latest_tool:
+                waits_for.add(latest_tool[tool])
+        # Steps on the same caller-given ticket (cancel, then refund_status) keep their plan order
+        for field in ORDERING_FIELDS:
+            value = action.params.get(field)
+            if field in inputs or value in (None, ""):
+                continue
+            record = (field, str(value))
+            if record in latest_on_record:
+                waits_for.add(latest_on_record[record])
+            latest_on_record[record] = index
+        graph.append((waits_for, inputs))
+
+        latest_tool[action.tool] = index
+        for field in (spec.produces if spec else ()):
+            latest_producer[field] = index
+    return graph
+
+
+async def execute_workflow(
+    intent_response: IntentResponse,
+    dispatch_mode: Optional[str] = None,
+    max_parallel: Optional[int] = None,
+    rules: Optional[RulesSnapshot] = None,
+    on_event: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """Run the intent's actions under the current business rules.
+
+    Every step's params are checked against its tool's request model first;
+    if any are invalid nothing runs and the result lists all the errors.
+
+    If `on_event` is given it is called with ("plan", ...) once the rules have
+    been applied and with ("step", ...) as each step finishes, so callers can
+    stream progress before the whole workflow is done. A rejected plan emits
+    ("invalid", ...) instead.
+    """
     results = []
-    async with httpx.AsyncClient() as client:
-        rules = load_rules()
-        skip_steps = set(rules.get("skip_steps", []))
-        force_steps = set(rules.get("force_steps", []))
-        tool_subs = rules.get("tool_substitutions", {})
+    emit = on_event or (lambda event, data: None)
+    dispatchers = _Dispatchers(dispatch_mode or DISPATCH_MODE)
+
+    def log_report(entry: Dict[str, Any]):
+        # Buffered and flushed in batches, so logging never waits on I/O
+        report.report_sink.submit(dict(entry))
+
+    try:
+        # Rules are compiled once per version; repeated workflow shapes hit the plan's LRU
+        plan = rule_plans.get(rules or get_rules_snapshot())
+        step_list = plan.steps_for(tuple(action.tool for action in intent_response.actions))
 
+        # Apply parameter mapping
+        mapped = {
+            step.source_index: {step.param_map.get(k, k): v
+                                for k, v in intent_response.actions[step.source_index].params.items()}
+            for step in step_list.steps if step.source_index is not None
+        }
         filtered_actions = []
-        for action in intent_response.actions:
-            tool = action.tool
-            if tool in skip_steps:
-                result = {
-                    "tool": tool,
-                    "status": "skipped_by_rule",
-                    "reason": "Skipped as per business rules"
-                }
-                results.append(result)
-                # Log skipped step
-                await client.post(f"{BASE_URL}/report", json=result)
+        endpoints = []
+        for step in step_list.steps:
+            # Steps the rules force in start empty; only fields produced by earlier steps are filled in
+            params = mapped[step.source_index] if step.source_index is not None else {}
+            filtered_actions.append(Action(tool=step.tool, params=params))
+            endpoints.append(step.endpoint)
+
+        graph = _build_dependencies(filtered_actions, endpoints)
+
+        # Check every step before running any, so a bad seat number cannot leave a booked ticket behind
+        errors = []
+        invalid_forced: Dict[int, List[Dict[str, Any]]] = {}
+        for index, (step, action, endpoint, (_, inputs)) in enumerate(
+                zip(step_list.steps, filtered_actions, endpoints, graph)):
+            if not endpoint:
+                if step.source_index is not None:
+                    errors.append({"step": index, "tool": action.tool, "loc": ["tool"],
+                                   "msg": f"Unknown tool '{action.tool}'", "type": "unknown_tool"})
                 continue
+            params, step_errors = param_validator.validate(action.tool, action.params, frozenset(inputs))
+            if not step_errors:
+                action.params = params
+            elif step.source_index is None:
+                # A step the rules forced in: report it, but don't reject the caller's plan for it
+                invalid_forced[index] = step_errors
+            else:
+                errors.extend(dict(error, step=index, tool=action.tool) for error in step_errors)
+
+        if errors:
+            PLANS_REJECTED.inc()
+            emit("invalid", {"rules_version": plan.version, "errors": errors})
+            log_report({"tool": "workflow", "status": "invalid_params", "intent": intent_response.intent,
+                        "errors": errors})
+            return {
+                "intent": intent_response.intent,
+                "status": "invalid_params",
+                "errors": errors,
+                "steps": []
+            }
 
-            if tool in tool_subs:
-                action.tool = tool_subs[tool]
+        for tool in step_list.skipped:
+            result = {
+                "tool": tool,
+                "status": "skipped_by_rule",
+                "reason": "Skipped as per business rules"
+            }
+            results.append(result)
+            # Log skipped step
+            log_report(result)
 
-            # Apply parameter mapping
-            param_map = PARAMETER_MAPPING.get(tool, {})
-            mapped_params = {param_map.get(k, k): v for k, v in action.params.items()}
-            action.params = mapped_params
+        emit("plan", {
+            "rules_version": plan.version,
+            "skipped": list(step_list.skipped),
+            "steps": [
+                {"tool": step.tool, "forced": step.source_index is None, "known": step.endpoint is not None}
+                for step in step_list.steps
+            ],
+        })
+        for index, result in enumerate(results):
+            emit("step", dict(result, index=index))
 
-            filtered_actions.append(action)
+        semaphore = asyncio.Semaphore(max(1, max_parallel or MAX_PARALLEL_STEPS))
+        tasks: List[asyncio.Task] = []
 
-        for forced_tool in force_steps:
-            if all(a.tool != forced_tool for a in filtered_actions):
-                filtered_actions.append(Action(tool=forced_tool, params={}))
+        async def run_step(
+            index: int, action: Action, endpoint: Optional[str], waits_for: Set[int], inputs: Dict[str, int],
+            step_errors: Optional[List[Dict[str, Any]]] = None,
+        ) -> Dict[str, Any]:
+            if step_errors is not None:
+                result = {"tool": action.tool, "status": "invalid_params", "errors": step_errors}
+                log_report(result)
+            else:
+                result = await call_step(action, endpoint, waits_for, inputs)
+            emit("step", dict(result, index=index))
+            return result
+
+        async def call_step(
+            action: Action, endpoint: Optional[str], waits_for: Set[int], inputs: Dict[str, int]
+        ) -> Dict[str, Any]:
+            upstream = await asyncio.gather(*(tasks[i] for i in waits_for)) if waits_for else []
+            upstream = dict(zip(waits_for, upstream))
 
-        for action in filtered_actions:
             tool = action.tool
-            params = action.params
-            endpoint = TOOL_ENDPOINTS.get(tool)
+            params = dict(action.params)
 
             if not endpoint:
                 result = {
@@ -83,23 +234,32 @@ async def execute_workflow(intent_response: IntentResponse) -> Dict[str, Any]:
                     "status": "error",
                     "message": f"Unknown tool '{tool}'"
                 }
-                results.append(result)
                 # Log unknown tool
-                await client.post(f"{BASE_URL}/report", json=result)
-                continue
+                log_report(result)
+                return result
+
+            # Fill fields produced by earlier steps (e.g. the booked ticket_id)
+            for field, producer in inputs.items():
+                produced = (upstream[producer].get("response") or {})
+                if not params.get(field) and isinstance(produced, dict) and produced.get(field):
+                    params[field] = str(produced[field])
 
             try:
-                response = await client.post(f"{BASE_URL}{endpoint}", json=params)
-                response_data = response.json()
+                async with semaphore:
+                    started = time.perf_counter()
+                    try:
+                        response = await dispatchers.for_tool(tool, endpoint).post(endpoint, params)
+                    finally:
+                        TOOL_CALL_SECONDS.labels(tool).observe(time.perf_counter() - started)
+                response_data = response.data
                 result = {
                     "tool": tool,
                     "status": "success" if response.status_code == 200 else "failed",
                     "response": response_data
                 }
-                results.append(result)
 
                 # Log successful/failure step
-                await client.post(f"{BASE_URL}/report", json={
+                log_report({
                     "tool": tool,
                     "status": result["status"],
                     "params": params,
@@ -112,10 +272,20 @@ async def execute_workflow(intent_response: IntentResponse) -> Dict[str, Any]:
                     "status": "exception",
                     "message": str(e)
                 }
-                results.append(result)
 
                 # Log exception step
-                await client.post(f"{BASE_URL}/report", json=result)
+                log_report(result)
+            TOOL_CALLS.labels(tool, result["status"]).inc()
+            return result
+
+        for position, (action, endpoint, (waits_for, inputs)) in enumerate(zip(filtered_actions, endpoints, graph)):
+            index = len(results) + position
+            tasks.append(asyncio.ensure_future(
+                run_step(index, action, endpoint, waits_for, inputs, invalid_forced.get(position))))
+        # Gathering in plan order keeps the step list deterministic
+        results.extend(await asyncio.gather(*tasks))
+    finally:
+        await dispatchers.aclose()
 
     return {
         "intent": intent_response.intent,
@@ -1,10 +1,33 @@
+import hashlib
 import json
-from typing import Dict, Any
+from typing import Dict, Any, Callable, List, Mapping, NamedTuple, Optional
+import copy
 import os
+import stat
+import tempfile
+import threading
+import time
+from types import MappingProxyType
 from datetime import datetime
+from backend.utils.metrics import registry
+from backend.utils.state_backend import state
+from backend.utils.rule_schedule import (
+    DISCOUNT_EXPIRED, HORIZON, SCHEDULE_KEY, ActivationTimeline, merge_rules, parse_windows,
+)
 
 CONFIG_PATH = "business_rules.json"
 
+# Stored alongside the rules in the file but never returned as a rule
+VERSION_KEY = "_version"
+
+# How often (seconds) readers check the file for edits made outside this process
+RELOAD_CHECK_INTERVAL = 1.0
+
+RULES_LOAD_SECONDS = registry.histogram(
+    "smartflow_rules_load_seconds", "Time to read and parse the rules file when it changed")
+RULES_WRITE_SECONDS = registry.histogram(
+    "smartflow_rules_write_seconds", "Time to write a new rules version to disk")
+
 # Default rules
 default_rules = {
     "skip_steps": [],
@@ -12,33 +35,312 @@ default_rules = {
     "tool_substitutions": {}
 }
 
+def _freeze(value):
+    if isinstance(value, Mapping):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+def _thaw(value):
+    if isinstance(value, Mapping):
+        return {k: _thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(v) for v in value]
+    return value
+
+class RulesSnapshot(NamedTuple):
+    """An immutable view of the rules at one version; safe to share between requests."""
+    version: int
+    rules: Mapping[str, Any]
+    window: str = ""   # scheduled rule windows applied on top of the stored rules (and discount-expired), comma-separated
+
+    def to_dict(self) -> Dict[str, Any]:
+        return _thaw(self.rules)
+
+    @property
+    def etag(self) -> str:
+        # Changes on every write and whenever a scheduled window opens or closes. Window ids come
+        # from the rules file and may hold quotes or non-ASCII, so only a hash of them goes in the tag
+        if not self.window:
+            return f'"rules-v{self.version}"'
+        return f'"rules-v{self.version}-{hashlib.sha256(self.window.encode("utf-8")).hexdigest()[:12]}"'
+
+class RulesStore:
+    """Keeps the parsed rules in memory and reloads them only when the file changes.
+
+    Writes go to a temp file that is renamed over the config under a lock, and
+    each write bumps a version that is persisted with the rules. `write_lock`
+    extends that lock to other processes (see backend.utils.state_backend).
+    """
+
+    def __init__(self, path: str, write_lock=None):
+        self.path = path
+        self._lock = threading.RLock()
+        self._write_lock = write_lock if write_lock is not None else threading.RLock()
+        self._snapshot: Optional[RulesSnapshot] = None
+        self._mtime: Optional[tuple] = None
+        self._checked_at = 0.0
+        self._listeners = []
+
+    def add_listener(self, listener: Callable[[RulesSnapshot], None]):
+        """Call `listener` with each new snapshot; it runs under the store lock, so keep it quick."""
+        self._listeners.append(listener)
+
+    def _publish(self, snapshot: RulesSnapshot):
+        for listener in self._listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                print(f"Rules listener failed: {e}")
+
+    def cached(self) -> Optional[RulesSnapshot]:
+        """The last loaded snapshot without checking the file; safe to call from listeners."""
+        return self._snapshot
+
+    def snapshot(self) -> RulesSnapshot:
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._checked_at < RELOAD_CHECK_INTERVAL:
+            return snapshot
+        with self._lock:
+            return self._refresh()
+
+    def write(self, rules: Dict[str, Any]) -> RulesSnapshot:
+        with self._lock, self._write_lock:
+            # Re-read first: another worker may have written a newer version
+            version = self._refresh(force=True).version + 1
+            started = time.perf_counter()
+            self._write_file(dict(rules, **{VERSION_KEY: version}))
+            RULES_WRITE_SECONDS.observe(time.perf_counter() - started)
+            self._snapshot = RulesSnapshot(version, _freeze(rules))
+            self._mtime = self._stat()
+            self._checked_at = time.monotonic()
+            self._publish(self._snapshot)
+            return self._snapshot
+
+    def update(self, change: Callable[[Dict[str, Any]], Dict[str, Any]]) -> RulesSnapshot:
+        """Read-modify-write under the store lock so concurrent updates are not lost."""
+        with self._lock, self._write_lock:
+            return self.write(change(self._refresh(force=True).to_dict()))
+
+    def _stat(self) -> Optional[tuple]:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        # Every write renames a new file into place, so the inode changes even when
+        # two writes land within the filesystem's mtime granularity
+        return st.st_mtime_ns, st.st_ino, st.st_size
+
+    def _refresh(self, force: bool = False) -> RulesSnapshot:
+        # Caller holds the lock
+        if self._snapshot is not None and not force and time.monotonic() - self._checked_at < RELOAD_CHECK_INTERVAL:
+            return self._snapshot
+        self._checked_at = time.monotonic()
+        mtime = self._stat()
+        if self._snapshot is not None and mtime is not None and mtime == self._mtime:
+            return self._snapshot
+
+        if mtime is None:
+            self._write_file(dict(default_rules, **{VERSION_KEY: 0}))
+            mtime = self._stat()
+        started = time.perf_counter()
+        with open(self.path, "r") as f:
+            data = json.load(f)
+        version = data.pop(VERSION_KEY, 0)
+        frozen = _freeze(data)
+        RULES_LOAD_SECONDS.observe(time.perf_counter() - started)
+
+        current = self._snapshot
+        if current is not None and version <= current.version:
+            # Edited by hand without a version bump; only move forward if the rules changed
+            version = current.version if current.to_dict() == data else current.version + 1
+        self._snapshot = RulesSnapshot(version, frozen)
+        self._mtime = mtime
+        if current is None or version != current.version:
+            self._publish(self._snapshot)
+        return self._snapshot
+
+    def _write_file(self, data: Dict[str, Any]):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".business_rules.", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f, indent=2)
+                f.flush()
+                # mkstemp creates the file 0600; keep the config readable as before the rename
+                os.fchmod(f.fileno(), self._file_mode())
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def _file_mode(self) -> int:
+        try:
+            return stat.S_IMODE(os.stat(self.path).st_mode)
+        except FileNotFoundError:
+            return 0o644
+
+rules_store = RulesStore(CONFIG_PATH, write_lock=state.lock("rules"))
+
+def _discount_expiry(rules: Mapping[str, Any]) -> Optional[float]:
+    discount = rules.get("discount") or {}
+    if not discount.get("enabled", True) or not discount.get("expires_at"):
+        return None
+    try:
+        return datetime.fromisoformat(discount["expires_at"]).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+class RulesResolver:
+    """The rules in effect right now: the stored rules plus any open scheduled windows.
+
+    For each rules version the windows are laid out on a sorted activation
+    timeline, so finding the rules for time t is a binary search. The
+    resolved snapshot is reused until the next boundary, and a new one is
+    published to listeners when a write or a boundary crossing changes it.
+    """
+
+    def __init__(self, store: RulesStore):
+        self.store = store
+        self._lock = threading.RLock()
+        self._listeners = []
+        self._timeline: Optional[ActivationTimeline] = None
+        self._timeline_version: Optional[int] = None
+        self._windows: Dict[str, Any] = {}
+        self._resolved: Dict[tuple, RulesSnapshot] = {}
+        self._current: Optional[RulesSnapshot] = None
+        self._valid_from = 0.0
+        self._valid_until = 0.0
+        self._published = None
+        store.add_listener(self._on_store_change)
+
+    def add_listener(self, listener: Callable[[RulesSnapshot], None]):
+        """Call `listener` with each new effective snapshot; keep it quick."""
+        self._listeners.append(listener)
+
+    def snapshot(self, now: Optional[float] = None) -> RulesSnapshot:
+        now = time.time() if now is None else now
+        raw = self.store.snapshot()
+        current = self._current
+        if current is not None and current.version == raw.version and self._valid_from <= now < self._valid_until:
+            return current
+        with self._lock:
+            return self._resolve(raw, now)
+
+    def next_change(self) -> float:
+        """When the effective rules may change next without a write (as of the last resolve)."""
+        return self._valid_until
+
+    def _on_store_change(self, raw: RulesSnapshot):
+        with self._lock:
+            self._resolve(raw, time.time())
+
+    def _resolve(self, raw: RulesSnapshot, now: float) -> RulesSnapshot:
+        # Caller holds the lock
+        if self._timeline_version != raw.version or not self._timeline.covers(now):
+            windows = parse_windows(_thaw(raw.rules.get(SCHEDULE_KEY)) or [])
+            # Start slightly in the past so readers with a marginally older clock stay covered
+            start = now - 60
+            self._timeline = ActivationTimeline(
+                windows, start, start + HORIZON.total_seconds(), _discount_expiry(raw.rules))
+            self._windows = {window.id: window for window in windows}
+            if self._timeline_version != raw.version:
+                self._resolved = {}
+            self._timeline_version = raw.version
+
+        index = self._timeline.index(now)
+        active = self._timeline.active[index]
+        snapshot = self._resolved.get(active)
+        if snapshot is None:
+            base = _thaw(raw.rules)
+            if DISCOUNT_EXPIRED in active:
+                base["discount"] = dict(base["discount"], enabled=False)
+            overlays = [_thaw(self._windows[window_id].rules) for window_id in active if window_id in self._windows]
+            snapshot = RulesSnapshot(
+                raw.version, _freeze(merge_rules(base, overlays)),
+                ",".join(active),
+            )
+            self._resolved[active] = snapshot
+
+        self._current = snapshot
+        self._valid_from = self._timeline.times[index]
+        self._valid_until = self._timeline.next_boundary(index)
+        if self._published != (snapshot.version, active):
+            self._published = (snapshot.version, active)
+            for listener in self._listeners:
+                try:
+                    listener(snapshot)
+                except Exception as e:
+                    print(f"Rules listener failed: {e}")
+        return snapshot
+
+    def upcoming(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """The next changes of the active windows on the current timeline."""
+        now = time.time()
+        self.snapshot(now)
+        with self._lock:
+            timeline = self._timeline
+            start = timeline.index(now)
+            return [
+                {"at": datetime.fromtimestamp(at).isoformat(timespec="seconds"),
+                 "windows": [window_id for window_id in active if window_id != DISCOUNT_EXPIRED],
+                 "discount_expired": DISCOUNT_EXPIRED in active}
+                for at, active in list(zip(timeline.times, timeline.active))[start:start + limit]
+            ]
+
+    def stats(self) -> Dict[str, Any]:
+        timeline = self._timeline
+        return {
+            "version": self._timeline_version,
+            "window": self._current.window if self._current else None,
+            "next_change": self._valid_until or None,
+            "timeline_transitions": timeline.transitions() if timeline else 0,
+            "resolved_snapshots": len(self._resolved),
+        }
+
+rules_resolver = RulesResolver(rules_store)
+
+def get_rules_snapshot() -> RulesSnapshot:
+    """Rules in effect now, for the hot path; no disk I/O unless the file changed."""
+    return rules_resolver.snapshot()
+
+registry.callback(
+    "smartflow_rules_version", "Version of the rules currently in memory",
+    lambda: {(): rules_store._snapshot.version} if rules_store._snapshot else {})
+
+def add_rules_listener(listener: Callable[[RulesSnapshot], None]):
+    """`listener` gets each new effective snapshot: after writes and when a scheduled window opens or closes."""
+    rules_resolver.add_listener(listener)
+
 # Load or create config
 def load_rules() -> Dict[str, Any]:
-    if not os.path.exists(CONFIG_PATH):
-        with open(CONFIG_PATH, "w") as f:
-            json.dump(default_rules, f)
-    with open(CONFIG_PATH, "r") as f:
-        return json.load(f)
-
-def save_rules(rules: Dict[str, Any]):
-    with open(CONFIG_PATH, "w") as f:
-        json.dump(rules, f, indent=2)
-
-def reset_rules():
-    save_rules(default_rules)
-
-def update_rules(updates: Dict[str, Any]):
-    rules = load_rules()
-    for key, value in updates.items():
-        if isinstance(value, dict) and key in rules:
-            rules[key].update(value)
-        else:
-            rules[key] = value
-    save_rules(rules)
+    return get_rules_snapshot().to_dict()
+
+def load_stored_rules() -> Dict[str, Any]:
+    """The rules as stored, including scheduled windows, before any window is applied."""
+    return rules_store.snapshot().to_dict()
+
+def save_rules(rules: Dict[str, Any]) -> RulesSnapshot:
+    return rules_store.write(rules)
+
+def reset_rules() -> RulesSnapshot:
+    return save_rules(copy.deepcopy(default_rules))
+
+def update_rules(updates: Dict[str, Any]) -> RulesSnapshot:
+    def merge(rules: Dict[str, Any]) -> Dict[str, Any]:
+        for key, value in updates.items():
+            if isinstance(value, dict) and isinstance(rules.get(key), dict):
+                rules[key].update(value)
+            else:
+                rules[key] = value
+        return rules
+    return rules_store.update(merge)
 
 def cleanup_expired_rules():
-    rules = load_rules()
-    if "discount" in rules:
-        if datetime.now().isoformat() > rules["discount"].get("expires_at", ""):
-            rules["discount"]["enabled"] = False
-            save_rules(rules)
+    # The effective rules already drop the discount at expires_at; this persists it
+    expires_at = _discount_expiry(rules_store.snapshot().rules)
+    if expires_at is not None and time.time() >= expires_at:
+        update_rules({"discount": {"enabled": False}})
@@ -1,26 +1,163 @@
-tickets_db = {}  # ticket_id -> ticket info
-ticket_status = {}  # ticket_id -> status
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+# SQLite file holding tickets and pending expiries; shared by every worker process on the box
+DB_PATH = os.environ.get("SMARTFLOW_DB_PATH", "smartflow.db")
 
 customers_db = {}  # traveler_name or ID -> info
 
+# Ticket fields copied into their own indexed columns
+INDEXED_FIELDS = {"traveler_name": "traveler_name", "date": "travel_date"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tickets (
+    ticket_id TEXT PRIMARY KEY,
+    traveler_name TEXT,
+    travel_date TEXT,
+    status TEXT NOT NULL,
+    status_reason TEXT,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_tickets_traveler ON tickets (traveler_name, travel_date);
+CREATE INDEX IF NOT EXISTS idx_tickets_status ON tickets (status, travel_date);
+CREATE INDEX IF NOT EXISTS idx_tickets_date ON tickets (travel_date);
+CREATE TABLE IF NOT EXISTS expiries (
+    key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    payload TEXT
+);
+"""
+
+# Statements are constant strings so sqlite3's per-connection cache reuses the compiled form
+_INSERT = (
+    "INSERT INTO tickets (ticket_id, traveler_name, travel_date, status, status_reason, data, updated_at) "
+    "VALUES (?, ?, ?, 'booked', NULL, ?, ?)"
+)
+_SELECT_DATA = "SELECT data FROM tickets WHERE ticket_id = ?"
+_SELECT_STATUS = "SELECT status, status_reason FROM tickets WHERE ticket_id = ?"
+_UPDATE_DATA = "UPDATE tickets SET traveler_name = ?, travel_date = ?, data = ?, updated_at = ? WHERE ticket_id = ?"
+_UPDATE_STATUS = "UPDATE tickets SET status = ?, status_reason = ?, updated_at = ? WHERE ticket_id = ?"
+
+_local = threading.local()
+_schema_lock = threading.Lock()
+_schema_ready = set()
+
+
+def _connection() -> sqlite3.Connection:
+    # One connection per thread; FastAPI runs sync handlers on a thread pool
+    conn = getattr(_local, "conn", None)
+    if conn is None or getattr(_local, "path", None) != DB_PATH:
+        conn = sqlite3.connect(DB_PATH, timeout=30, isolation_level=None, cached_statements=256)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with _schema_lock:
+            if DB_PATH not in _schema_ready:
+                conn.executescript(_SCHEMA)
+                _schema_ready.add(DB_PATH)
+        _local.conn, _local.path = conn, DB_PATH
+    return conn
+
+
+def _indexed_values(data: dict):
+    return tuple(data.get(field) for field in INDEXED_FIELDS)
+
+
 def add_ticket(ticket_id: str, data: dict):
-    tickets_db[ticket_id] = data
-    ticket_status[ticket_id] = "booked"
+    _connection().execute(_INSERT, (ticket_id, *_indexed_values(data), json.dumps(data), time.time()))
+
 
 def get_ticket(ticket_id: str):
-    return tickets_db.get(ticket_id)
+    row = _connection().execute(_SELECT_DATA, (ticket_id,)).fetchone()
+    return json.loads(row[0]) if row else None
+
 
 def update_ticket(ticket_id: str, updates: dict):
-    if ticket_id in tickets_db:
-        tickets_db[ticket_id].update(updates)
-        return tickets_db[ticket_id]
-    return None
+    conn = _connection()
+    # IMMEDIATE takes the write lock up front so concurrent updates can't interleave
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        row = conn.execute(_SELECT_DATA, (ticket_id,)).fetchone()
+        if row is None:
+            conn.execute("ROLLBACK")
+            return None
+        data = json.loads(row[0])
+        data.update(updates)
+        conn.execute(_UPDATE_DATA, (*_indexed_values(data), json.dumps(data), time.time(), ticket_id))
+        conn.execute("COMMIT")
+        return data
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
 
 def cancel_ticket(ticket_id: str, reason: str):
-    if ticket_id in ticket_status:
-        ticket_status[ticket_id] = f"cancelled: {reason}"
-        return True
-    return False
+    cursor = _connection().execute(_UPDATE_STATUS, ("cancelled", reason, time.time(), ticket_id))
+    return cursor.rowcount > 0
+
 
 def get_ticket_status(ticket_id: str):
-    return ticket_status.get(ticket_id, "not_found")
+    row = _connection().execute(_SELECT_STATUS, (ticket_id,)).fetchone()
+    if row is None:
+        return "not_found"
+    status, reason = row
+    return f"{status}: {reason}" if reason else status
+
+
+def find_tickets(
+    traveler_name: Optional[str] = None,
+    status: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    limit: int = 100,
+) -> List[Dict[str, Any]]:
+    """Tickets matching every given filter, ordered by travel date; each filter uses an index."""
+    clauses, args = [], []
+    if traveler_name is not None:
+        clauses.append("traveler_name = ?")
+        args.append(traveler_name)
+    if status is not None:
+        clauses.append("status = ?")
+        args.append(status)
+    if date_from is not None:
+        clauses.append("travel_date >= ?")
+        args.append(date_from)
+    if date_to is not None:
+        clauses.append("travel_date <= ?")
+        args.append(date_to)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    rows = _connection().execute(
+        f"SELECT ticket_id, status, status_reason, data FROM tickets {where} "
+        "ORDER BY travel_date, ticket_id LIMIT ?",
+        (*args, limit),
+    ).fetchall()
+    return [
+        {"ticket_id": ticket_id, "status": status, "status_reason": reason, **json.loads(data)}
+        for ticket_id, status, reason, data in rows
+    ]
+
+
+# Pending expiries (discounts, timed rules) so the scheduler can rebuild its queue at startup
+
+def save_expiry(key: str, kind: str, expires_at: float, payload: Any = None):
+    _connection().execute(
+        "INSERT OR REPLACE INTO expiries (key, kind, expires_at, payload) VALUES (?, ?, ?, ?)",
+        (key, kind, expires_at, json.dumps(payload)),
+    )
+
+
+def delete_expiry(key: str):
+    _connection().execute("DELETE FROM expiries WHERE key = ?", (key,))
+
+
+def load_expiries() -> List[Dict[str, Any]]:
+    rows = _connection().execute("SELECT key, kind, expires_at, payload FROM expiries ORDER BY expires_at").fetchall()
+    return [
+        {"key": key, "kind": kind, "expires_at": expires_at, "payload": json.loads(payload)}
+        for key, kind, expires_at, payload in rows
+    ]
@@ -0,0 +1,240 @@
+import csv
+import os
+import re
+import threading
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# CSV or Parquet with columns: flight, from_city, to_city, date, departure, arrival
+SCHEDULE_PATH = os.environ.get("SMARTFLOW_SCHEDULE_PATH", "data/flight_schedule.csv")
+
+COLUMNS = ["flight", "from_city", "to_city", "date", "departure", "arrival"]
+
+# Sort key layout: route code in the high 32 bits, then day number, then minute of day
+_DAY_SHIFT = 11          # minutes of the day fit in 11 bits
+_ROUTE_SHIFT = 32        # day numbers (days since 1970) fit in the 21 bits between
+_MINUTE_MASK = (1 << _DAY_SHIFT) - 1
+_DAY_MASK = (1 << (_ROUTE_SHIFT - _DAY_SHIFT)) - 1
+
+_HHMM = re.compile(r"([01]?\d|2[0-3]):[0-5]\d")
+
+# Dates as the LLM or a traveller tends to write them; day first for the numeric ones, as in India
+_DATE_FORMATS = ["%Y-%m-%d", "%Y/%m/%d", "%d/%m/%Y", "%d-%m-%Y", "%d.%m.%Y",
+                 "%d %B %Y", "%d %b %Y", "%B %d %Y", "%b %d %Y"]
+_YEARLESS_FORMATS = ["%d %B", "%d %b", "%B %d", "%b %d", "%d/%m"]
+_ORDINAL = re.compile(r"(\d)(?:st|nd|rd|th)\b")
+
+
+def _minutes(values: Sequence[str]) -> np.ndarray:
+    """Minutes after midnight for HH:MM strings, without a Python-level loop."""
+    text = np.asarray(values).astype("U5")
+    if text.size and (np.char.str_len(text) < 5).any():
+        text = np.char.zfill(text, 5)  # "9:30" -> "09:30"
+    digits = text.view(np.uint32).reshape(-1, 5).astype(np.int16) - ord("0")
+    return (digits[:, 0] * 10 + digits[:, 1]) * 60 + digits[:, 3] * 10 + digits[:, 4]
+
+
+def check_clock(value: str) -> str:
+    """`value` if it is a 24-hour HH:MM (or H:MM) time; ValueError otherwise."""
+    if not isinstance(value, str) or not _HHMM.fullmatch(value.strip()):
+        raise ValueError(f"expected a time as HH:MM between 00:00 and 23:59, got {value!r}")
+    return value.strip()
+
+
+def parse_travel_date(value: Optional[str], today: Optional[date] = None) -> Optional[date]:
+    """The day meant by "2025-08-12", "12 August", "Aug 12th, 2025", "12/08/2025" or "tomorrow"; None if unreadable.
+
+    A date without a year that has already passed this year means next year.
+    """
+    if not value or not isinstance(value, str):
+        return None
+    today = today or date.today()
+    text = _ORDINAL.sub(r"\1", value.strip().lower().replace(",", " ").replace(" of ", " "))
+    text = " ".join(text.split())
+    relative = {"today": 0, "tonight": 0, "tomorrow": 1, "day after tomorrow": 2}
+    if text in relative:
+        return today + timedelta(days=relative[text])
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            pass
+    for fmt in _YEARLESS_FORMATS:
+        try:
+            # Parse with a leap year so "29 Feb" is read before the real year is applied
+            parsed = datetime.strptime(f"2000 {text}", f"%Y {fmt}").date()
+        except ValueError:
+            continue
+        for year in (today.year, today.year + 1):
+            try:
+                candidate = parsed.replace(year=year)
+            except ValueError:
+                continue
+            if candidate >= today:
+                return candidate
+    return None
+
+
+def _days(values) -> np.ndarray:
+    return np.asarray(values, dtype="datetime64[D]").astype(np.int32)
+
+
+def _clock(minute: int) -> str:
+    hour, minute = divmod(int(minute), 60)
+    return f"{hour % 12 or 12}:{minute:02d} {'AM' if hour < 12 else 'PM'}"
+
+
+class FlightSchedule:
+    """Columnar, sorted index over flight legs.
+
+    Cities and flight numbers are dictionary-encoded into small integer
+    columns, and legs are sorted by (route, date, departure) so that a search
+    is two binary searches over one int64 key column plus a slice.
+    """
+
+    def __init__(self, flights, from_cities, to_cities, dates, departures, arrivals):
+        # Encode the raw strings first, then normalize only the (few) distinct values
+        raw, raw_codes = np.unique(np.concatenate([from_cities, to_cities]).astype(str), return_inverse=True)
+        names = np.char.strip(raw)
+        cities, first_seen, city_of_raw = np.unique(np.char.lower(names), return_index=True, return_inverse=True)
+        city_codes = city_of_raw.reshape(-1)[raw_codes.reshape(-1)]
+        # Keep one original spelling per city for display
+        self.city_names = [str(name) for name in names[first_seen]]
+        self.city_index = {str(c): i for i, c in enumerate(cities)}
+        n = len(from_cities)
+        from_codes = city_codes[:n].astype(np.int64)
+        to_codes = city_codes[n:].astype(np.int64)
+
+        self.flight_names, flight_codes = np.unique(np.asarray(flights).astype(str), return_inverse=True)
+
+        days = _days(dates)
+        dep = _minutes(departures)
+        route = from_codes * len(cities) + to_codes
+        keys = (route << _ROUTE_SHIFT) | (days.astype(np.int64) << _DAY_SHIFT) | dep.astype(np.int64)
+
+        # Route, day and departure are all recoverable from the key, so only
+        # the key, arrival and flight columns are kept
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.arrivals = _minutes(arrivals)[order]
+        self.flights = flight_codes[order].astype(np.int32)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _key(self, route: int, day: int, minute: int) -> int:
+        return (route << _ROUTE_SHIFT) | (day << _DAY_SHIFT) | minute
+
+    def search(
+        self,
+        from_city: str,
+        to_city: str,
+        date_from: str,
+        date_to: Optional[str] = None,
+        time_from: Optional[str] = None,
+        time_to: Optional[str] = None,
+        limit: int = 20,
+    ) -> List[Dict[str, Any]]:
+        origin = self.city_index.get(from_city.strip().lower())
+        destination = self.city_index.get(to_city.strip().lower())
+        if origin is None or destination is None:
+            return []
+
+        route = origin * len(self.city_names) + destination
+        first_day = int(_days([date_from])[0])
+        last_day = int(_days([date_to])[0]) if date_to else first_day
+        earliest = _minutes([check_clock(time_from)])[0] if time_from else 0
+        latest = _minutes([check_clock(time_to)])[0] if time_to else 24 * 60 - 1
+
+        lo = int(np.searchsorted(self.keys, self._key(route, first_day, int(earliest)), side="left"))
+        hi = int(np.searchsorted(self.keys, self._key(route, last_day, int(latest)), side="right"))
+        rows = np.arange(lo, hi)
+        if last_day > first_day and (time_from or time_to):
+            # Multi-day ranges need the time window applied to every day in between
+            minutes = self.keys[lo:hi] & _MINUTE_MASK
+            rows = rows[(minutes >= earliest) & (minutes <= latest)]
+        rows = rows[:limit]
+
+        results = []
+        for i in rows:
+            key = int(self.keys[i])
+            departure = key & _MINUTE_MASK
+            arrival = int(self.arrivals[i])
+            results.append({
+                "flight": str(self.flight_names[self.flights[i]]),
+                "from_city": self.city_names[origin],
+                "to_city": self.city_names[destination],
+                "date": str(np.datetime64((key >> _DAY_SHIFT) & _DAY_MASK, "D")),
+                "time": _clock(departure),
+                "departure": f"{departure // 60:02d}:{departure % 60:02d}",
+                "arrival": f"{arrival // 60:02d}:{arrival % 60:02d}",
+            })
+        return results
+
+
+def load_schedule(path: str) -> FlightSchedule:
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        table = pq.read_table(path, columns=COLUMNS)
+        columns = {name: table.column(name).to_numpy(zero_copy_only=False) for name in COLUMNS}
+        columns["date"] = _days(columns["date"]).astype("datetime64[D]")
+        return FlightSchedule(*(columns[name] for name in COLUMNS))
+
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pacsv
+    except ImportError:
+        with open(path, newline="") as f:
+            rows = list(csv.DictReader(f))
+        return FlightSchedule(*(np.array([row[name] for row in rows]) for name in COLUMNS))
+
+    table = pacsv.read_csv(
+        path,
+        convert_options=pacsv.ConvertOptions(
+            include_columns=COLUMNS,
+            column_types={name: pa.string() for name in COLUMNS},
+        ),
+    )
+    return FlightSchedule(*(table.column(name).to_numpy(zero_copy_only=False) for name in COLUMNS))
+
+
+# Airlines and departure slots used when no schedule file is configured
+SYNTHETIC_CITIES = ["Delhi", "Mumbai", "Goa", "Bangalore", "Chennai", "Kolkata", "Hyderabad", "Pune"]
+SYNTHETIC_SLOTS = [("AI", 10 * 60), ("SG", 15 * 60), ("6E", 20 * 60 + 30)]
+
+
+def synthetic_schedule(start: date, days: int = 90) -> FlightSchedule:
+    """A deterministic schedule: every city pair, three departures a day."""
+    routes = [(a, b) for a in SYNTHETIC_CITIES for b in SYNTHETIC_CITIES if a != b]
+    flights, origins, destinations, dates, departures, arrivals = [], [], [], [], [], []
+    for route_number, (origin, destination) in enumerate(routes):
+        for slot, (airline, departure) in enumerate(SYNTHETIC_SLOTS):
+            departure += (route_number * 5) % 60
+            arrival = (departure + 90 + (route_number % 4) * 30) % (24 * 60)
+            for offset in range(days):
+                flights.append(f"{airline}-{100 + route_number * 3 + slot}")
+                origins.append(origin)
+                destinations.append(destination)
+                dates.append((start + timedelta(days=offset)).isoformat())
+                departures.append(f"{departure // 60:02d}:{departure % 60:02d}")
+                arrivals.append(f"{arrival // 60:02d}:{arrival % 60:02d}")
+    return FlightSchedule(*(np.array(values) for values in (flights, origins, destinations, dates, departures, arrivals)))
+
+
+_schedule: Optional[FlightSchedule] = None
+_schedule_lock = threading.Lock()
+
+
+def get_schedule() -> FlightSchedule:
+    """The process-wide schedule, loaded on first use."""
+    global _schedule
+    if _schedule is None:
+        with _schedule_lock:
+            if _schedule is None:
+                if os.path.exists(SCHEDULE_PATH):
+                    _schedule = load_schedule(SCHEDULE_PATH)
+                else:
+                    _schedule = synthetic_schedule(date.today())
+    return _schedule
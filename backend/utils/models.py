@@ -1,10 +1,15 @@
 from pydantic import BaseModel
-from typing import List, Dict
+from typing import Any, List, Dict, Union
 
 class Action(BaseModel):
     tool: str
-    params: Dict[str, str]
+    params: Dict[str, Any]
 
 class IntentResponse(BaseModel):
     intent: str
     actions: List[Action]
+
+class BatchExecuteRequest(BaseModel):
+    # Each item is an English command or an already structured intent
+    items: List[Union[str, IntentResponse]]
+    concurrency: int = 8
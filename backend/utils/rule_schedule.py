@@ -0,0 +1,159 @@
+import bisect
+from datetime import datetime, timedelta
+from typing import Any, Dict, FrozenSet, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+# Rules key holding the time-windowed rule sets
+SCHEDULE_KEY = "scheduled_rules"
+
+# Recurring windows are expanded this far ahead; the timeline is rebuilt when time runs past it
+HORIZON = timedelta(days=14)
+
+WEEKDAYS = {"mon": 0, "tue": 1, "wed": 2, "thu": 3, "fri": 4, "sat": 5, "sun": 6}
+
+# Active-set key entry for a base discount whose expires_at has passed
+DISCOUNT_EXPIRED = "discount-expired"
+
+
+class RuleWindow(NamedTuple):
+    id: str
+    starts_at: Optional[float]
+    ends_at: Optional[float]
+    weekdays: Optional[FrozenSet[int]]   # recurring: only on these days (local time)
+    daily: Optional[Tuple[int, int]]     # recurring: minutes after midnight, [from, to)
+    rules: Mapping[str, Any]
+
+
+def _timestamp(value) -> Optional[float]:
+    if value in (None, ""):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    return datetime.fromisoformat(str(value)).timestamp()
+
+
+def _minutes(value: str) -> int:
+    hours, minutes = str(value).split(":")
+    total = int(hours) * 60 + int(minutes)
+    if not 0 <= total <= 24 * 60:
+        raise ValueError(f"time of day out of range: {value}")
+    return total
+
+
+def parse_windows(raw: Sequence[Mapping[str, Any]]) -> List[RuleWindow]:
+    """Rule windows from the rules file; malformed entries are skipped with a message.
+
+    Each entry looks like:
+        {"id": "weekend-promo", "starts_at": "2025-06-01T00:00:00", "ends_at": null,
+         "recurring": {"weekdays": ["sat", "sun"], "from": "00:00", "to": "24:00"},
+         "rules": {"discount": {"enabled": true, "amount_percent": 15}}}
+    `starts_at`/`ends_at` are optional; without `recurring` the window is one span.
+    """
+    windows = []
+    for index, entry in enumerate(raw or ()):
+        try:
+            recurring = entry.get("recurring")
+            weekdays = daily = None
+            if recurring:
+                if recurring.get("weekdays"):
+                    weekdays = frozenset(
+                        day if isinstance(day, int) else WEEKDAYS[str(day).lower()[:3]]
+                        for day in recurring["weekdays"]
+                    )
+                daily = (_minutes(recurring.get("from", "00:00")), _minutes(recurring.get("to", "24:00")))
+            windows.append(RuleWindow(
+                str(entry.get("id") or f"window-{index}"),
+                _timestamp(entry.get("starts_at")),
+                _timestamp(entry.get("ends_at")),
+                weekdays,
+                daily,
+                entry.get("rules") or {},
+            ))
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            print(f"Ignoring scheduled rule {index}: {e}")
+    return windows
+
+
+def _spans(window: RuleWindow, start: float, end: float) -> List[Tuple[float, float]]:
+    """The window's active [from, to) spans that overlap [start, end)."""
+    lower = max(start, window.starts_at if window.starts_at is not None else start)
+    upper = min(end, window.ends_at if window.ends_at is not None else end)
+    if lower >= upper:
+        return []
+    if window.daily is None and window.weekdays is None:
+        return [(lower, upper)]
+
+    daily_from, daily_to = window.daily or (0, 24 * 60)
+    spans = []
+    # Start a day early so a window running past midnight is not cut off
+    day = datetime.fromtimestamp(lower).replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=1)
+    while day.timestamp() < upper:
+        if window.weekdays is None or day.weekday() in window.weekdays:
+            span_start = day + timedelta(minutes=daily_from)
+            span_end = day + timedelta(minutes=daily_to if daily_to > daily_from else daily_to + 24 * 60)
+            s, e = max(lower, span_start.timestamp()), min(upper, span_end.timestamp())
+            if s < e:
+                spans.append((s, e))
+        day += timedelta(days=1)
+    return spans
+
+
+def merge_rules(base: Mapping[str, Any], overlays: Sequence[Mapping[str, Any]]) -> Dict[str, Any]:
+    """Base rules with each active window's rules applied in order.
+
+    Step lists are unioned, mappings (tool_substitutions, discount) are merged key by
+    key, and any other key is replaced.
+    """
+    rules = {key: value for key, value in base.items() if key != SCHEDULE_KEY}
+    for overlay in overlays:
+        for key, value in overlay.items():
+            if key in ("skip_steps", "force_steps"):
+                current = list(rules.get(key) or [])
+                rules[key] = current + [step for step in value if step not in current]
+            elif isinstance(value, Mapping) and isinstance(rules.get(key), Mapping):
+                rules[key] = {**rules[key], **value}
+            else:
+                rules[key] = value
+    return rules
+
+
+class ActivationTimeline:
+    """Which rule windows are active when, precomputed for [start, end).
+
+    `times` is sorted; between times[i] and times[i + 1] exactly the windows in
+    `active[i]` apply, so the rules at time t are one binary search away.
+    """
+
+    def __init__(self, windows: Sequence[RuleWindow], start: float, end: float,
+                 discount_expires_at: Optional[float] = None):
+        self.start = start
+        self.end = end
+        spans = [(s, e, window.id) for window in windows for s, e in _spans(window, start, end)]
+        order = {window.id: i for i, window in enumerate(windows)}
+
+        boundaries = {start}
+        for s, e, _ in spans:
+            boundaries.update((s, e))
+        if discount_expires_at is not None and start < discount_expires_at < end:
+            boundaries.add(discount_expires_at)
+        self.times: List[float] = []
+        self.active: List[Tuple[str, ...]] = []
+        for t in sorted(t for t in boundaries if start <= t < end):
+            ids = sorted({window_id for s, e, window_id in spans if s <= t < e}, key=order.get)
+            if discount_expires_at is not None and t >= discount_expires_at:
+                ids.append(DISCOUNT_EXPIRED)
+            # Keep only boundaries where the active set actually changes
+            if not self.active or self.active[-1] != tuple(ids):
+                self.times.append(t)
+                self.active.append(tuple(ids))
+
+    def covers(self, t: float) -> bool:
+        return self.start <= t < self.end
+
+    def index(self, t: float) -> int:
+        return max(0, bisect.bisect_right(self.times, t) - 1)
+
+    def next_boundary(self, index: int) -> float:
+        return self.times[index + 1] if index + 1 < len(self.times) else self.end
+
+    def transitions(self) -> int:
+        return len(self.times)
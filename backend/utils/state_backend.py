@@ -0,0 +1,288 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from backend.utils import db
+
+# "memory" keeps discounts and recent report entries in this process (one worker);
+# "sqlite" shares them, and serializes rules writes, across every worker on the box
+STATE_BACKEND = os.environ.get("SMARTFLOW_STATE_BACKEND", "memory")
+STATE_PATH = os.environ.get("SMARTFLOW_STATE_PATH") or db.DB_PATH
+
+
+def _matches(row: Dict[str, Any], tool, status, since, until, after, before) -> bool:
+    return ((tool is None or row["tool"] == tool)
+            and (status is None or row["status"] == status)
+            and (since is None or row["ts"] >= since)
+            and (until is None or row["ts"] <= until)
+            and (after is None or row["seq"] > after)
+            and (before is None or row["seq"] < before))
+
+
+class MemoryReportTail:
+    """Report entries not yet written to a Parquet segment, held in this process."""
+
+    def __init__(self):
+        self._rows: List[Dict[str, Any]] = []
+        self._next_seq = 1
+        self._lock = threading.Lock()
+        self._seal_lock = threading.Lock()
+
+    def start_after(self, seq: int):
+        with self._lock:
+            self._next_seq = max(self._next_seq, seq + 1)
+
+    def append(self, rows: List[Dict[str, Any]]):
+        """Give each row the next seq and keep it."""
+        with self._lock:
+            for row in rows:
+                row["seq"] = self._next_seq
+                self._next_seq += 1
+                self._rows.append(row)
+
+    def select(self, tool=None, status=None, since=None, until=None, after=None, before=None,
+               descending=False, limit=100) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = list(reversed(self._rows)) if descending else list(self._rows)
+        page = []
+        for row in rows:
+            if _matches(row, tool, status, since, until, after, before):
+                page.append(row)
+                if len(page) == limit:
+                    break
+        return page
+
+    def oldest(self, after: int, limit: int) -> List[Dict[str, Any]]:
+        return self.select(after=after, limit=limit)
+
+    def discard_through(self, seq: int):
+        with self._lock:
+            self._rows = [row for row in self._rows if row["seq"] > seq]
+
+    def count(self) -> int:
+        return len(self._rows)
+
+    def last_seq(self) -> int:
+        return self._next_seq - 1
+
+    @contextmanager
+    def seal_lock(self) -> Iterator[None]:
+        with self._seal_lock:
+            yield
+
+
+class _FileLock:
+    """An exclusive lock shared by every process on the box; re-entrant within a thread."""
+
+    def __init__(self, path: str):
+        import fcntl  # POSIX only; the memory backend needs no file locks
+        self._fcntl = fcntl
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            self._file = open(self.path, "a")
+            self._fcntl.flock(self._file.fileno(), self._fcntl.LOCK_EX)
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        self._depth -= 1
+        if self._depth == 0:
+            self._fcntl.flock(self._file.fileno(), self._fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+        self._thread_lock.release()
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS state_meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS discounts (
+    discount_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    created_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS report_tail (
+    seq INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    tool TEXT,
+    status TEXT,
+    data TEXT NOT NULL
+);
+"""
+
+
+class SQLiteReportTail:
+    """Report entries not yet in a segment, in a table every worker appends to.
+
+    Seqs come from one counter in the same database, so entries from all
+    workers form a single ordered log.
+    """
+
+    def __init__(self, backend: "SQLiteStateBackend"):
+        self.backend = backend
+        self._seal_lock = _FileLock(backend.path + ".report-seal.lock")
+
+    def start_after(self, seq: int):
+        conn = self.backend.connection()
+        conn.execute("INSERT OR IGNORE INTO state_meta (key, value) VALUES ('report_seq', 0)")
+        conn.execute("UPDATE state_meta SET value = MAX(value, ?) WHERE key = 'report_seq'", (seq,))
+
+    def append(self, rows: List[Dict[str, Any]]):
+        if not rows:
+            return
+        conn = self.backend.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("INSERT OR IGNORE INTO state_meta (key, value) VALUES ('report_seq', 0)")
+            last = conn.execute("SELECT value FROM state_meta WHERE key = 'report_seq'").fetchone()[0]
+            for offset, row in enumerate(rows, start=1):
+                row["seq"] = last + offset
+            conn.executemany(
+                "INSERT INTO report_tail (seq, ts, tool, status, data) VALUES (?, ?, ?, ?, ?)",
+                [(row["seq"], row["ts"], row["tool"], row["status"], json.dumps(row["entry"], default=str))
+                 for row in rows],
+            )
+            conn.execute("UPDATE state_meta SET value = ? WHERE key = 'report_seq'", (last + len(rows),))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def select(self, tool=None, status=None, since=None, until=None, after=None, before=None,
+               descending=False, limit=100) -> List[Dict[str, Any]]:
+        clauses, args = [], []
+        for column, value in (("tool", tool), ("status", status)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                args.append(value)
+        for clause, value in (("ts >= ?", since), ("ts <= ?", until), ("seq > ?", after), ("seq < ?", before)):
+            if value is not None:
+                clauses.append(clause)
+                args.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self.backend.connection().execute(
+            f"SELECT seq, ts, tool, status, data FROM report_tail {where} "
+            f"ORDER BY seq {'DESC' if descending else 'ASC'} LIMIT ?",
+            (*args, limit),
+        ).fetchall()
+        return [
+            {"seq": seq, "ts": ts, "tool": tool, "status": status, "entry": json.loads(data)}
+            for seq, ts, tool, status, data in rows
+        ]
+
+    def oldest(self, after: int, limit: int) -> List[Dict[str, Any]]:
+        return self.select(after=after, limit=limit)
+
+    def discard_through(self, seq: int):
+        self.backend.connection().execute("DELETE FROM report_tail WHERE seq <= ?", (seq,))
+
+    def count(self) -> int:
+        return self.backend.connection().execute("SELECT COUNT(*) FROM report_tail").fetchone()[0]
+
+    def last_seq(self) -> int:
+        row = self.backend.connection().execute("SELECT value FROM state_meta WHERE key = 'report_seq'").fetchone()
+        return row[0] if row else 0
+
+    def seal_lock(self) -> _FileLock:
+        # Only one worker turns the shared tail into a segment at a time
+        return self._seal_lock
+
+
+class MemoryStateBackend:
+    """Process-local state: right for a single uvicorn worker."""
+
+    name = "memory"
+
+    def __init__(self):
+        self._discounts: Dict[str, Dict[str, Any]] = {}
+        self._discounts_lock = threading.Lock()
+        self._locks: Dict[str, threading.RLock] = {}
+        self._locks_guard = threading.Lock()
+
+    def lock(self, name: str):
+        with self._locks_guard:
+            return self._locks.setdefault(name, threading.RLock())
+
+    def put_discount(self, discount_id: str, discount: Dict[str, Any]):
+        with self._discounts_lock:
+            self._discounts[discount_id] = discount
+
+    def remove_discount(self, discount_id: str):
+        with self._discounts_lock:
+            self._discounts.pop(discount_id, None)
+
+    def list_discounts(self) -> List[Dict[str, Any]]:
+        with self._discounts_lock:
+            return list(self._discounts.values())
+
+    def report_tail(self) -> MemoryReportTail:
+        return MemoryReportTail()
+
+
+class SQLiteStateBackend:
+    """State in a SQLite file (WAL) plus file locks, shared by all workers on one box."""
+
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._locks: Dict[str, _FileLock] = {}
+        self._locks_guard = threading.Lock()
+        self.connection().executescript(_SCHEMA)
+
+    def connection(self) -> sqlite3.Connection:
+        # One connection per thread, like backend.utils.db
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, cached_statements=64)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def lock(self, name: str) -> _FileLock:
+        with self._locks_guard:
+            lock = self._locks.get(name)
+            if lock is None:
+                lock = self._locks[name] = _FileLock(f"{self.path}.{name}.lock")
+            return lock
+
+    def put_discount(self, discount_id: str, discount: Dict[str, Any]):
+        self.connection().execute(
+            "INSERT OR REPLACE INTO discounts (discount_id, data, created_at) VALUES (?, ?, ?)",
+            (discount_id, json.dumps(discount), time.time()),
+        )
+
+    def remove_discount(self, discount_id: str):
+        self.connection().execute("DELETE FROM discounts WHERE discount_id = ?", (discount_id,))
+
+    def list_discounts(self) -> List[Dict[str, Any]]:
+        rows = self.connection().execute("SELECT data FROM discounts ORDER BY created_at").fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def report_tail(self) -> SQLiteReportTail:
+        return SQLiteReportTail(self)
+
+
+def create_state_backend(kind: str, path: Optional[str] = None):
+    if kind == "memory":
+        return MemoryStateBackend()
+    if kind == "sqlite":
+        return SQLiteStateBackend(path or STATE_PATH)
+    raise ValueError(f"Unknown SMARTFLOW_STATE_BACKEND {kind!r}; use 'memory' or 'sqlite'")
+
+
+state = create_state_backend(STATE_BACKEND, STATE_PATH)
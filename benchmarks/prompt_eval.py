@@ -0,0 +1,129 @@
+"""Checks that per-command few-shot prompts parse commands as well as the full prompt.
+
+    python -m benchmarks.prompt_eval                       # stub LLM: prompt sizes and example coverage
+    SMARTFLOW_LLM=cohere python -m benchmarks.prompt_eval  # real model: accuracy and latency, both prompts
+    python -m benchmarks.prompt_eval --check               # exit 1 if few-shot accuracy is lower
+
+Every command in benchmarks/prompt_eval.json is sent to the LLM three times:
+with the old fixed prompt (the first five examples), with every example in the
+preamble, and with the examples the prompt builder picks. The fast path and
+the LLM cache are bypassed. The stub model answers the same way whatever the
+preamble says, so its accuracy numbers say nothing about the prompts; only the
+token counts and example coverage mean something without a real model. Expected outputs
+are partial: keys they leave out (e.g. a discount's expires_at, which depends
+on today's date) are not compared.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EVAL_PATH = os.path.join(REPO_ROOT, "benchmarks", "prompt_eval.json")
+
+
+def matches(expected: Any, actual: Any) -> bool:
+    if isinstance(expected, dict):
+        return isinstance(actual, dict) and all(k in actual and matches(v, actual[k]) for k, v in expected.items())
+    if isinstance(expected, list):
+        if not isinstance(actual, list) or len(expected) != len(actual):
+            return False
+        if all(isinstance(v, str) for v in expected):
+            # Step lists are sets; the order the model lists them in doesn't matter
+            return sorted(expected) == sorted(v for v in actual if isinstance(v, str))
+        return all(matches(e, a) for e, a in zip(expected, actual))
+    if isinstance(expected, str):
+        return isinstance(actual, str) and expected.lower() == actual.strip().lower()
+    if isinstance(expected, bool) or expected is None:
+        return expected is actual
+    if isinstance(expected, (int, float)):
+        return isinstance(actual, (int, float)) and float(expected) == float(actual)
+    return expected == actual
+
+
+def run_eval(cases: List[Dict[str, Any]]) -> Dict[str, Any]:
+    from backend.services.cohere_client import LLM_MODEL, LLM_PROVIDER, LLM_STREAM, get_llm_client, prompt_builder
+    from backend.services.json_stream import extract_json
+    from backend.services.prompt_builder import estimate_tokens
+
+    client = get_llm_client()
+    # Ask the way /execute does
+    complete = client.complete_json if LLM_STREAM else client.complete
+    results = {"baseline": [], "full": [], "few_shot": []}
+    covered = 0
+    for case in cases:
+        command, expected = case["input"], case["expected"]
+        selected = prompt_builder.select(command)
+        if any(set(example.output) == set(expected) for example in selected):
+            covered += 1
+        prompts = {"baseline": prompt_builder.baseline_prompt, "full": prompt_builder.full_prompt,
+                   "few_shot": prompt_builder.render(selected)}
+        for mode, preamble in prompts.items():
+            started = time.perf_counter()
+            response = complete(command, preamble=preamble, max_tokens=512, temperature=0.3)
+            elapsed = time.perf_counter() - started
+            results[mode].append({
+                "input": command,
+                "correct": matches(expected, extract_json(response)),
+                "prompt_tokens": estimate_tokens(preamble),
+                "seconds": elapsed,
+                "response": response,
+            })
+
+    summary = {"model": LLM_MODEL, "stub": LLM_PROVIDER == "stub", "cases": len(cases),
+               "example_coverage": covered / len(cases) if cases else 0.0}
+    for mode, rows in results.items():
+        summary[mode] = {
+            "accuracy": sum(row["correct"] for row in rows) / len(rows) if rows else 0.0,
+            "mean_prompt_tokens": round(sum(row["prompt_tokens"] for row in rows) / len(rows), 1) if rows else 0.0,
+            "mean_latency_ms": round(1000 * sum(row["seconds"] for row in rows) / len(rows), 1) if rows else 0.0,
+            "misses": [row["input"] for row in rows if not row["correct"]],
+        }
+    return {"summary": summary, "results": results}
+
+
+def print_summary(summary: Dict[str, Any]):
+    print(f"Model {summary['model']}, {summary['cases']} commands; "
+          f"a selected example had the expected shape for {summary['example_coverage']:.0%}")
+    if summary["stub"]:
+        print("Stub model: its answers ignore the prompt, so compare tokens only, not accuracy")
+    print(f"{'prompt':<10}{'accuracy':>10}{'tokens':>10}{'latency ms':>12}")
+    for mode in ("baseline", "full", "few_shot"):
+        stats = summary[mode]
+        print(f"{mode:<10}{stats['accuracy']:>10.0%}{stats['mean_prompt_tokens']:>10}{stats['mean_latency_ms']:>12}")
+    # Commands both prompts get wrong are a model (or stub) limit; the differences are what matter here
+    full_misses, few_shot_misses = set(summary["full"]["misses"]), set(summary["few_shot"]["misses"])
+    for command in sorted(few_shot_misses - full_misses):
+        print(f"  only the full prompt parsed: {command}")
+    for command in sorted(full_misses - few_shot_misses):
+        print(f"  only the few-shot prompt parsed: {command}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare few-shot and full LLM prompts on the stored eval set")
+    parser.add_argument("--eval-set", default=EVAL_PATH, help="JSON list of {input, expected}")
+    parser.add_argument("--output", help="write every response and the summary here")
+    parser.add_argument("--check", action="store_true", help="exit 1 if few-shot accuracy is below the full prompt's")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("SMARTFLOW_LLM", "stub")
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    with open(args.eval_set, encoding="utf-8") as f:
+        cases = json.load(f)
+
+    report = run_eval(cases)
+    print_summary(report["summary"])
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.check and report["summary"]["few_shot"]["accuracy"] < report["summary"]["full"]["accuracy"]:
+        print("\nFew-shot prompts parsed fewer commands correctly than the full prompt")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,264 @@
+"""Load test for the Smartflow backend, run fully in-process and offline.
+
+    python -m benchmarks.run --requests 500 --concurrency 16
+    python -m benchmarks.run --save-baseline           # record benchmarks/baseline.json
+    python -m benchmarks.run --compare                 # diff against it; exit 1 on regression
+
+The app is served through httpx's ASGI transport, the LLM is the deterministic
+stub (SMARTFLOW_LLM=stub), and tickets and rules live in a scratch directory,
+so runs are repeatable and never touch the working tree's state.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Any, Awaitable, Callable, Dict, List
+
+import httpx
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(REPO_ROOT, "benchmarks", "baseline.json")
+
+# Steps forced into every booking so the workflow scenario exercises the step scheduler
+WORKFLOW_RULES = {
+    "skip_steps": [],
+    "force_steps": ["payment", "confirm_ticket", "refund_status"],
+    "tool_substitutions": {},
+}
+
+CITIES = ["Delhi", "Mumbai", "Goa", "Bangalore", "Chennai", "Kolkata", "Hyderabad", "Pune"]
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(samples: List[float], errors: int = 0, elapsed: float = 0.0) -> Dict[str, Any]:
+    """Latency percentiles in milliseconds plus throughput for one endpoint or step."""
+    return {
+        "count": len(samples),
+        "errors": errors,
+        "throughput_rps": round(len(samples) / elapsed, 1) if elapsed else None,
+        "mean_ms": round(1000 * sum(samples) / len(samples), 3) if samples else 0.0,
+        "p50_ms": round(1000 * percentile(samples, 50), 3),
+        "p95_ms": round(1000 * percentile(samples, 95), 3),
+        "p99_ms": round(1000 * percentile(samples, 99), 3),
+    }
+
+
+def _scenarios(travel_date: str) -> Dict[str, Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]]:
+    def route(i: int):
+        origin = CITIES[i % len(CITIES)]
+        destination = CITIES[(i + 1 + i // len(CITIES)) % len(CITIES)]
+        if destination == origin:
+            destination = CITIES[(i + 1) % len(CITIES)]
+        return origin, destination
+
+    async def rules(client, i):
+        return await client.get("/rules")
+
+    async def search_flights(client, i):
+        origin, destination = route(i)
+        return await client.post("/search-flights", json={
+            "from_city": origin, "to_city": destination, "date": travel_date,
+        })
+
+    async def execute_rule_command(client, i):
+        # Answered by the local parser; measures the rules write path
+        return await client.post("/execute", params={"command": f"Apply a {5 + i % 20}% discount until the end of the month"})
+
+    async def execute_workflow(client, i):
+        # Unique per request so every call goes through the (stub) LLM
+        origin, destination = route(i)
+        return await client.post("/execute", params={"command": f"Book a ticket from {origin} to {destination} request {i}"})
+
+    return {
+        "GET /rules": rules,
+        "POST /search-flights": search_flights,
+        "POST /execute (rule command)": execute_rule_command,
+        "POST /execute (workflow)": execute_workflow,
+    }
+
+
+async def _drive(client, call, requests: int, concurrency: int):
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            started = time.perf_counter()
+            try:
+                response = await call(client, i)
+                body = response.json()
+                failed = response.status_code >= 400 or (isinstance(body, dict) and "error" in body)
+            except Exception:
+                failed = True
+            latencies.append(time.perf_counter() - started)
+            errors += failed
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def _time_steps(dispatcher, step_latencies: Dict[str, List[float]]):
+    """Wrap the in-process dispatcher so each workflow step's latency is recorded by endpoint."""
+    post = dispatcher.post
+
+    async def timed_post(path, payload):
+        started = time.perf_counter()
+        try:
+            return await post(path, payload)
+        finally:
+            step_latencies[path].append(time.perf_counter() - started)
+
+    dispatcher.post = timed_post
+
+
+async def run_benchmark(requests: int, concurrency: int, warmup: int, only: List[str]) -> Dict[str, Any]:
+    from backend.main import app
+    from backend.services import workflow_manager
+    from backend.utils.business_rules import save_rules
+    from backend.utils.flight_schedule import get_schedule
+
+    step_latencies: Dict[str, List[float]] = defaultdict(list)
+    _time_steps(workflow_manager.local_dispatcher, step_latencies)
+
+    await app.router.startup()
+    try:
+        get_schedule()  # build the flight index before timing anything
+        scenarios = _scenarios((date.today() + timedelta(days=7)).isoformat())
+        endpoints = {}
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for name, call in scenarios.items():
+                if only and not any(part.lower() in name.lower() for part in only):
+                    continue
+                save_rules(WORKFLOW_RULES)
+                if warmup:
+                    await _drive(client, call, warmup, concurrency)
+                step_latencies.clear()
+                latencies, errors, elapsed = await _drive(client, call, requests, concurrency)
+                endpoints[name] = summarize(latencies, errors, elapsed)
+                if step_latencies:
+                    endpoints[name]["steps"] = {
+                        path: summarize(samples) for path, samples in sorted(step_latencies.items())
+                    }
+    finally:
+        await app.router.shutdown()
+
+    return {
+        "config": {"requests": requests, "concurrency": concurrency, "warmup": warmup},
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "dispatch_mode": workflow_manager.DISPATCH_MODE,
+        },
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "endpoints": endpoints,
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    header = f"{'endpoint / step':<44}{'count':>7}{'err':>5}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    print(header)
+    print("-" * len(header))
+    for name, stats in report["endpoints"].items():
+        rps = f"{stats['throughput_rps']:.1f}" if stats["throughput_rps"] else "-"
+        print(f"{name:<44}{stats['count']:>7}{stats['errors']:>5}{rps:>9}"
+              f"{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}")
+        for path, step in stats.get("steps", {}).items():
+            print(f"{'  step ' + path:<44}{step['count']:>7}{'':>5}{'':>9}"
+                  f"{step['p50_ms']:>10.2f}{step['p95_ms']:>10.2f}{step['p99_ms']:>10.2f}")
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Endpoints whose p95 or throughput got worse than the baseline by more than `threshold` (a fraction)."""
+    regressions = []
+    print(f"\nCompared with baseline from {baseline.get('created_at', '?')}:")
+    for name, stats in report["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(name)
+        if not before:
+            print(f"  {name}: no baseline")
+            continue
+        p95_change = (stats["p95_ms"] - before["p95_ms"]) / before["p95_ms"] if before["p95_ms"] else 0.0
+        rps_change = 0.0
+        if before.get("throughput_rps") and stats.get("throughput_rps"):
+            rps_change = (stats["throughput_rps"] - before["throughput_rps"]) / before["throughput_rps"]
+        regressed = p95_change > threshold or rps_change < -threshold
+        print(f"  {name}: p95 {before['p95_ms']:.2f} -> {stats['p95_ms']:.2f} ms ({p95_change:+.0%}), "
+              f"throughput {rps_change:+.0%}{'  REGRESSION' if regressed else ''}")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="In-process load test for the Smartflow backend")
+    parser.add_argument("--requests", type=int, default=200, help="timed requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=8, help="requests in flight at once")
+    parser.add_argument("--warmup", type=int, default=20, help="untimed requests per endpoint first")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds the stub LLM sleeps per call")
+    parser.add_argument("--only", action="append", default=[], help="run endpoints whose name contains this")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--save-baseline", action="store_true", help=f"save the report to {BASELINE_PATH}")
+    parser.add_argument("--compare", action="store_true", help="compare with the saved baseline")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline file for --save-baseline/--compare")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown before flagging (0.10 = 10%%)")
+    args = parser.parse_args(argv)
+
+    baseline_path = os.path.abspath(args.baseline)
+    output_path = os.path.abspath(args.output) if args.output else None
+
+    # Configure before the backend is imported; modules read these at import time
+    workdir = tempfile.mkdtemp(prefix="smartflow-bench-")
+    os.environ["SMARTFLOW_LLM"] = "stub"
+    os.environ["SMARTFLOW_STUB_LLM_LATENCY"] = str(args.llm_latency)
+    os.environ["SMARTFLOW_DB_PATH"] = os.path.join(workdir, "bench.db")
+    os.environ.pop("SMARTFLOW_LLM_CACHE_PATH", None)
+    os.chdir(workdir)  # business_rules.json is relative to the working directory
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+
+    # The backend prints every parsed intent; keep that out of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        report = asyncio.run(run_benchmark(args.requests, args.concurrency, args.warmup, args.only))
+    report["config"]["llm_latency"] = args.llm_latency
+
+    print_report(report)
+    if output_path:
+        with open(output_path, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(baseline_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline saved to {baseline_path}")
+    if args.compare:
+        if not os.path.exists(baseline_path):
+            print(f"\nNo baseline at {baseline_path}; run with --save-baseline first")
+            return 1
+        with open(baseline_path) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
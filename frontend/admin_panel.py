@@ -1,5 +1,7 @@
 import streamlit as st
 import requests
+import httpx
+from httpx_sse import connect_sse
 import json
 
 BASE_URL = "http://127.0.0.1:8000"  # Replace if deployed elsewhere
@@ -7,6 +9,29 @@ BASE_URL = "http://127.0.0.1:8000"  # Replace if deployed elsewhere
 st.set_page_config(page_title="Admin Panel", layout="centered")
 st.title("🛠️ Smartflow Admin Panel")
 
+def fetch_rules():
+    """Current rules, re-downloaded only when the version changed (conditional GET)."""
+    headers = {}
+    if "rules" in st.session_state:
+        headers["If-None-Match"] = st.session_state["rules_etag"]
+    res = requests.get(f"{BASE_URL}/rules", headers=headers, timeout=10)
+    if res.status_code != 304:
+        st.session_state["rules"] = res.json()
+        st.session_state["rules_etag"] = res.headers.get("ETag", "")
+    return st.session_state["rules"]
+
+def wait_for_rules_change(timeout=30):
+    """Long-poll until another admin, an expiry or a scheduled window changes the rules; True if they changed."""
+    if "rules_etag" not in st.session_state:
+        fetch_rules()
+    res = requests.get(f"{BASE_URL}/rules/watch", params={"etag": st.session_state["rules_etag"], "timeout": timeout},
+                       timeout=timeout + 10)
+    data = res.json()
+    if data.get("changed"):
+        st.session_state["rules"] = data["rules"]
+        st.session_state["rules_etag"] = res.headers.get("ETag", "")
+    return data.get("changed", False)
+
 def show_response(resp, action_desc="Action"):
     if not resp:
         st.error("❌ No response received.")
@@ -28,25 +53,70 @@ def show_response(resp, action_desc="Action"):
         st.warning(f"⚠️ {action_desc} returned unexpected status: {status}")
         st.json(resp)
 
+def stream_command(command):
+    """Render each event from /execute/stream as it arrives; returns the final summary."""
+    summary = {}
+    progress = st.container()
+    with httpx.Client(timeout=None) as client:
+        with connect_sse(client, "POST", f"{BASE_URL}/execute/stream", params={"command": command}) as events:
+            for event in events.iter_sse():
+                data = event.json()
+                with progress:
+                    if event.event == "intent":
+                        st.caption("🧩 Parsed intent")
+                        st.json(data, expanded=False)
+                    elif event.event == "plan":
+                        planned = ", ".join(step["tool"] for step in data.get("steps", [])) or "none"
+                        st.caption(f"📋 Steps to run: {planned}")
+                    elif event.event == "invalid":
+                        st.error("❌ Nothing was run; fix these parameters first:")
+                        for error in data.get("errors", []):
+                            field = ".".join(str(part) for part in error.get("loc", [])[1:]) or "tool"
+                            st.markdown(f"- **{error.get('tool')}** `{field}`: {error.get('msg')}")
+                    elif event.event == "step":
+                        show_response(data.get("response", data), data.get("tool", "Step"))
+                    elif event.event == "summary":
+                        summary = data
+    return summary
+
+# --- Current Rules ---
+with st.expander("🧠 Current Business Rules"):
+    try:
+        if st.button("⏳ Wait for changes (30 s)") and not wait_for_rules_change():
+            st.info("No changes in the last 30 seconds.")
+        st.json(fetch_rules())
+    except Exception as e:
+        st.error(f"⚠️ Could not load rules: {str(e)}")
+
 # --- Command Input ---
 with st.form("admin_form"):
     st.subheader("Enter a command to change the workflow")
     command = st.text_area("Command (in plain English)", height=150, placeholder="E.g., Skip the confirmation step")
+    stream_progress = st.checkbox("Show progress as steps finish", value=True)
     submitted = st.form_submit_button("Send")
 
 if submitted and command:
-    response = requests.post(f"{BASE_URL}/execute", params={"command": command})
-    try:
-        data = response.json()
-    except ValueError:
-        st.error("❌ Backend did not return valid JSON. Raw response:")
-        st.code(response.text)
-        data = {}
-    except Exception as e:
-        st.error(f"⚠️ Error: {str(e)}")
-        data = {}
+    if stream_progress:
+        try:
+            data = stream_command(command)
+            status_code = 200
+        except Exception as e:
+            st.error(f"⚠️ Error: {str(e)}")
+            data, status_code = {}, 500
+    else:
+        response = requests.post(f"{BASE_URL}/execute", params={"command": command})
+        status_code = response.status_code
+        try:
+            data = response.json()
+        except ValueError:
+            st.error("❌ Backend did not return valid JSON. Raw response:")
+            st.code(response.text)
+            data = {}
+        except Exception as e:
+            st.error(f"⚠️ Error: {str(e)}")
+            data = {}
 
-    if response.status_code == 200:
+    if status_code == 200:
         st.success("✅ Command processed successfully!")
 
         # Show updated rules if any
@@ -84,7 +154,7 @@ if st.button("🔁 Reset Rules to Default"):
         if res.status_code == 200:
             st.success("✅ All rules reset to default!")
             st.subheader("🧠 Current Rules After Reset")
-            st.json(data)
+            st.json(fetch_rules())
         else:
             st.error("❌ Failed to reset rules.")
             st.json(data)
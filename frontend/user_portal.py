@@ -1,5 +1,7 @@
 import streamlit as st
 import requests
+import httpx
+from httpx_sse import connect_sse
 from datetime import date, datetime
 
 BASE_URL = "http://127.0.0.1:8000"  # or your deployed API URL
@@ -8,18 +10,38 @@ st.set_page_config(page_title="🎟️ Book Your Flight", layout="wide")
 
 st.title("🎟️ Smart Ticket Booking Portal")
 
+@st.cache_resource
+def get_session():
+    # One pooled keep-alive session per app process instead of a new connection per call
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+http = get_session()
+
 # --- Rules State Management ---
 def fetch_rules():
-    resp = requests.get(f"{BASE_URL}/rules")
+    """Conditional GET: returns True only if the rules changed since the cached copy."""
+    headers = {}
+    if st.session_state.get("rules_etag") and "rules" in st.session_state:
+        headers["If-None-Match"] = st.session_state["rules_etag"]
+    resp = http.get(f"{BASE_URL}/rules", headers=headers, timeout=10)
+    if resp.status_code == 304:
+        return False
     try:
-        return resp.json()
+        st.session_state["rules"] = resp.json()
     except ValueError:
         st.error("❌ Could not parse rules. Raw response:")
         st.code(resp.text)
-        return {}
+        st.session_state["rules"] = {}
+        return False
+    st.session_state["rules_etag"] = resp.headers.get("ETag")
+    return True
 
 if "rules" not in st.session_state:
-    st.session_state["rules"] = fetch_rules()
+    fetch_rules()
 
 rules = st.session_state["rules"]
 skip_steps = set(rules.get("skip_steps", []))
@@ -31,20 +53,33 @@ discount_config = rules.get("discount", {})
 with st.sidebar:
     st.header("📊 Booking Reports")
     if st.button("📝 View All Bookings"):
-        res = requests.get(f"{BASE_URL}/report")
-        try:
-            st.json(res.json())
-        except ValueError:
-            st.error("❌ Could not parse bookings. Raw response:")
-            st.code(res.text)
+        # Newest first, one page at a time
+        st.session_state["report_pages"] = []
+        st.session_state["report_cursor"] = None
+        st.session_state["report_open"] = True
+    if st.session_state.get("report_open"):
+        pages = st.session_state["report_pages"]
+        if not pages or (st.session_state["report_cursor"] and st.button("⬇️ Load more")):
+            params = {"order": "desc", "limit": 50}
+            if st.session_state["report_cursor"]:
+                params["cursor"] = st.session_state["report_cursor"]
+            res = http.get(f"{BASE_URL}/report", params=params, timeout=10)
+            try:
+                page = res.json()
+                pages.append(page.get("log", []))
+                st.session_state["report_cursor"] = page.get("next_cursor")
+            except ValueError:
+                st.error("❌ Could not parse bookings. Raw response:")
+                st.code(res.text)
+        st.json([entry for page in pages for entry in page])
     if st.button("🔄 Refresh Rules"):
-        st.session_state["rules"] = fetch_rules()
-        st.rerun()
+        if fetch_rules():
+            st.rerun()
 
-# --- After any admin action, re-fetch rules ---
+# --- After any action, pick up rules changed by an admin; only rerun if they did ---
 def update_rules_state():
-    st.session_state["rules"] = fetch_rules()
-    st.rerun()
+    if fetch_rules():
+        st.rerun()
 
 # --- Active Discount Notice ---
 discount_config = st.session_state["rules"].get("discount", {})
@@ -58,7 +93,8 @@ def show_response(resp, action_desc="Action"):
     if status in [
         "success", "upgraded", "confirmed", "sent", "recorded",
         "rescheduled", "insurance_added", "rewards_applied",
-        "seat_selected", "payment_success", "cancelled", "notified", "refunded"
+        "seat_selected", "payment_success", "cancelled", "notified", "refunded",
+        "granted", "applied"
     ]:
         st.success(f"✅ {action_desc} succeeded.")
         st.json(resp)
@@ -75,12 +111,26 @@ def show_response(resp, action_desc="Action"):
         st.warning(f"⚠️ {action_desc} returned unexpected status: {status}")
         st.json(resp)
 
+@st.cache_data(ttl=300)
+def fetch_tool_paths():
+    # Tool name (and alias) -> route, as declared by the backend
+    try:
+        tools = http.get(f"{BASE_URL}/tools", timeout=10).json().get("tools", [])
+    except (requests.exceptions.RequestException, ValueError):
+        return {}
+    paths = {}
+    for tool in tools:
+        for name in [tool["name"], *tool.get("aliases", [])]:
+            paths[name] = tool["path"]
+    return paths
+
 def call_tool(tool_name, payload):
     actual_tool = substitutions.get(tool_name, tool_name)
     if actual_tool in skip_steps:
         return {"status": "skipped by rule"}
+    path = fetch_tool_paths().get(actual_tool, f"/{actual_tool.replace('_', '-')}")
     try:
-        response = requests.post(f"{BASE_URL}/{actual_tool.replace('_', '-')}", json=payload, timeout=10)
+        response = http.post(f"{BASE_URL}{path}", json=payload, timeout=10)
         if response.status_code == 200:
             return response.json()
         else:
@@ -92,6 +142,31 @@ def call_tool(tool_name, payload):
     except Exception as e:
         return {"status": "error", "error": str(e)}
 
+def stream_command(command):
+    """Run a plain-English command and show each workflow step as soon as it finishes."""
+    with httpx.Client(timeout=None) as client:
+        with connect_sse(client, "POST", f"{BASE_URL}/execute/stream", params={"command": command}) as events:
+            for event in events.iter_sse():
+                data = event.json()
+                if event.event == "step":
+                    show_response(data.get("response", data), data.get("tool", "Step"))
+                elif event.event == "invalid":
+                    st.error("❌ Nothing was done, some details are missing or invalid:")
+                    for error in data.get("errors", []):
+                        st.markdown(f"- **{error.get('tool')}**: {error.get('msg')} ({'.'.join(map(str, error.get('loc', [])[1:])) or 'tool'})")
+                elif event.event == "summary" and "error" in data:
+                    show_response(data, "Command")
+
+# --- Quick Command ---
+with st.expander("⚡ Quick Command"):
+    with st.form("command_form"):
+        quick_command = st.text_input("What would you like to do?", placeholder="E.g., Book a flight from Delhi to Goa")
+        if st.form_submit_button("Run") and quick_command:
+            try:
+                stream_command(quick_command)
+            except Exception as e:
+                st.error(f"⚠️ Error: {str(e)}")
+
 # --- Search Flights ---
 if "search_flights" not in skip_steps:
     st.subheader("🔍 Search Flights")
@@ -131,51 +206,59 @@ if "book_ticket" not in skip_steps:
                 travel_date_str = travel_date[0].isoformat()
             else:
                 travel_date_str = str(travel_date)
-            ticket_resp = call_tool("book_ticket", {
-                "from_city": from_city,
-                "to_city": to_city,
-                "date": travel_date_str,
-                "traveler_name": traveler_name
-            })
-            ticket_id = ticket_resp.get("ticket_id")
+            # Booking and every selected extra in one request; rules are applied server-side
+            try:
+                response = http.post(f"{BASE_URL}/book-with-extras", json={
+                    "from_city": from_city,
+                    "to_city": to_city,
+                    "date": travel_date_str,
+                    "traveler_name": traveler_name,
+                    "seat_number": seat or None,
+                    "extra_kg": baggage_kg,
+                    "insurance_plan": insurance_plan,
+                    "class_type": class_type,
+                    "apply_discount": selected_discount != "None",
+                    "apply_rewards": ff_rewards,
+                    "contact_customer": contact_cust,
+                }, timeout=30)
+                booking = response.json()
+            except requests.exceptions.RequestException as e:
+                booking = {"status": "error", "error": str(e)}
+            except ValueError:
+                booking = {"status": "error", "error": f"HTTP {response.status_code}: {response.text}"}
+
+            ticket_id = booking.get("ticket_id")
             if ticket_id:
                 st.success(f"🎫 Ticket ID: {ticket_id}")
             else:
                 st.error("❌ Failed to book ticket.")
-            st.json(ticket_resp)
-
-            if ticket_id:
-                if baggage_kg > 0 and "baggage_upgrade" not in skip_steps:
-                    resp = call_tool("baggage_upgrade", {"ticket_id": ticket_id, "extra_kg": baggage_kg})
-                    show_response(resp, "Baggage Upgrade")
-
-                if seat and "select_seat" not in skip_steps:
-                    resp = call_tool("select_seat", {"ticket_id": ticket_id, "seat_number": seat})
-                    show_response(resp, "Seat Selection")
 
-                if insurance_plan != "None" and "add_insurance" not in skip_steps:
-                    resp = call_tool("add_insurance", {"ticket_id": ticket_id, "plan": insurance_plan})
-                    show_response(resp, "Insurance Addition")
-
-                if class_type == "business" and "priority_boarding" not in skip_steps:
-                    resp = call_tool("priority_boarding", {"ticket_id": ticket_id, "class_type": class_type})
-                    show_response(resp, "Priority Boarding")
-
-                if selected_discount != "None" and "apply_discount" not in skip_steps:
-                    resp = call_tool("apply_discount", {"ticket_id": ticket_id, "discount_code": selected_discount})
-                    show_response(resp, "Discount Application")
-
-                if ff_rewards and "apply_rewards" not in skip_steps:
-                    resp = call_tool("apply_rewards", {"ticket_id": ticket_id, "traveler_id": traveler_name})
-                    show_response(resp, "Frequent Flyer Rewards")
-
-                if contact_cust and "contact_customer" not in skip_steps:
-                    resp = call_tool("contact_customer", {"ticket_id": ticket_id})
-                    show_response(resp, "Contact Customer")
+            step_names = {
+                "book_ticket": "Booking",
+                "baggage_upgrade": "Baggage Upgrade",
+                "select_seat": "Seat Selection",
+                "add_insurance": "Insurance Addition",
+                "priority_boarding": "Priority Boarding",
+                "apply_rewards": "Frequent Flyer Rewards",
+                "contact_customer": "Contact Customer",
+            }
+            for step in booking.get("steps", []):
+                show_response(step.get("response", step), step_names.get(step["tool"], step["tool"]))
+            if booking.get("discount_eligibility"):
+                show_response(booking["discount_eligibility"], "Discount Eligibility")
+            for error in booking.get("errors", []):
+                field = ".".join(str(part) for part in error.get("loc", [])[1:])
+                st.error(f"❌ {error.get('tool')} {field}: {error.get('msg')}")
+            if "error" in booking:
+                show_response(booking, "Booking")
 
+            if ticket_id:
                 st.session_state["latest_ticket_id"] = ticket_id
                 st.session_state["payment_done"] = False
-                update_rules_state() # Refresh rules after booking
+            if "rules" in booking:
+                # The response carries the rules it was booked under; no re-fetch or rerun needed
+                st.session_state["rules"] = booking["rules"]
+                st.session_state["rules_etag"] = booking.get("rules_etag")
 
 # --- Payment & Confirmation ---
 if "latest_ticket_id" in st.session_state:
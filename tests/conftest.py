@@ -0,0 +1,36 @@
+import pytest
+
+from backend.utils import db
+
+
+@pytest.fixture
+def ticket_db(tmp_path, monkeypatch):
+    """Point the ticket store at a scratch SQLite file for one test."""
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "smartflow.db"))
+    return db
+
+
+@pytest.fixture
+def rules_file(tmp_path):
+    """Point the rules store at a scratch copy of the rules file for one test."""
+    from backend.utils.business_rules import rules_store
+
+    def point(path):
+        with rules_store._lock:
+            # The snapshot is kept, so versions keep counting up and never repeat with other rules
+            rules_store.path, rules_store._mtime, rules_store._checked_at = path, None, 0.0
+
+    original = rules_store.path
+    point(str(tmp_path / "business_rules.json"))
+    yield rules_store
+    point(original)
+
+
+@pytest.fixture
+def report_entries(monkeypatch):
+    """Collect workflow report entries in a list instead of the report log."""
+    from backend.apis import report
+
+    entries = []
+    monkeypatch.setattr(report.report_sink, "submit", entries.append)
+    return entries
@@ -0,0 +1,48 @@
+from fastapi.testclient import TestClient
+
+from backend.main import app
+
+client = TestClient(app)
+
+BOOKING = {"from_city": "Delhi", "to_city": "Goa", "date": "2025-08-12", "traveler_name": "Asha Rao"}
+
+
+def test_extras_run_against_the_booked_ticket(ticket_db, rules_file, report_entries):
+    rules_file.write({"discount": {"enabled": True, "amount_percent": 15, "expires_at": "2099-12-31T23:59:59"}})
+    response = client.post("/book-with-extras", json=dict(
+        BOOKING, seat_number="12A", extra_kg=5, insurance_plan="Basic", class_type="business",
+        apply_discount=True))
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "success"
+    ticket_id = body["ticket_id"]
+    steps = {step["tool"]: step for step in body["steps"]}
+    assert set(steps) == {"book_ticket", "baggage_upgrade", "select_seat", "add_insurance", "priority_boarding"}
+    assert all(step["status"] == "success" for step in steps.values())
+    assert steps["select_seat"]["response"]["ticket_id"] == ticket_id
+    assert steps["priority_boarding"]["response"]["status"] == "granted"
+
+    assert body["discount_eligibility"] == {
+        "status": "eligible", "ticket_id": ticket_id, "amount_percent": 15, "expires_at": "2099-12-31T23:59:59"}
+    # The rules the booking ran under come back, so the portal need not fetch /rules again
+    assert body["rules_version"] == rules_file.snapshot().version
+    assert body["rules"]["discount"]["amount_percent"] == 15
+
+
+def test_skipped_extras_are_reported(ticket_db, rules_file, report_entries):
+    rules_file.write({"skip_steps": ["select_seat"]})
+    body = client.post("/book-with-extras", json=dict(BOOKING, seat_number="12A", apply_discount=True)).json()
+    assert {"tool": "select_seat", "status": "skipped_by_rule",
+            "reason": "Skipped as per business rules"} in body["steps"]
+    assert body["discount_eligibility"]["status"] == "not_eligible"
+
+
+def test_invalid_extras_reject_the_booking_before_anything_runs(ticket_db, rules_file, report_entries):
+    # meal_preference needs a meal_type the seat step does not carry
+    rules_file.write({"tool_substitutions": {"select_seat": "meal_preference"}})
+    response = client.post("/book-with-extras", json=dict(BOOKING, seat_number="12A"))
+    assert response.status_code == 422
+    body = response.json()
+    assert body["status"] == "invalid_params" and body["steps"] == []
+    assert [(error["tool"], error["loc"]) for error in body["errors"]] == [("meal_preference", ["params", "meal_type"])]
+    assert ticket_db.find_tickets(traveler_name="Asha Rao") == []
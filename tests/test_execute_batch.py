@@ -0,0 +1,41 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from backend.main import app
+
+client = TestClient(app)
+
+BOOKING = {"intent": "book_ticket", "actions": [{"tool": "book_ticket", "params": {
+    "from_city": "Delhi", "to_city": "Goa", "date": "2025-08-12", "traveler_name": "Asha Rao"}}]}
+REFUND = {"intent": "refund_status", "actions": [{"tool": "refund_status", "params": {"ticket_id": "TKT1"}}]}
+
+
+def post_batch(body):
+    response = client.post("/execute/batch", json=body)
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    return response, [json.loads(line) for line in response.text.splitlines() if line]
+
+
+def test_one_line_per_item_with_its_index(ticket_db, rules_file, report_entries):
+    response, lines = post_batch({"items": [BOOKING, REFUND, BOOKING], "concurrency": 2})
+    assert response.status_code == 200
+    assert sorted(line["index"] for line in lines) == [0, 1, 2]
+    for line in lines:
+        assert line["input"]["intent"] == line["result"]["intent"]
+        assert [step["status"] for step in line["result"]["steps"]] == ["success"]
+    booked = {line["result"]["steps"][0]["response"]["ticket_id"] for line in lines if line["index"] != 1}
+    assert len(booked) == 2
+
+
+def test_a_bad_item_does_not_fail_the_batch(ticket_db, rules_file, report_entries):
+    bad = {"intent": "book_ticket", "actions": [{"tool": "book_ticket", "params": {"from_city": "Delhi"}}]}
+    _, lines = post_batch({"items": [bad, REFUND]})
+    results = {line["index"]: line["result"] for line in lines}
+    assert results[0]["status"] == "invalid_params"
+    assert results[1]["steps"][0]["status"] == "success"
+
+
+def test_batch_size_is_limited():
+    response = client.post("/execute/batch", json={"items": ["skip payment"] * 1001})
+    assert response.status_code == 422
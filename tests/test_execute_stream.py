@@ -0,0 +1,58 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.services import command_runner
+
+client = TestClient(app)
+
+BOOKING = {"intent": "book_ticket", "actions": [
+    {"tool": "book_ticket", "params": {
+        "from_city": "Delhi", "to_city": "Goa", "date": "2025-08-12", "traveler_name": "Asha Rao"}},
+    {"tool": "add_insurance", "params": {"plan": "basic"}},
+    {"tool": "select_seat", "params": {"seat_number": "12A"}},
+]}
+
+
+def events(command):
+    response = client.get("/execute/stream", params={"command": command})
+    assert response.headers["content-type"].startswith("text/event-stream")
+    parsed = []
+    for block in response.text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        parsed.append((lines["event"], json.loads(lines["data"])))
+    return parsed
+
+
+def test_workflow_events_arrive_in_order(monkeypatch, ticket_db, rules_file, report_entries):
+    async def parse(command):
+        return {**BOOKING, "actions": [dict(action) for action in BOOKING["actions"]]}
+
+    monkeypatch.setattr(command_runner, "cohere_to_structured_json_async", parse)
+    stream = events("Book Delhi to Goa with insurance and seat 12A")
+    names = [name for name, _ in stream]
+    assert names == ["intent", "plan", "step", "step", "step", "summary"]
+    # The booking finishes before the add-ons that need its ticket_id
+    steps = [data for name, data in stream if name == "step"]
+    assert steps[0]["tool"] == "book_ticket"
+    assert {step["index"] for step in steps} == {0, 1, 2}
+    summary = stream[-1][1]
+    assert [step["tool"] for step in summary["steps"]] == ["book_ticket", "add_insurance", "select_seat"]
+
+
+def test_rules_commands_stream_the_new_rules(rules_file):
+    stream = events("Skip seat selection")
+    assert [name for name, _ in stream] == ["intent", "rules", "summary"]
+    assert stream[1][1]["rules"]["skip_steps"] == ["select_seat"]
+    assert stream[2][1]["status"] == "rules updated"
+
+
+def test_invalid_plans_stream_the_errors(monkeypatch, rules_file, report_entries):
+    async def parse(command):
+        return {"intent": "book_ticket", "actions": [{"tool": "book_ticket", "params": {"from_city": "Delhi"}}]}
+
+    monkeypatch.setattr(command_runner, "cohere_to_structured_json_async", parse)
+    stream = events("Book something")
+    assert [name for name, _ in stream] == ["intent", "invalid", "summary"]
+    assert stream[-1][1]["status"] == "invalid_params"
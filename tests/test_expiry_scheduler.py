@@ -0,0 +1,90 @@
+import asyncio
+import time
+
+from backend.services.expiry_scheduler import ExpiryScheduler
+
+
+def test_next_expiry_follows_schedule_replace_and_cancel():
+    scheduler = ExpiryScheduler(persist=False)
+    scheduler.schedule("a", "hold", 300.0)
+    scheduler.schedule("b", "hold", 100.0)
+    scheduler.schedule("c", "hold", 200.0)
+    assert scheduler.next_expiry() == 100.0
+
+    # Rescheduling a key replaces its pending expiry
+    scheduler.schedule("b", "hold", 400.0)
+    assert scheduler.pending() == 3
+    assert scheduler.next_expiry() == 200.0
+
+    assert scheduler.cancel("c") is True
+    assert scheduler.cancel("c") is False
+    assert scheduler.next_expiry() == 300.0
+    assert scheduler.pending() == 2
+
+
+def test_pop_due_returns_live_entries_in_time_order():
+    scheduler = ExpiryScheduler(persist=False)
+    for key, when in (("late", 30.0), ("early", 10.0), ("middle", 20.0), ("gone", 15.0)):
+        scheduler.schedule(key, "hold", when)
+    scheduler.cancel("gone")
+
+    assert [entry[2] for entry in scheduler._pop_due(25.0)] == ["early", "middle"]
+    assert scheduler._pop_due(25.0) == []
+    assert [entry[2] for entry in scheduler._pop_due(30.0)] == ["late"]
+    assert scheduler.pending() == 0
+    assert scheduler.next_expiry() is None
+
+
+def test_running_scheduler_fires_handlers_when_due():
+    async def scenario():
+        fired = []
+        scheduler = ExpiryScheduler(persist=False)
+        scheduler.register("hold", lambda key, payload: fired.append((key, payload)))
+        await scheduler.start()
+        try:
+            scheduler.schedule("later", "hold", time.time() + 60, "never")
+            # Scheduling an earlier entry wakes the loop out of its long sleep
+            scheduler.schedule("soon", "hold", time.time() + 0.05, {"seat": "12A"})
+            for _ in range(100):
+                if fired:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await scheduler.stop()
+        return fired, scheduler.stats()
+
+    fired, stats = asyncio.run(scenario())
+    assert fired == [("soon", {"seat": "12A"})]
+    assert stats["expired"] == 1
+    assert stats["pending"] == 1
+    assert stats["running"] is False
+
+
+def test_failing_handlers_are_counted_and_do_not_stop_the_loop():
+    async def scenario():
+        fired = []
+
+        def on_expire(key, payload):
+            if key == "bad":
+                raise RuntimeError("boom")
+            fired.append(key)
+
+        scheduler = ExpiryScheduler(persist=False)
+        scheduler.register("hold", on_expire)
+        await scheduler.start()
+        try:
+            now = time.time()
+            scheduler.schedule("bad", "hold", now)
+            scheduler.schedule("good", "hold", now + 0.01)
+            for _ in range(100):
+                if fired:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await scheduler.stop()
+        return fired, scheduler
+
+    fired, scheduler = asyncio.run(scenario())
+    assert fired == ["good"]
+    assert scheduler.failures == 1
+    assert scheduler.expired == 1
@@ -0,0 +1,14 @@
+import pytest
+
+from backend.utils.flight_schedule import check_clock
+
+
+@pytest.mark.parametrize("value", ["00:00", "9:30", "09:30", "23:59", " 18:05 "])
+def test_valid_times(value):
+    assert check_clock(value) == value.strip()
+
+
+@pytest.mark.parametrize("value", ["25:99", "24:00", "12:60", "abc", "9:3", "0930", "", "12:30:00"])
+def test_malformed_times_are_rejected(value):
+    with pytest.raises(ValueError):
+        check_clock(value)
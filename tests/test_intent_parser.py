@@ -0,0 +1,94 @@
+from datetime import datetime
+
+import pytest
+
+from backend.services.cohere_client import FAST_PATH_MIN_CONFIDENCE
+from backend.services.intent_parser import parse_command
+
+NOW = datetime(2025, 7, 10, 12, 0, 0)
+
+
+def fast(command):
+    result = parse_command(command, now=NOW)
+    return result.structured if result.confidence >= FAST_PATH_MIN_CONFIDENCE else None
+
+
+@pytest.mark.parametrize("command", [
+    "Book a ticket from Delhi to Goa and always add travel insurance",
+    "Book a flight from Mumbai to Pune on 12 August without insurance",
+    "Book a flight to Goa for Ravi and apply my 10% discount",
+    "Cancel ticket TKT1 and do not send an email",
+    "Reschedule TKT1 to 20 July and skip the seat selection",
+    "Cancel my booking and skip the confirmation email",
+    "Check my ticket TKTA1B2C3 and always contact the customer",
+    "Pay for ticket TKT9F2 and skip the meal preference",
+    "From Delhi to Goa, skip payment",
+    "Use my discount of 15% on this trip",
+])
+def test_workflow_requests_never_take_the_fast_path(command):
+    result = parse_command(command, now=NOW)
+    assert result.confidence < FAST_PATH_MIN_CONFIDENCE
+    assert result.structured is None
+
+
+@pytest.mark.parametrize("command, expected", [
+    ("Stop sending confirmation emails", {"skip_steps": ["send_email"]}),
+    ("Don't process payments anymore", {"skip_steps": ["process_payment"]}),
+    ("Skip seat selection and meal preference", {"skip_steps": ["select_seat", "meal_preference"]}),
+    ("Always add travel insurance", {"force_steps": ["add_insurance"]}),
+    ("Every booking must include priority boarding", {"force_steps": ["priority_boarding"]}),
+    ("Always contact the customer", {"force_steps": ["contact_customer"]}),
+    ("Skip rescheduling", {"skip_steps": ["reschedule_ticket"]}),
+])
+def test_admin_step_commands(command, expected):
+    assert fast(command) == expected
+
+
+def test_admin_discount():
+    assert fast("Apply a 15% discount until end of this month") == {"discount": {
+        "enabled": True, "amount_percent": 15, "expires_at": "2025-07-31T23:59:59"}}
+
+
+def test_admin_discount_disable():
+    assert fast("Disable the discount")["discount"]["enabled"] is False
+
+
+@pytest.mark.parametrize("command", [
+    "Remove the 10% discount",
+    "Stop the 20% discount",
+    "Disable the 15% discount",
+    "No more 5% discount",
+])
+def test_disabling_a_quoted_discount_turns_it_off(command):
+    assert fast(command)["discount"]["enabled"] is False
+
+
+@pytest.mark.parametrize("command", [
+    "Do not skip payment",
+    "Stop skipping payment",
+    "Never skip the seat selection",
+    "No need to skip payment",
+    "Don't stop sending emails",
+    "Stop forcing insurance",
+    "Stop requiring priority boarding",
+    "Do not always add insurance",
+    "Don't disable the discount",
+])
+def test_negated_commands_go_to_the_llm(command):
+    assert fast(command) is None
+
+
+def test_admin_reset():
+    assert fast("Reset all rules") == {
+        "skip_steps": [], "force_steps": [], "tool_substitutions": {},
+        "discount": {"enabled": False, "amount_percent": 0, "expires_at": "2025-07-10T12:00:00"},
+    }
+
+
+@pytest.mark.parametrize("command", [
+    "Skip payment if the customer is a VIP",
+    "Always send email but skip payment",
+    "Do something nice for customers",
+])
+def test_unclear_admin_commands_go_to_the_llm(command):
+    assert fast(command) is None
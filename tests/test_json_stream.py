@@ -0,0 +1,108 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from backend.services.json_stream import JsonObjectScanner, extract_json
+from backend.services.llm_client import StubLLMClient, _astream_json, _stream_json
+
+ANSWER = 'Sure! Here is the rule: {"skip_steps": ["send_email"], "note": "a } in a \\"string\\" {"} hope it helps'
+
+
+def feed_in_pieces(text, size):
+    scanner = JsonObjectScanner()
+    for i in range(0, len(text), size):
+        if scanner.feed(text[i:i + size]):
+            break
+    return scanner
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, 1000])
+def test_finds_the_object_however_the_text_is_split(size):
+    scanner = feed_in_pieces(ANSWER, size)
+    assert scanner.result == {"skip_steps": ["send_email"], "note": 'a } in a "string" {'}
+    start, end = scanner.span
+    assert scanner.text[start:end].startswith('{"skip_steps"') and scanner.text[end - 1] == "}"
+
+
+@pytest.mark.parametrize("size", [1, 3, 1000])
+def test_skips_braces_in_prose_that_are_not_json(size):
+    text = 'Use {placeholder} or {see {"discount": {"enabled": false}} below}'
+    assert feed_in_pieces(text, size).result == {"discount": {"enabled": False}}
+
+
+def test_stops_reading_once_the_object_is_complete():
+    scanner = JsonObjectScanner()
+    assert scanner.feed('{"a": 1}')
+    assert scanner.feed("ignored") and scanner.text == '{"a": 1}'
+
+
+def test_incomplete_object_is_not_a_result():
+    scanner = feed_in_pieces('{"skip_steps": ["send_', 4)
+    assert not scanner.done and scanner.result is None
+
+
+def test_long_streams_scan_in_linear_time():
+    text = "x" * 1_000_000 + '{"ok": true}'
+    started = time.perf_counter()
+    assert feed_in_pieces(text, 1).result == {"ok": True}
+    # About a second; copying the whole buffer on every one-character chunk took about 25
+    assert time.perf_counter() - started < 10
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"a": 1}', {"a": 1}),
+    ('```json\n{"a": 1}\n```', {"a": 1}),
+    ('Intro {not json} then ```\n{"a": 2}\n``` done', {"a": 2}),
+    ('The answer is {"a": 3}.', {"a": 3}),
+    ("no object here", None),
+    ("[1, 2]", None),
+])
+def test_extract_json(text, expected):
+    assert extract_json(text) == expected
+
+
+class Upstream:
+    """A token stream that records how far it was read and whether it was closed."""
+
+    def __init__(self, text, size=4):
+        self.pieces = [text[i:i + size] for i in range(0, len(text), size)]
+        self.read = 0
+        self.closed = False
+
+    def __iter__(self):
+        try:
+            for piece in self.pieces:
+                self.read += 1
+                yield piece
+        finally:
+            self.closed = True
+
+    async def aiter(self):
+        try:
+            for piece in self.pieces:
+                self.read += 1
+                yield piece
+        finally:
+            self.closed = True
+
+
+def test_streamed_completion_closes_the_stream_once_the_object_is_complete():
+    upstream = Upstream(ANSWER)
+    text = _stream_json(StubLLMClient(), iter(upstream))
+    assert json.loads(text) == {"skip_steps": ["send_email"], "note": 'a } in a "string" {'}
+    assert upstream.closed and upstream.read < len(upstream.pieces)
+
+
+def test_streamed_completion_without_an_object_reads_to_the_end():
+    upstream = Upstream("  no json here  ")
+    chunks = upstream.aiter()
+    assert asyncio.run(_astream_json(StubLLMClient(), chunks)) == "no json here"
+    assert upstream.closed and upstream.read == len(upstream.pieces)
+
+
+def test_stub_client_streams_the_same_answer_it_completes():
+    client = StubLLMClient()
+    message = "Skip the confirmation email"
+    assert client.complete_json(message, "", 100, 0) == client.complete(message, "", 100, 0)
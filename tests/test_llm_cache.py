@@ -0,0 +1,45 @@
+import asyncio
+import time
+
+from backend.services.llm_cache import LLMCache
+
+
+def test_key_ignores_case_spacing_and_punctuation():
+    assert LLMCache.make_key("Skip  payment!", "p", "m") == LLMCache.make_key("skip payment", "p", "m")
+    assert LLMCache.make_key("skip payment", "p", "m") != LLMCache.make_key("skip payment", "other prompt", "m")
+
+
+def test_lru_evicts_the_oldest_entry():
+    cache = LLMCache(max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1" and cache.get("c") == "3"
+    assert cache.evictions == 1
+
+
+def test_entries_expire_after_the_ttl():
+    cache = LLMCache(ttl=0.0)
+    cache.set("a", "1")
+    assert cache.get("a") is None
+
+
+def test_persistent_tier_survives_a_restart(tmp_path):
+    path = str(tmp_path / "llm.db")
+    asyncio.run(LLMCache(path=path).set_async("a", '{"skip_steps": []}'))
+    restarted = LLMCache(path=path)
+    assert asyncio.run(restarted.get_async("a")) == '{"skip_steps": []}'
+    assert restarted.disk_hits == 1
+    # Now in memory
+    assert restarted.get("a") == '{"skip_steps": []}' and restarted.hits == 1
+
+
+def test_sweep_deletes_expired_rows_only_when_due(tmp_path):
+    cache = LLMCache(ttl=10.0, path=str(tmp_path / "llm.db"), sweep_interval=60.0)
+    cache.set("old", "1")
+    sweeps = cache.sweeps
+    cache.set("new", "2")
+    assert cache.sweeps == sweeps  # not due yet
+    assert cache.sweep(now=time.time() + 100.0) == 2
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from backend.services.llm_client import LLMGateway, StubLLMClient
+
+
+class CountingClient(StubLLMClient):
+    """Stub model that records how many calls are upstream at once."""
+
+    def __init__(self, latency=0.02):
+        super().__init__(latency)
+        self.running = 0
+        self.peak = 0
+        self.preambles = []
+
+    async def acomplete(self, message, preamble, max_tokens, temperature):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        self.preambles.append(preamble)
+        try:
+            return await super().acomplete(message, preamble, max_tokens, temperature)
+        finally:
+            self.running -= 1
+
+
+def ask(gateway, key, message="skip payment", preamble="p"):
+    return gateway.complete(key, message, preamble, max_tokens=64, temperature=0.0)
+
+
+def test_identical_requests_share_one_upstream_call():
+    client = CountingClient()
+    gateway = LLMGateway(client)
+    built = []
+
+    def preamble():
+        built.append(1)
+        return "examples"
+
+    async def scenario():
+        return await asyncio.gather(*(ask(gateway, "same", preamble=preamble) for _ in range(10)))
+
+    answers = asyncio.run(scenario())
+    assert len(set(answers)) == 1
+    assert gateway.upstream_calls == 1 and gateway.shared_calls == 9
+    assert built == [1] and client.preambles == ["examples"]
+    assert gateway.stats()["in_flight"] == 0
+
+
+def test_upstream_concurrency_is_capped():
+    client = CountingClient()
+    gateway = LLMGateway(client, max_concurrency=3)
+
+    async def scenario():
+        await asyncio.gather(*(ask(gateway, f"key-{i}") for i in range(10)))
+
+    asyncio.run(scenario())
+    assert gateway.upstream_calls == 10 and client.peak == 3
+
+
+def test_a_cancelled_caller_does_not_cancel_the_shared_call():
+    gateway = LLMGateway(CountingClient(latency=0.05))
+
+    async def scenario():
+        first = asyncio.ensure_future(ask(gateway, "same"))
+        second = asyncio.ensure_future(ask(gateway, "same"))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(scenario()) == '{"skip_steps": ["process_payment"]}'
+
+
+def test_client_is_created_on_first_use_and_loops_can_change():
+    created = []
+    gateway = LLMGateway(lambda: created.append(1) or StubLLMClient())
+    assert created == [] and gateway.stats()["model"] is None
+    asyncio.run(ask(gateway, "a"))
+    asyncio.run(ask(gateway, "a"))  # a second event loop, as in tests and scripts
+    assert created == [1] and gateway.upstream_calls == 2
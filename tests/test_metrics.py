@@ -0,0 +1,65 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.utils.metrics import Registry
+
+
+def test_counters_render_one_line_per_label_set():
+    registry = Registry()
+    calls = registry.counter("test_calls_total", "Calls", ["tool", "status"])
+    calls.labels("book_ticket", "ok").inc()
+    calls.labels("book_ticket", "ok").inc(2)
+    calls.labels("payment", "error").inc()
+
+    text = registry.render()
+    assert "# TYPE test_calls_total counter" in text
+    assert 'test_calls_total{tool="book_ticket",status="ok"} 3' in text
+    assert 'test_calls_total{tool="payment",status="error"} 1' in text
+
+
+def test_wrong_label_count_is_rejected():
+    registry = Registry()
+    calls = registry.counter("test_calls_total", "Calls", ["tool"])
+    with pytest.raises(ValueError):
+        calls.labels("book_ticket", "extra")
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    latency = registry.histogram("test_seconds", "Latency", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        latency.observe(value)
+
+    lines = registry.render().splitlines()
+    assert 'test_seconds_bucket{le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{le="1"} 3' in lines
+    assert 'test_seconds_bucket{le="+Inf"} 4' in lines
+    assert "test_seconds_sum 4.25" in lines
+    assert "test_seconds_count 4" in lines
+
+
+def test_callbacks_are_read_at_scrape_time_and_skip_failures():
+    registry = Registry()
+    backlog = {"value": 2}
+    registry.callback("test_backlog", "Backlog", lambda: {(): backlog["value"]})
+    registry.callback("test_broken", "Broken", lambda: 1 / 0)
+
+    assert "test_backlog 2" in registry.render()
+    backlog["value"] = 5
+    text = registry.render()
+    assert "test_backlog 5" in text
+    assert "test_broken" not in text
+
+
+def test_registering_a_name_twice_returns_the_existing_metric():
+    registry = Registry()
+    first = registry.counter("test_calls_total", "Calls")
+    assert registry.counter("test_calls_total", "Calls") is first
+
+
+def test_metrics_endpoint_serves_the_exposition_format():
+    response = TestClient(app).get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE smartflow_tool_call_seconds histogram" in response.text
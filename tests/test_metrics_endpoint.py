@@ -0,0 +1,12 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from backend.main import app, record_startup_time
+
+
+def test_startup_phases_are_exported():
+    asyncio.run(record_startup_time())
+    text = TestClient(app).get("/metrics").text
+    for phase in ("import", "tool_discovery", "ready"):
+        assert f'smartflow_startup_seconds{{phase="{phase}"}}' in text
@@ -0,0 +1,61 @@
+import asyncio
+import itertools
+
+from backend.services import workflow_manager
+from backend.services.param_validation import ParamValidator
+from backend.services.tool_registry import tool_registry
+from backend.utils.business_rules import RulesSnapshot
+from backend.utils.models import Action, IntentResponse
+
+_versions = itertools.count(20_000)
+
+
+def test_missing_and_mistyped_fields_are_reported():
+    validator = ParamValidator(tool_registry)
+    params, errors = validator.validate("baggage_upgrade", {"ticket_id": "TKT1", "extra_kg": "lots"})
+    assert [error["loc"] for error in errors] == [["params", "extra_kg"]]
+    _, errors = validator.validate("select_seat", {})
+    assert sorted(error["loc"][-1] for error in errors) == ["seat_number", "ticket_id"]
+
+
+def test_fields_produced_earlier_may_be_omitted():
+    validator = ParamValidator(tool_registry)
+    params, errors = validator.validate("select_seat", {"seat_number": "12A"}, frozenset({"ticket_id"}))
+    assert errors == [] and params == {"seat_number": "12A"}
+    # Numbers the LLM sends for text fields are accepted, other values are coerced by the model
+    params, errors = validator.validate("baggage_upgrade", {"ticket_id": 42, "extra_kg": "5"})
+    assert errors == [] and params == {"ticket_id": "42", "extra_kg": 5}
+
+
+def test_relaxed_models_are_built_once_per_shape():
+    validator = ParamValidator(tool_registry)
+    first = validator.model_for("select_seat", frozenset({"ticket_id"}))
+    assert validator.model_for("select_seat", frozenset({"ticket_id"})) is first
+    assert validator.model_for("process_payment", frozenset()) is validator.model_for("payment", frozenset())
+    assert validator.model_for("select_seat").model is tool_registry.get("select_seat").body_model
+    assert validator.stats()["compiled_models"] == 3
+
+
+def test_an_invalid_step_rejects_the_plan_before_anything_runs(monkeypatch):
+    calls = []
+
+    class Dispatcher:
+        async def post(self, endpoint, params):
+            calls.append(endpoint)
+
+    submitted = []
+    monkeypatch.setattr(workflow_manager._Dispatchers, "for_tool", lambda self, tool, endpoint: Dispatcher())
+    monkeypatch.setattr(workflow_manager.report.report_sink, "submit", submitted.append)
+    intent = IntentResponse(intent="book_ticket", actions=[
+        Action(tool="book_ticket", params={
+            "from_city": "Delhi", "to_city": "Goa", "date": "2025-08-12", "traveler_name": "Asha"}),
+        Action(tool="baggage_upgrade", params={"extra_kg": "lots"}),
+        Action(tool="teleport", params={}),
+    ])
+    result = asyncio.run(workflow_manager.execute_workflow(intent, rules=RulesSnapshot(next(_versions), {})))
+
+    assert result["status"] == "invalid_params" and result["steps"] == []
+    assert [(error["step"], error["tool"], error["loc"][-1]) for error in result["errors"]] == [
+        (1, "baggage_upgrade", "extra_kg"), (2, "teleport", "tool")]
+    assert calls == []
+    assert [entry["status"] for entry in submitted] == ["invalid_params"]
@@ -0,0 +1,29 @@
+from backend.services.prompt_builder import PromptBuilder, make_example
+
+
+def builder(**kwargs):
+    examples = [
+        make_example("skip-payment", "Book without paying", {"skip_steps": ["process_payment"]}),
+        make_example("skip-email", "Stop sending confirmation emails", {"skip_steps": ["send_email"]}),
+        make_example("force-insurance", "Always add travel insurance", {"force_steps": ["add_insurance"]}),
+        make_example("discount", "Give 10% off this week", {"discount": {"enabled": True, "amount_percent": 10}}),
+    ]
+    return PromptBuilder("Convert the command to JSON.", examples, **kwargs)
+
+
+def test_most_similar_example_is_last():
+    prompt = builder(k=2).build("please stop the confirmation emails")
+    assert prompt.examples[-1] == "skip-email" and len(prompt.examples) == 2
+
+
+def test_token_budget_limits_examples():
+    small = builder(k=4, token_budget=builder().header_tokens + 30)
+    assert len(small.select("add insurance")) == 1
+
+
+def test_savings_are_measured_against_the_baseline_prompt():
+    prompts = builder(k=1, baseline_examples=2)
+    built = prompts.build("always add insurance")
+    stats = prompts.stats()
+    assert stats["baseline_prompt_tokens"] == prompts.baseline_tokens < prompts.full_tokens
+    assert stats["tokens_saved"] == prompts.baseline_tokens - built.tokens
@@ -0,0 +1,87 @@
+import asyncio
+import time
+
+from backend.services.report_sink import ReportSink
+from backend.services.report_store import ReportStore
+
+
+def make_store(tmp_path, **kwargs):
+    return ReportStore(str(tmp_path / "report_log"), **kwargs)
+
+
+def test_entries_keep_their_submit_time(tmp_path, monkeypatch):
+    store = make_store(tmp_path)
+    sink = ReportSink(store.append, batch_size=100)
+    clock = iter([1000.0, 1001.0, 1002.0, 5000.0])
+    monkeypatch.setattr(time, "time", lambda: next(clock))
+    for tool in ("book_ticket", "send_email", "process_payment"):
+        sink.submit({"tool": tool, "status": "success"})
+    sink.flush()  # takes the fourth clock reading
+    monkeypatch.undo()
+
+    assert [row["ts"] for row in store.query(fields=["ts"])["entries"]] == [1000.0, 1001.0, 1002.0]
+    assert [row["tool"] for row in store.query(since=1000.5, until=1001.5, fields=["tool"])["entries"]] == ["send_email"]
+
+
+def test_pages_cover_the_tail_and_sealed_segments(tmp_path):
+    store = make_store(tmp_path, segment_rows=4)
+    store.append([{"tool": f"t{i % 2}", "status": "success", "i": i} for i in range(10)])
+    assert store.stats()["segments"] >= 1
+
+    seen, cursor = [], None
+    while True:
+        page = store.query(cursor=cursor, limit=3)
+        seen += [row["i"] for row in page["entries"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == list(range(10))
+
+    newest = store.query(limit=2, descending=True)["entries"]
+    assert [row["i"] for row in newest] == [9, 8]
+    assert {row["i"] for row in store.query(tool="t1", limit=100)["entries"]} == {1, 3, 5, 7, 9}
+
+
+def test_sink_puts_a_failed_batch_back(tmp_path):
+    calls = []
+
+    def flaky(entries, timestamps):
+        calls.append(len(entries))
+        if len(calls) == 1:
+            raise OSError("disk full")
+
+    sink = ReportSink(flaky, batch_size=10)
+    sink.submit({"tool": "a"})
+    sink.submit({"tool": "b"})
+    assert sink.flush() == 0 and sink.stats()["backlog"] == 2
+    assert sink.flush() == 2 and calls == [2, 2]
+
+
+def test_background_flusher_writes_by_size_and_by_interval():
+    batches = []
+
+    async def scenario():
+        sink = ReportSink(lambda entries, timestamps: batches.append(len(entries)), batch_size=3, flush_interval=0.05)
+        await sink.start()
+        for i in range(3):
+            sink.submit({"i": i})       # a full batch wakes the flusher
+        assert batches == []            # submit itself never writes while the flusher runs
+        await asyncio.sleep(0.02)
+        sink.submit({"i": 3})           # flushed by the interval
+        await asyncio.sleep(0.1)
+        sink.submit({"i": 4})
+        await sink.stop()               # and the rest at shutdown
+        return sink.stats()
+
+    stats = asyncio.run(scenario())
+    assert batches == [3, 1, 1]
+    assert stats["flushed"] == stats["submitted"] == 5 and not stats["running"]
+
+
+def test_full_backlog_drops_the_oldest_entries():
+    written = []
+    sink = ReportSink(lambda entries, timestamps: written.extend(entries), batch_size=100, max_backlog=2)
+    for i in range(4):
+        sink.submit({"i": i})
+    sink.flush()
+    assert written == [{"i": 2}, {"i": 3}] and sink.stats()["dropped"] == 2
@@ -0,0 +1,52 @@
+from backend.services.rule_plan import RulePlanCache
+from backend.utils.business_rules import RulesSnapshot
+
+ENDPOINTS = {"book_ticket": "/book-ticket", "send_email": "/send-email", "contact_customer": "/contact-customer",
+             "add_insurance": "/add-insurance", "payment": "/process-payment"}
+ALIASES = {"process_payment": "payment"}
+
+
+def cache(**kwargs):
+    return RulePlanCache(ENDPOINTS, {"book_ticket": {"from": "from_city"}}, canonical=lambda t: ALIASES.get(t, t),
+                         **kwargs)
+
+
+def test_plan_applies_skip_force_and_substitution():
+    plan = cache().get(RulesSnapshot(1, {
+        "skip_steps": ["process_payment"],
+        "force_steps": ["add_insurance"],
+        "tool_substitutions": {"send_email": "contact_customer"},
+    }))
+    steps = plan.steps_for(("book_ticket", "payment", "send_email"))
+    assert steps.skipped == ("payment",)
+    assert [(s.tool, s.source_index, s.endpoint) for s in steps.steps] == [
+        ("book_ticket", 0, "/book-ticket"),
+        ("contact_customer", 2, "/contact-customer"),
+        ("add_insurance", None, "/add-insurance"),
+    ]
+    assert steps.steps[0].param_map == {"from": "from_city"}
+
+
+def test_older_snapshot_does_not_evict_the_current_plan():
+    plans = cache()
+    old, new = RulesSnapshot(1, {}), RulesSnapshot(2, {"skip_steps": ["send_email"]})
+    old_plan, new_plan = plans.get(old), plans.get(new)
+    # A batch on the old version and live requests on the new one alternate
+    for _ in range(3):
+        assert plans.get(old) is old_plan
+        assert plans.get(new) is new_plan
+
+
+def test_windows_get_their_own_plan():
+    plans = cache()
+    weekday, weekend = RulesSnapshot(3, {}), RulesSnapshot(3, {"skip_steps": ["payment"]}, "weekend")
+    assert plans.get(weekday) is not plans.get(weekend)
+    assert plans.get(weekday) is plans.get(RulesSnapshot(3, {}))
+
+
+def test_only_the_most_recent_plans_are_kept():
+    plans = cache(max_plans=2)
+    first = plans.get(RulesSnapshot(1, {}))
+    plans.get(RulesSnapshot(2, {}))
+    plans.get(RulesSnapshot(3, {}))
+    assert plans.get(RulesSnapshot(1, {})) is not first
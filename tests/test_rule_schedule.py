@@ -0,0 +1,93 @@
+from datetime import datetime
+
+from backend.utils.business_rules import RulesResolver, RulesStore
+from backend.utils.rule_schedule import DISCOUNT_EXPIRED, ActivationTimeline, merge_rules, parse_windows
+
+
+def at(text):
+    return datetime.fromisoformat(text).timestamp()
+
+
+# 2025-06-02 is a Monday
+MONDAY = at("2025-06-02T00:00:00")
+WEEK_LATER = at("2025-06-09T00:00:00")
+
+WINDOWS = [
+    {"id": "weekend", "recurring": {"weekdays": ["sat", "sun"]},
+     "rules": {"discount": {"enabled": True, "amount_percent": 15}}},
+    {"id": "night", "recurring": {"from": "22:00", "to": "06:00"}, "rules": {"skip_steps": ["contact_customer"]}},
+    {"id": "sale", "starts_at": "2025-06-04T12:00:00", "ends_at": "2025-06-05T12:00:00",
+     "rules": {"skip_steps": ["send_email"]}},
+]
+
+
+def test_malformed_windows_are_skipped():
+    windows = parse_windows(WINDOWS + [{"id": "bad", "recurring": {"weekdays": ["someday"]}},
+                                       {"id": "late", "recurring": {"from": "25:00"}}])
+    assert [window.id for window in windows] == ["weekend", "night", "sale"]
+    assert windows[0].weekdays == {5, 6} and windows[1].daily == (22 * 60, 6 * 60)
+
+
+def test_timeline_lists_each_change_of_the_active_set():
+    timeline = ActivationTimeline(parse_windows(WINDOWS), MONDAY, WEEK_LATER)
+
+    def active(text):
+        return timeline.active[timeline.index(at(text))]
+
+    assert active("2025-06-02T03:00:00") == ("night",)      # Sunday night runs past midnight
+    assert active("2025-06-02T12:00:00") == ()
+    assert active("2025-06-04T23:00:00") == ("night", "sale")
+    assert active("2025-06-07T23:30:00") == ("weekend", "night")
+    assert active("2025-06-08T10:00:00") == ("weekend",)
+    # Consecutive entries always differ, so every boundary is a real change
+    assert all(a != b for a, b in zip(timeline.active, timeline.active[1:]))
+    assert timeline.times == sorted(timeline.times)
+
+
+def test_next_boundary_and_coverage():
+    timeline = ActivationTimeline(parse_windows(WINDOWS), MONDAY, WEEK_LATER)
+    index = timeline.index(at("2025-06-02T12:00:00"))
+    assert timeline.next_boundary(index) == at("2025-06-02T22:00:00")
+    assert timeline.next_boundary(timeline.transitions() - 1) == WEEK_LATER
+    assert timeline.covers(MONDAY) and not timeline.covers(WEEK_LATER)
+
+
+def test_discount_expiry_is_a_boundary():
+    expires = at("2025-06-03T09:00:00")
+    timeline = ActivationTimeline([], MONDAY, WEEK_LATER, discount_expires_at=expires)
+    assert timeline.times == [MONDAY, expires]
+    assert timeline.active == [(), (DISCOUNT_EXPIRED,)]
+
+
+def test_overlays_union_step_lists_and_merge_mappings():
+    base = {"skip_steps": ["send_email"], "discount": {"enabled": False, "amount_percent": 5},
+            "scheduled_rules": WINDOWS}
+    merged = merge_rules(base, [{"skip_steps": ["send_email", "select_seat"]}, {"discount": {"enabled": True}}])
+    assert merged == {"skip_steps": ["send_email", "select_seat"],
+                      "discount": {"enabled": True, "amount_percent": 5}}
+
+
+def test_resolver_applies_the_windows_open_at_each_time(tmp_path):
+    store = RulesStore(str(tmp_path / "business_rules.json"))
+    store.write({"skip_steps": [], "discount": {"enabled": True, "amount_percent": 5,
+                                                "expires_at": "2025-06-06T00:00:00"},
+                 "scheduled_rules": WINDOWS})
+    resolver = RulesResolver(store)
+    published = []
+    resolver.add_listener(published.append)
+
+    monday = resolver.snapshot(at("2025-06-02T12:00:00"))
+    assert monday.window == "" and monday.rules["discount"]["enabled"] is True
+    assert resolver.next_change() == at("2025-06-02T22:00:00")
+    # Within the same span the resolved snapshot is reused
+    assert resolver.snapshot(at("2025-06-02T13:00:00")) is monday
+
+    sale_night = resolver.snapshot(at("2025-06-04T23:00:00"))
+    assert sale_night.window == "night,sale"
+    assert list(sale_night.rules["skip_steps"]) == ["contact_customer", "send_email"]
+
+    saturday = resolver.snapshot(at("2025-06-07T12:00:00"))
+    assert saturday.window == f"weekend,{DISCOUNT_EXPIRED}"
+    # The window's discount is laid over the expired base discount
+    assert saturday.rules["discount"]["enabled"] is True and saturday.rules["discount"]["amount_percent"] == 15
+    assert [snapshot.window for snapshot in published] == ["", "night,sale", f"weekend,{DISCOUNT_EXPIRED}"]
@@ -0,0 +1,56 @@
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.utils.business_rules import update_rules
+
+client = TestClient(app)
+
+
+def test_unchanged_rules_answer_304(rules_file):
+    first = client.get("/rules")
+    etag = first.headers["ETag"]
+    assert first.status_code == 200 and first.headers["X-Rules-Version"] == str(rules_file.snapshot().version)
+
+    cached = client.get("/rules", headers={"If-None-Match": etag})
+    assert cached.status_code == 304 and cached.content == b"" and cached.headers["ETag"] == etag
+    assert client.get("/rules", headers={"If-None-Match": f'"other", W/{etag}'}).status_code == 304
+
+    client.post("/rules/update", json={"skip_steps": ["send_email"]})
+    changed = client.get("/rules", headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["ETag"] != etag
+    assert changed.json()["skip_steps"] == ["send_email"]
+
+
+def test_watch_returns_at_once_for_stale_clients(rules_file):
+    version = client.post("/rules/update", json={"skip_steps": ["send_email"]}).json()["version"]
+    body = client.get("/rules/watch", params={"version": version - 1, "timeout": 5}).json()
+    assert body["changed"] is True and body["version"] == version
+    assert body["rules"]["skip_steps"] == ["send_email"]
+
+
+def test_watch_times_out_when_nothing_changes(rules_file):
+    etag = client.get("/rules").headers["ETag"]
+    started = time.perf_counter()
+    response = client.get("/rules/watch", params={"etag": etag.strip('"'), "timeout": 0.1})
+    assert response.json()["changed"] is False and response.headers["ETag"] == etag
+    assert time.perf_counter() - started < 2
+
+
+def test_watch_wakes_up_on_a_write(rules_file):
+    version = rules_file.snapshot().version
+    writer = threading.Timer(0.1, update_rules, args=({"force_steps": ["send_email"]},))
+    writer.start()
+    started = time.perf_counter()
+    body = client.get("/rules/watch", params={"version": version, "timeout": 10}).json()
+    writer.join()
+    # Woken by the write, well before the re-check interval
+    assert time.perf_counter() - started < 1.5
+    assert body["changed"] is True and body["version"] == version + 1
+    assert body["rules"]["force_steps"] == ["send_email"]
+
+
+def test_watch_needs_etag_or_version():
+    assert client.get("/rules/watch").status_code == 422
@@ -0,0 +1,77 @@
+import json
+import os
+import stat
+import threading
+
+from backend.utils import business_rules
+from backend.utils.business_rules import VERSION_KEY, RulesStore
+
+
+def make_store(tmp_path):
+    return RulesStore(str(tmp_path / "business_rules.json"))
+
+
+def test_missing_file_is_created_with_the_defaults(tmp_path):
+    store = make_store(tmp_path)
+    snapshot = store.snapshot()
+    assert snapshot.version == 0 and snapshot.to_dict() == business_rules.default_rules
+    assert os.path.exists(store.path)
+
+
+def test_every_write_bumps_and_persists_the_version(tmp_path):
+    store = make_store(tmp_path)
+    assert store.write({"skip_steps": ["send_email"]}).version == 1
+    assert store.write({"skip_steps": []}).version == 2
+    with open(store.path) as f:
+        assert json.load(f)[VERSION_KEY] == 2
+    # A new process picks up where the file left off
+    restarted = make_store(tmp_path)
+    assert restarted.snapshot().version == 2
+    assert VERSION_KEY not in restarted.snapshot().to_dict()
+
+
+def test_snapshots_are_read_only(tmp_path):
+    rules = make_store(tmp_path).write({"skip_steps": ["send_email"], "discount": {"enabled": True}}).rules
+    assert rules["skip_steps"] == ("send_email",)
+    try:
+        rules["discount"]["enabled"] = False
+    except TypeError:
+        pass
+    assert rules["discount"]["enabled"] is True
+
+
+def test_concurrent_updates_are_not_lost(tmp_path):
+    store = make_store(tmp_path)
+    store.write({"force_steps": []})
+
+    def add(tool):
+        store.update(lambda rules: dict(rules, force_steps=rules["force_steps"] + [tool]))
+
+    threads = [threading.Thread(target=add, args=(f"tool_{i}",)) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    snapshot = make_store(tmp_path).snapshot()
+    assert snapshot.version == 21 and len(snapshot.rules["force_steps"]) == 20
+
+
+def test_write_replaces_the_file_and_keeps_its_mode(tmp_path):
+    store = make_store(tmp_path)
+    store.snapshot()
+    os.chmod(store.path, 0o640)
+    inode = os.stat(store.path).st_ino
+    store.write({"skip_steps": ["payment"]})
+    assert os.stat(store.path).st_ino != inode  # renamed into place, never written in place
+    assert stat.S_IMODE(os.stat(store.path).st_mode) == 0o640
+    assert [name for name in os.listdir(tmp_path) if name.endswith(".tmp")] == []
+
+
+def test_hand_edits_are_picked_up_with_a_new_version(tmp_path, monkeypatch):
+    monkeypatch.setattr(business_rules, "RELOAD_CHECK_INTERVAL", 0.0)
+    store = make_store(tmp_path)
+    store.write({"skip_steps": []})
+    with open(store.path, "w") as f:
+        json.dump({"skip_steps": ["send_email"]}, f)
+    snapshot = store.snapshot()
+    assert snapshot.version == 2 and snapshot.rules["skip_steps"] == ("send_email",)
@@ -0,0 +1,56 @@
+from datetime import date, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.utils.flight_schedule import parse_travel_date
+
+client = TestClient(app)
+TODAY = date(2025, 7, 10)
+
+
+def search(**body):
+    return client.post("/search-flights", json=dict({"from_city": "Delhi", "to_city": "Goa"}, **body))
+
+
+@pytest.mark.parametrize("time_from", ["25:99", "abc", "9:3"])
+def test_malformed_time_is_a_422(time_from):
+    response = search(date=date.today().isoformat(), time_from=time_from)
+    assert response.status_code == 422
+    assert response.json()["details"][0]["loc"] == ["body", "time_from"]
+
+
+def test_time_window_filters_departures():
+    flights = search(date=date.today().isoformat(), time_from="12:00", time_to="18:00").json()["available_flights"]
+    assert flights and all("12:00" <= flight["departure"] <= "18:00" for flight in flights)
+
+
+def test_free_form_date_is_searched():
+    tomorrow = date.today() + timedelta(days=1)
+    response = search(date=f"{tomorrow.day} {tomorrow:%B}")
+    assert response.status_code == 200
+    flights = response.json()["available_flights"]
+    assert flights and {flight["date"] for flight in flights} == {tomorrow.isoformat()}
+
+
+def test_unreadable_date_falls_back_to_the_next_flights():
+    response = search(date="sometime next week")
+    assert response.status_code == 200
+    assert response.json()["available_flights"]
+    assert "note" in response.json()
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("2025-08-12", date(2025, 8, 12)),
+    ("12 August", date(2025, 8, 12)),
+    ("Aug 12th, 2025", date(2025, 8, 12)),
+    ("12th of August 2025", date(2025, 8, 12)),
+    ("12/08/2025", date(2025, 8, 12)),
+    ("3 March", date(2026, 3, 3)),
+    ("tomorrow", date(2025, 7, 11)),
+    ("whenever", None),
+    ("", None),
+])
+def test_parse_travel_date(value, expected):
+    assert parse_travel_date(value, TODAY) == expected
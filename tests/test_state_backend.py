@@ -0,0 +1,80 @@
+import threading
+import time
+
+import pytest
+
+from backend.utils.state_backend import SQLiteStateBackend, create_state_backend
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    return create_state_backend(request.param, str(tmp_path / "state.db"))
+
+
+def row(tool, status="success", ts=1000.0):
+    return {"ts": ts, "tool": tool, "status": status, "entry": {"tool": tool, "status": status}}
+
+
+def test_discounts_round_trip(backend):
+    backend.put_discount("d1", {"id": "d1", "percent": 10})
+    backend.put_discount("d2", {"id": "d2", "percent": 20})
+    backend.put_discount("d1", {"id": "d1", "percent": 15})
+    backend.remove_discount("d2")
+    backend.remove_discount("missing")
+    assert backend.list_discounts() == [{"id": "d1", "percent": 15}]
+
+
+def test_report_tail_numbers_and_filters_rows(backend):
+    tail = backend.report_tail()
+    tail.start_after(41)
+    tail.append([row("book_ticket", ts=1.0), row("payment", "failed", ts=2.0), row("book_ticket", ts=3.0)])
+    assert tail.last_seq() == 44 and tail.count() == 3
+
+    assert [r["seq"] for r in tail.select(tool="book_ticket")] == [42, 44]
+    assert [r["seq"] for r in tail.select(descending=True, limit=2)] == [44, 43]
+    assert [r["seq"] for r in tail.select(since=2.0, status="success")] == [44]
+    assert [r["seq"] for r in tail.oldest(after=42, limit=10)] == [43, 44]
+
+    tail.discard_through(43)
+    assert [r["seq"] for r in tail.select()] == [44]
+    assert tail.select()[0]["entry"] == {"tool": "book_ticket", "status": "success"}
+
+
+def test_sqlite_workers_share_discounts_and_one_report_sequence(tmp_path):
+    path = str(tmp_path / "state.db")
+    first, second = SQLiteStateBackend(path), SQLiteStateBackend(path)
+    first.put_discount("d1", {"id": "d1"})
+    assert second.list_discounts() == [{"id": "d1"}]
+
+    first.report_tail().append([row("book_ticket")])
+    second.report_tail().append([row("payment")])
+    first.report_tail().append([row("send_email")])
+    assert [(r["seq"], r["tool"]) for r in second.report_tail().select()] == [
+        (1, "book_ticket"), (2, "payment"), (3, "send_email")]
+
+
+def test_sqlite_locks_exclude_other_workers_and_are_reentrant(tmp_path):
+    path = str(tmp_path / "state.db")
+    mine, theirs = SQLiteStateBackend(path).lock("rules"), SQLiteStateBackend(path).lock("rules")
+    acquired = threading.Event()
+
+    def other_worker():
+        with theirs:
+            acquired.set()
+
+    with mine:
+        with mine:
+            thread = threading.Thread(target=other_worker)
+            thread.start()
+            time.sleep(0.05)
+            assert not acquired.is_set()
+        # Still held by the outer block
+        time.sleep(0.05)
+        assert not acquired.is_set()
+    thread.join(2)
+    assert acquired.is_set()
+
+
+def test_unknown_backends_are_rejected():
+    with pytest.raises(ValueError):
+        create_state_backend("redis")
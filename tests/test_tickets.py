@@ -0,0 +1,50 @@
+from fastapi.testclient import TestClient
+
+from backend.main import app
+
+client = TestClient(app)
+
+
+def book(traveler_name="Asha Rao", date="2025-08-12"):
+    response = client.post("/book-ticket", json={
+        "from_city": "Delhi", "to_city": "Goa", "date": date, "traveler_name": traveler_name})
+    assert response.status_code == 200
+    return response.json()["ticket_id"]
+
+
+def test_booked_ticket_is_stored(ticket_db):
+    ticket_id = book()
+    ticket = client.get(f"/tickets/{ticket_id}").json()
+    assert ticket["status"] == "booked" and ticket["to_city"] == "Goa"
+
+
+def test_cancel_reschedule_and_update_are_recorded(ticket_db):
+    ticket_id = book()
+    client.post("/reschedule-ticket", json={"ticket_id": ticket_id, "new_date": "2025-08-20"})
+    client.post("/update-info", json={"ticket_id": ticket_id, "traveler_name": "Asha R", "contact": "asha@x.in"})
+    client.post("/cancel-ticket", json={"ticket_id": ticket_id, "reason": "plans changed"})
+    ticket = client.get(f"/tickets/{ticket_id}").json()
+    assert ticket["date"] == "2025-08-20"
+    assert ticket["traveler_name"] == "Asha R" and ticket["contact"] == "asha@x.in"
+    assert ticket["status"] == "cancelled: plans changed"
+
+
+def test_unknown_tickets_are_still_acknowledged(ticket_db):
+    # Tickets from before the store, or ids the LLM made up, succeed as they always did
+    assert client.post("/cancel-ticket", json={"ticket_id": "TKT1", "reason": "x"}).json()["status"] == "cancelled"
+    assert client.post("/reschedule-ticket", json={
+        "ticket_id": "TKT1", "new_date": "2025-08-20"}).json()["status"] == "rescheduled"
+    assert client.post("/update-info", json={
+        "ticket_id": "TKT1", "traveler_name": "A", "contact": "a"}).json()["status"] == "updated"
+    assert client.get("/tickets/TKT1").status_code == 404
+
+
+def test_find_tickets_filters(ticket_db):
+    first = book("Asha Rao", "2025-08-12")
+    book("Ravi Kumar", "2025-08-15")
+    third = book("Asha Rao", "2025-09-01")
+    client.post("/cancel-ticket", json={"ticket_id": third, "reason": "x"})
+    found = client.get("/tickets", params={"traveler_name": "Asha Rao"}).json()["tickets"]
+    assert [t["ticket_id"] for t in found] == [first, third]
+    found = client.get("/tickets", params={"status": "booked", "date_to": "2025-08-31"}).json()["tickets"]
+    assert len(found) == 2
@@ -0,0 +1,85 @@
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.services.tool_cache import ToolResultCache, make_key, tool_cache
+
+
+class Counter:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return {"answer": self.calls}
+
+
+def test_keys_ignore_param_order_whitespace_and_unset_fields():
+    assert make_key("search_flights", {"from_city": " Delhi", "to_city": "Goa", "date": None}) == \
+        make_key("search_flights", {"to_city": "Goa ", "from_city": "Delhi"})
+    assert make_key("search_flights", {"to_city": "Goa"}) != make_key("refund_status", {"to_city": "Goa"})
+
+
+def test_results_are_reused_until_they_expire():
+    cache, compute = ToolResultCache(), Counter()
+    assert cache.call("refund_status", {"ticket_id": "TKT1"}, 0.05, compute) == {"answer": 1}
+    assert cache.call("refund_status", {"ticket_id": "TKT1"}, 0.05, compute) == {"answer": 1}
+    time.sleep(0.06)
+    assert cache.call("refund_status", {"ticket_id": "TKT1"}, 0.05, compute) == {"answer": 2}
+    assert cache.stats()["tools"]["refund_status"] == {
+        "hits": 1, "misses": 2, "shared_calls": 0, "invalidations": 0, "hit_rate": 0.3333}
+
+
+def test_invalidation_only_drops_the_changed_ticket():
+    cache, compute = ToolResultCache(), Counter()
+    cache.call("refund_status", {"ticket_id": "TKT1"}, 60, compute, ticket_id="TKT1")
+    cache.call("refund_status", {"ticket_id": "TKT2"}, 60, compute, ticket_id="TKT2")
+    assert cache.invalidate_ticket(["refund_status"], "TKT1") == 1
+    assert cache.call("refund_status", {"ticket_id": "TKT1"}, 60, compute, ticket_id="TKT1") == {"answer": 3}
+    assert cache.call("refund_status", {"ticket_id": "TKT2"}, 60, compute, ticket_id="TKT2") == {"answer": 2}
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache, compute = ToolResultCache(max_entries=2), Counter()
+    for ticket in ("TKT1", "TKT2", "TKT1", "TKT3"):
+        cache.call("refund_status", {"ticket_id": ticket}, 60, compute)
+    assert cache.stats()["evictions"] == 1
+    # TKT1 was used after TKT2, so TKT2 went
+    assert cache.call("refund_status", {"ticket_id": "TKT1"}, 60, compute) == {"answer": 1}
+    assert cache.call("refund_status", {"ticket_id": "TKT2"}, 60, compute) == {"answer": 4}
+
+
+def test_concurrent_identical_calls_compute_once():
+    cache, release = ToolResultCache(), threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(1)
+        return "ok"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(
+        cache.call("search_flights", {"to_city": "Goa"}, 60, compute))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert results == ["ok"] * 5 and len(calls) == 1
+    assert cache.stats()["tools"]["search_flights"]["shared_calls"] == 4
+
+
+def test_cancelling_a_ticket_invalidates_its_cached_refund_status(ticket_db):
+    client = TestClient(app)
+    tool_cache.clear()
+    first = client.post("/refund-status", json={"ticket_id": "TKTCACHE"}).json()
+    for _ in range(5):
+        assert client.post("/refund-status", json={"ticket_id": "TKTCACHE"}).json() == first
+    before = tool_cache.invalidations.get("refund_status", 0)
+    client.post("/cancel-ticket", json={"ticket_id": "TKTCACHE", "reason": "plans changed"})
+    assert tool_cache.invalidations["refund_status"] == before + 1
+    assert tool_cache.stats()["entries"] == 0
@@ -0,0 +1,82 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import APIRouter, FastAPI, HTTPException
+from pydantic import BaseModel
+
+from backend.services.tool_dispatch import HttpDispatcher, LocalDispatcher
+
+router = APIRouter()
+
+
+class SeatRequest(BaseModel):
+    ticket_id: str
+    seat_number: str
+
+
+@router.post("/select-seat")
+def select_seat(req: SeatRequest):
+    return {"status": "seat_selected", "ticket_id": req.ticket_id, "seat": req.seat_number}
+
+
+@router.post("/report")
+async def add_report(entry: dict):
+    return {"status": "logged", "entry": entry}
+
+
+@router.post("/missing-ticket")
+def missing_ticket(req: SeatRequest):
+    raise HTTPException(status_code=404, detail=f"Ticket {req.ticket_id} not found")
+
+
+@router.post("/broken")
+def broken(req: SeatRequest):
+    raise RuntimeError("boom")
+
+
+app = FastAPI()
+app.include_router(router)
+
+CASES = [
+    ("/select-seat", {"ticket_id": "TKT1", "seat_number": "12A"}),
+    ("/select-seat", {"ticket_id": "TKT1"}),
+    ("/report", {"tool": "book_ticket", "status": "success"}),
+    ("/missing-ticket", {"ticket_id": "TKT1", "seat_number": "1A"}),
+    ("/nowhere", {}),
+]
+
+
+async def both(path, payload):
+    local = await LocalDispatcher([router]).post(path, payload)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app)) as client:
+        remote = await HttpDispatcher(client, "http://smartflow").post(path, payload)
+    return local, remote
+
+
+@pytest.mark.parametrize("path, payload", CASES)
+def test_local_dispatch_matches_http(path, payload):
+    local, remote = asyncio.run(both(path, payload))
+    assert local.status_code == remote.status_code
+    if local.status_code == 200:
+        assert local.data == remote.data
+
+
+def test_validation_errors_are_located_under_body():
+    result = asyncio.run(LocalDispatcher([router]).post("/select-seat", {"ticket_id": "TKT1"}))
+    assert result.status_code == 422
+    assert result.data["details"][0]["loc"] == ["body", "seat_number"]
+
+
+def test_handler_exceptions_become_500():
+    result = asyncio.run(LocalDispatcher([router]).post("/broken", {"ticket_id": "T", "seat_number": "1A"}))
+    assert result.status_code == 500 and result.data["details"] == "boom"
+
+
+def test_routes_are_read_lazily():
+    calls = []
+    dispatcher = LocalDispatcher(lambda: calls.append(1) or [router])
+    assert calls == []
+    assert dispatcher.has_route("/select-seat") and dispatcher.body_fields("/select-seat") == {"ticket_id", "seat_number"}
+    assert dispatcher.body_fields("/report") == frozenset()
+    assert calls == [1]
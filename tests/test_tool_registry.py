@@ -0,0 +1,49 @@
+import pytest
+from fastapi import APIRouter
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.services.tool_registry import ToolRegistry, tool_registry
+
+router = APIRouter()
+
+
+def test_tools_declare_themselves_with_their_routes():
+    specs = tool_registry.specs()
+    assert specs["book_ticket"].path == "/book-ticket"
+    assert specs["book_ticket"].produces == {"ticket_id"}
+    assert specs["confirm_ticket"].runs_after == {"payment"}
+    # Every @tool module is imported and its router kept for the app and the local dispatcher
+    assert len(tool_registry.routers()) >= len({spec.path for spec in specs.values()})
+
+
+def test_aliases_resolve_to_the_canonical_tool():
+    assert tool_registry.canonical("process_payment") == "payment"
+    assert tool_registry.canonical("not_a_tool") == "not_a_tool"
+    assert tool_registry.get("process_payment") is tool_registry.get("payment")
+    endpoints = tool_registry.endpoints()
+    assert endpoints["process_payment"] == endpoints["payment"]
+
+
+def test_tool_must_decorate_a_registered_post_route():
+    registry = ToolRegistry("backend.apis")
+
+    def handler():
+        return {}
+
+    with pytest.raises(ValueError):
+        registry.tool("orphan")(handler)
+
+    registered = router.post("/echo")(handler)
+    registry.tool("echo", aliases=["say"])(registered)
+    assert registry._tools["echo"].path == "/echo"
+    assert registry._aliases == {"say": "echo"}
+
+
+def test_tools_endpoint_lists_every_tool():
+    tools = {entry["name"]: entry for entry in TestClient(app).get("/tools").json()["tools"]}
+    assert set(tools) == set(tool_registry.specs())
+    assert tools["payment"]["aliases"] == ["process_payment"]
+    assert tools["book_ticket"]["fields"] == ["date", "from_city", "to_city", "traveler_name"]
+    assert tools["refund_status"]["cache_ttl"] == 30
+    assert "refund_status" in tools["cancel_ticket"]["invalidates"]
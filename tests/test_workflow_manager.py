@@ -0,0 +1,104 @@
+import asyncio
+import itertools
+
+import pytest
+
+from backend.services import workflow_manager
+from backend.services.tool_dispatch import DispatchResult
+from backend.services.workflow_manager import _build_dependencies, execute_workflow
+from backend.utils.business_rules import RulesSnapshot
+from backend.utils.models import Action, IntentResponse
+
+_versions = itertools.count(10_000)
+
+
+def graph_for(*actions):
+    actions = [Action(tool=tool, params=params) for tool, params in actions]
+    endpoints = workflow_manager.tool_registry.endpoints()
+    return _build_dependencies(actions, [endpoints.get(action.tool) for action in actions])
+
+
+def test_add_ons_wait_for_the_booked_ticket_and_email_for_confirmation():
+    graph = graph_for(
+        ("book_ticket", {"from_city": "Delhi", "to_city": "Goa", "date": "2025-08-12", "traveler_name": "Asha"}),
+        ("add_insurance", {"plan": "basic"}),
+        ("payment", {}),
+        ("confirm_ticket", {"traveler_name": "Asha"}),
+        ("send_email", {"to": "asha@x.in", "subject": "s", "body": "b"}),
+    )
+    assert graph[0] == (set(), {})
+    assert graph[1] == ({0}, {"ticket_id": 0})
+    assert graph[2] == ({0}, {"ticket_id": 0})
+    assert graph[3] == ({0, 2}, {"ticket_id": 0})  # confirm runs after payment
+    assert graph[4] == ({3}, {})                    # email runs after confirm
+
+
+def test_steps_on_the_same_given_ticket_keep_plan_order():
+    graph = graph_for(
+        ("cancel_ticket", {"ticket_id": "TKT1", "reason": "x"}),
+        ("refund_status", {"ticket_id": "TKT1"}),
+        ("refund_status", {"ticket_id": "TKT2"}),
+    )
+    assert [waits for waits, _ in graph] == [set(), {0}, set()]
+
+
+class RecordingDispatcher:
+    """Stands in for the tool endpoints; records how many calls overlap."""
+
+    def __init__(self):
+        self.running = 0
+        self.peak = 0
+        self.calls = []
+
+    async def post(self, endpoint, params):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        self.calls.append((endpoint, dict(params)))
+        await asyncio.sleep(0.02)
+        self.running -= 1
+        if endpoint == "/book-ticket":
+            return DispatchResult(200, {"status": "success", "ticket_id": "TKTNEW"})
+        return DispatchResult(200, {"status": "ok"})
+
+
+@pytest.fixture
+def dispatcher(monkeypatch):
+    fake = RecordingDispatcher()
+    monkeypatch.setattr(workflow_manager._Dispatchers, "for_tool", lambda self, tool, endpoint: fake)
+    monkeypatch.setattr(workflow_manager.report.report_sink, "submit", lambda entry: None)
+    return fake
+
+
+def run(actions, rules=None, max_parallel=4):
+    intent = IntentResponse(intent="test", actions=[Action(tool=tool, params=params) for tool, params in actions])
+    snapshot = RulesSnapshot(next(_versions), rules or {})
+    return asyncio.run(execute_workflow(intent, rules=snapshot, max_parallel=max_parallel))
+
+
+def test_independent_steps_run_concurrently(dispatcher):
+    result = run([("refund_status", {"ticket_id": f"TKT{i}"}) for i in range(4)])
+    assert [step["status"] for step in result["steps"]] == ["success"] * 4
+    assert dispatcher.peak == 4
+
+
+def test_dependent_steps_run_after_their_producer(dispatcher):
+    result = run([
+        ("book_ticket", {"from_city": "Delhi", "to_city": "Goa", "date": "2025-08-12", "traveler_name": "Asha"}),
+        ("add_insurance", {"plan": "basic"}),
+        ("select_seat", {"seat_number": "12A"}),
+    ])
+    assert [step["status"] for step in result["steps"]] == ["success"] * 3
+    assert dispatcher.calls[0][0] == "/book-ticket"
+    assert all(params["ticket_id"] == "TKTNEW" for _, params in dispatcher.calls[1:])
+    assert dispatcher.peak == 2  # the two add-ons overlap, the booking ran alone
+
+
+def test_forced_steps_get_no_params_from_the_intent(dispatcher):
+    result = run([
+        ("book_ticket", {"from_city": "Delhi", "to_city": "Goa", "date": "2025-08-12", "traveler_name": "Asha"}),
+    ], rules={"force_steps": ["confirm_ticket"]})
+    forced = result["steps"][-1]
+    # ticket_id comes from the booking, but traveler_name is not copied over from book_ticket
+    assert forced["tool"] == "confirm_ticket" and forced["status"] == "invalid_params"
+    assert [error["loc"][-1] for error in forced["errors"]] == ["traveler_name"]
+    assert [endpoint for endpoint, _ in dispatcher.calls] == ["/book-ticket"]